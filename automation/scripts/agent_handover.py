@@ -8,23 +8,44 @@ import json
 import os
 import datetime
 import sys
+import time
 from pathlib import Path
 
+from handover_store import (ARCHIVE_MEMBER_RECORDS, DEFAULT_CLAIM_POLL_INTERVAL, DEFAULT_PAYLOAD_INLINE_LIMIT,
+                            DEFAULT_PENDING_TTL_DAYS, DEFAULT_RETENTION_DAYS, PAYLOAD_ENCODINGS, HandoverIndex,
+                            HandoverNotifier, append_archive_member, archive_writer_id, handover_lock,
+                            index_entry, payload_encoding, read_archive_record, read_payload, write_json_atomic,
+                            write_payload)
+from ref_tags import generate_ref_tag
+
 class AgentHandover:
-    def __init__(self, base_dir="/tmp/locus_handover"):
+    def __init__(self, base_dir="/tmp/locus_handover", inline_limit=None, compression=None):
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
+        if inline_limit is None:
+            inline_limit = int(os.environ.get("LOCUS_HANDOVER_INLINE_LIMIT", DEFAULT_PAYLOAD_INLINE_LIMIT))
+        self.inline_limit = inline_limit
+        self.compression = payload_encoding(compression)
+        self.index = HandoverIndex(self.base_dir / "handover_index.db")
+        self.lock_dir = self.base_dir / ".locks"
+        self.notifier = HandoverNotifier(self.base_dir / ".notify")
+        self.archive_dir = self.base_dir / "archive"
+        
+        # Carry over handovers recorded in the legacy JSON index
+        self.index.migrate_json(self.base_dir / "handover_index.json")
         
     def generate_ref_tag(self, handover_type="handover"):
-        """Generate REF tag for handover using the shell script"""
-        import subprocess
-        script_path = Path(__file__).parent / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "artifact", f"agent-{handover_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        """Generate REF tag for handover using the shared allocator"""
+        return generate_ref_tag("artifact", f"agent-{handover_type}")
     
     def create_handover(self, from_agent, to_agent, task_context, decision_context=None):
-        """Create a handover from one agent to another"""
+        """
+        Create a handover from one agent to another
+        
+        Task and decision context beyond inline_limit bytes are written once to
+        a compressed payload file next to the handover; the handover file itself
+        then only holds the header that status changes rewrite.
+        """
         ref_tag = self.generate_ref_tag("handover")
         timestamp = datetime.datetime.now().isoformat()
         
@@ -38,16 +59,19 @@ class AgentHandover:
             "decision_context": decision_context or {},
             "status": "pending",
             "machine_source": os.uname().nodename,
-            "priority": "normal"
+            "priority": "normal",
+            "version": 1
         }
         
-        # Write handover file
+        # Write payload, handover file and index entry under the handover's lock
         handover_file = self.base_dir / f"handover_{ref_tag}.json"
-        with open(handover_file, 'w') as f:
-            json.dump(handover_data, f, indent=2)
-            
-        # Update handover index
-        self._update_handover_index(ref_tag, handover_data)
+        with handover_lock(self.lock_dir, ref_tag):
+            handover_data = self._spill_payload(handover_data)
+            write_json_atomic(handover_file, handover_data)
+            self._update_handover_index(ref_tag, handover_data)
+        
+        # Wake agents blocked in claim_next
+        self.notifier.notify(to_agent)
         
         print(f"✓ Handover created: {ref_tag}")
         print(f"  From: {from_agent}")
@@ -56,16 +80,54 @@ class AgentHandover:
         
         return ref_tag
     
-    def read_handover(self, ref_tag):
-        """Read a handover by REF tag"""
-        handover_file = self.base_dir / f"handover_{ref_tag}.json"
+    def _spill_payload(self, handover_data):
+        """Move large task/decision context into a compressed payload file"""
+        payload = {key: handover_data[key] for key in ("task_context", "decision_context")}
+        if len(json.dumps(payload, separators=(',', ':'))) <= self.inline_limit:
+            return handover_data
         
-        if not handover_file.exists():
-            print(f"✗ Handover not found: {ref_tag}")
-            return None
+        ref_tag = handover_data["ref_tag"]
+        payload_file = self.base_dir / f"handover_{ref_tag}.payload{PAYLOAD_ENCODINGS[self.compression]}"
+        header = {key: value for key, value in handover_data.items() if key not in payload}
+        header["payload"] = write_payload(payload_file, payload, self.compression)
+        return header
+    
+    def load_payload(self, handover_data):
+        """
+        Return the task and decision context of a handover
+        
+        Args:
+            handover_data: Handover header, as returned by read_handover
             
-        with open(handover_file, 'r') as f:
-            handover_data = json.load(f)
+        Returns:
+            Dict with 'task_context' and 'decision_context'
+        """
+        if "payload" in handover_data:
+            return read_payload(self.base_dir, handover_data["payload"])
+        return {key: handover_data.get(key) for key in ("task_context", "decision_context")}
+    
+    def read_handover(self, ref_tag, include_payload=False):
+        """
+        Read a handover by REF tag
+        
+        Only the header is read unless include_payload is set, in which case a
+        spilled payload is loaded and merged back in place of its reference.
+        """
+        handover_file = self.base_dir / f"handover_{ref_tag}.json"
+        
+        try:
+            with open(handover_file, 'r') as f:
+                handover_data = json.load(f)
+        except FileNotFoundError:
+            handover_data = self.read_archived_handover(ref_tag)
+            if handover_data is None:
+                print(f"✗ Handover not found: {ref_tag}")
+                return None
+        
+        if include_payload and "payload" in handover_data:
+            payload = self.load_payload(handover_data)
+            handover_data = {key: value for key, value in handover_data.items() if key != "payload"}
+            handover_data.update(payload)
             
         print(f"✓ Handover retrieved: {ref_tag}")
         print(f"  From: {handover_data['from_agent']}")
@@ -75,45 +137,125 @@ class AgentHandover:
         
         return handover_data
     
-    def complete_handover(self, ref_tag, completion_notes=None):
-        """Mark a handover as completed"""
+    def complete_handover(self, ref_tag, completion_notes=None, expected_version=None):
+        """
+        Mark a handover as completed
+        
+        The read-modify-write runs under the handover's lock and bumps its
+        version, so of several concurrent completions exactly one succeeds.
+        Callers that read the handover earlier can pass expected_version to
+        fail instead of completing a record that changed in the meantime.
+        """
         handover_file = self.base_dir / f"handover_{ref_tag}.json"
         
-        if not handover_file.exists():
-            print(f"✗ Handover not found: {ref_tag}")
-            return False
+        with handover_lock(self.lock_dir, ref_tag):
+            if not handover_file.exists():
+                print(f"✗ Handover not found: {ref_tag}")
+                return False
+                
+            with open(handover_file, 'r') as f:
+                handover_data = json.load(f)
             
-        with open(handover_file, 'r') as f:
-            handover_data = json.load(f)
+            # A claim bumps the index before the file, so trust whichever is newer
+            indexed = self.index.get(ref_tag)
+            version = max(handover_data.get("version", 1), indexed["version"] if indexed else 1)
+            if expected_version is not None and version != expected_version:
+                print(f"✗ Handover {ref_tag} changed: version {version}, expected {expected_version}")
+                return False
+            if handover_data["status"] == "completed":
+                # Repair an index left behind by an interrupted completion, unless it is being archived
+                if self.index.archived_location(ref_tag) is None:
+                    self._update_handover_index(ref_tag, handover_data)
+                print(f"✗ Handover already completed: {ref_tag}")
+                return False
+            if handover_data["status"] == "expired":
+                print(f"✗ Handover expired: {ref_tag}")
+                return False
+                
+            handover_data["status"] = "completed"
+            handover_data["completed_at"] = datetime.datetime.now().isoformat()
+            handover_data["completion_notes"] = completion_notes or ""
+            handover_data["version"] = version + 1
             
-        handover_data["status"] = "completed"
-        handover_data["completed_at"] = datetime.datetime.now().isoformat()
-        handover_data["completion_notes"] = completion_notes or ""
-        
-        with open(handover_file, 'w') as f:
-            json.dump(handover_data, f, indent=2)
-            
-        self._update_handover_index(ref_tag, handover_data)
+            write_json_atomic(handover_file, handover_data)
+            self._update_handover_index(ref_tag, handover_data)
         
         print(f"✓ Handover completed: {ref_tag}")
         return True
     
-    def list_pending_handovers(self, for_agent=None):
-        """List all pending handovers, optionally filtered by target agent"""
-        index_file = self.base_dir / "handover_index.json"
+    def claim_next(self, agent, timeout=None, poll_interval=DEFAULT_CLAIM_POLL_INTERVAL):
+        """
+        Claim the oldest pending handover for an agent, waiting for one if necessary
+        
+        The agent listens for creation notifications while it waits, so it wakes
+        as soon as a handover targets it; the index is also re-checked every
+        poll_interval for handovers that arrive without one (e.g. by sync).
+        Each handover is claimed by exactly one caller.
         
-        if not index_file.exists():
-            print("No handovers found")
-            return []
+        Args:
+            agent: Agent claiming work
+            timeout: Seconds to wait; None waits indefinitely, 0 never blocks
+            poll_interval: Maximum seconds between index checks
             
-        with open(index_file, 'r') as f:
-            index = json.load(f)
+        Returns:
+            The claimed handover record, or None if the timeout elapsed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        # Listen before the first check so a handover created in between still wakes us
+        with self.notifier.listen(agent) as listener:
+            while True:
+                handover_data = self._claim(agent)
+                if handover_data is not None:
+                    print(f"✓ Handover claimed: {handover_data['ref_tag']}")
+                    return handover_data
+                
+                wait = poll_interval
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = min(wait, remaining)
+                listener.wait(wait)
+    
+    def _claim(self, agent):
+        """Claim one pending handover in the index and record the claim in its file"""
+        rolled_back = []
+        while True:
+            claimed_at = datetime.datetime.now().isoformat()
+            entry = self.index.claim_next(agent, claimed_at, skip=rolled_back)
+            if entry is None:
+                return None
             
-        pending = [h for h in index.get("handovers", []) 
-                  if h["status"] == "pending"]
-                  
-        if for_agent:
-            pending = [h for h in pending if h["to_agent"] == for_agent]
+            ref_tag = entry["ref_tag"]
+            handover_file = self.base_dir / f"handover_{ref_tag}.json"
+            with handover_lock(self.lock_dir, ref_tag):
+                try:
+                    with open(handover_file, 'r') as f:
+                        handover_data = json.load(f)
+                except FileNotFoundError:
+                    handover_data = None
+                
+                # The index row was claimed before the lock was taken, so the file may have moved on
+                if (handover_data is None or handover_data["status"] != "pending"
+                        or handover_data.get("version", 1) >= entry["version"]):
+                    status = handover_data["status"] if handover_data else "pending"
+                    self.index.transition(ref_tag, "claimed", status, claimed_at)
+                    if handover_data is not None:
+                        self._update_handover_index(ref_tag, handover_data)
+                    rolled_back.append(ref_tag)
+                    continue
+                
+                handover_data["status"] = "claimed"
+                handover_data["claimed_at"] = claimed_at
+                handover_data["version"] = entry["version"]
+                write_json_atomic(handover_file, handover_data)
+                self._update_handover_index(ref_tag, handover_data)
+            return handover_data
+    
+    def list_pending_handovers(self, for_agent=None):
+        """List all pending handovers, optionally filtered by target agent"""
+        pending = self.index.list(status="pending", to_agent=for_agent or None)
             
         print(f"✓ Found {len(pending)} pending handovers")
         for handover in pending:
@@ -121,34 +263,127 @@ class AgentHandover:
             
         return pending
     
-    def _update_handover_index(self, ref_tag, handover_data):
-        """Update the handover index with current handover"""
-        index_file = self.base_dir / "handover_index.json"
+    def archive_handovers(self, retention_days=None, ttl_days=None, now=None):
+        """
+        Move finished handovers out of the hot directory and index
         
-        if index_file.exists():
-            with open(index_file, 'r') as f:
-                index = json.load(f)
-        else:
-            index = {"handovers": [], "last_updated": None}
+        Handovers completed more than retention_days ago, and pending handovers
+        older than ttl_days (which are marked expired first), are appended to
+        gzip segments archive/handovers_<YYYYMMDD>_<writer>.jsonl.gz partitioned
+        by the day they were completed or expired; the writer id keeps segments
+        of endpoints that sync with each other apart. Each record keeps its payload, and
+        the index keeps a lookup from REF tag to segment and offset so
+        read_handover still finds it. Claimed handovers are never archived.
+        
+        Args:
+            retention_days: Days to keep completed handovers hot (LOCUS_HANDOVER_RETENTION_DAYS, default 7)
+            ttl_days: Days before a pending handover expires; 0 disables expiry
+                (LOCUS_HANDOVER_TTL_DAYS, default 30)
+            now: Reference time, defaults to the current time
             
-        # Remove existing entry for this ref_tag
-        index["handovers"] = [h for h in index["handovers"] 
-                            if h["ref_tag"] != ref_tag]
+        Returns:
+            Dict with the number of handovers archived and expired
+        """
+        if retention_days is None:
+            retention_days = float(os.environ.get("LOCUS_HANDOVER_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+        if ttl_days is None:
+            ttl_days = float(os.environ.get("LOCUS_HANDOVER_TTL_DAYS", DEFAULT_PENDING_TTL_DAYS))
+        now = now or datetime.datetime.now()
+        completed_before = (now - datetime.timedelta(days=retention_days)).isoformat()
+        pending_before = (now - datetime.timedelta(days=ttl_days)).isoformat() if ttl_days > 0 else None
         
-        # Add updated entry
-        index["handovers"].append({
-            "ref_tag": ref_tag,
-            "from_agent": handover_data["from_agent"],
-            "to_agent": handover_data["to_agent"],
-            "status": handover_data["status"],
-            "created_at": handover_data["created_at"],
-            "machine_source": handover_data["machine_source"]
-        })
+        archived = expired = 0
+        self.archive_dir.mkdir(exist_ok=True)
+        # One archiver at a time appends to the segments
+        with handover_lock(self.lock_dir, "_archive"):
+            candidates = self.index.retention_candidates(completed_before, pending_before)
+            for start in range(0, len(candidates), ARCHIVE_MEMBER_RECORDS):
+                records = []
+                for entry in candidates[start:start + ARCHIVE_MEMBER_RECORDS]:
+                    record = self._archive_record(entry, now)
+                    if record is None:
+                        continue
+                    records.append(record)
+                    if entry["status"] == "pending":
+                        expired += 1
+                archived += self._write_archive_batch(records, now)
+        
+        print(f"✓ Archived {archived} handovers ({expired} expired)")
+        return {"archived": archived, "expired": expired}
+    
+    def _archive_record(self, entry, now):
+        """Load the full record of an archiving candidate, expiring it if it is a stale pending handover"""
+        ref_tag = entry["ref_tag"]
+        handover_file = self.base_dir / f"handover_{ref_tag}.json"
+        with handover_lock(self.lock_dir, ref_tag):
+            try:
+                with open(handover_file, 'r') as f:
+                    handover_data = json.load(f)
+            except FileNotFoundError:
+                # Archive the index entry alone rather than leave it in the hot index
+                return dict(entry)
+            
+            if entry["status"] == "pending":
+                # Lose to a concurrent claim instead of expiring work an agent just took
+                timestamp = now.isoformat()
+                if not self.index.transition(ref_tag, "pending", "expired", timestamp):
+                    return None
+                handover_data["status"] = "expired"
+                handover_data["expired_at"] = timestamp
+                handover_data["version"] = max(handover_data.get("version", 1), entry["version"]) + 1
+                write_json_atomic(handover_file, handover_data)
+            elif handover_data["status"] != entry["status"]:
+                return None
+        
+        if "payload" in handover_data:
+            payload = self.load_payload(handover_data)
+            handover_data = {key: value for key, value in handover_data.items() if key != "payload"}
+            handover_data.update(payload)
+        return handover_data
+    
+    def _write_archive_batch(self, records, now):
+        """Append records to their day's segment, move them to the archive lookup and delete their files"""
+        segments = {}
+        for record in records:
+            day = index_entry(record)["updated_at"] or now.isoformat()
+            segments.setdefault(day[:10].replace("-", ""), []).append(record)
         
-        index["last_updated"] = datetime.datetime.now().isoformat()
+        locations = []
+        writer = archive_writer_id(self.base_dir)
+        for day, day_records in sorted(segments.items()):
+            segment = f"handovers_{day}_{writer}.jsonl.gz"
+            offset = append_archive_member(self.archive_dir / segment, day_records)
+            locations.extend({"ref_tag": record["ref_tag"], "segment": segment, "member_offset": offset,
+                              "line": line, "status": record["status"], "to_agent": record.get("to_agent")}
+                             for line, record in enumerate(day_records))
         
-        with open(index_file, 'w') as f:
-            json.dump(index, f, indent=2)
+        # The segments are durable before the index forgets the hot entries
+        self.index.archive(locations, now.isoformat())
+        for record in records:
+            ref_tag = record["ref_tag"]
+            with handover_lock(self.lock_dir, ref_tag):
+                for suffix in [".json"] + [f".payload{ext}" for ext in PAYLOAD_ENCODINGS.values()]:
+                    try:
+                        (self.base_dir / f"handover_{ref_tag}{suffix}").unlink()
+                    except FileNotFoundError:
+                        pass
+                # The lock file stays: unlinking it while held would let a later locker
+                # flock a fresh inode while another process still waits on this one
+        return len(locations)
+    
+    def read_archived_handover(self, ref_tag):
+        """Return an archived handover record, or None if the REF tag is not archived"""
+        location = self.index.archived_location(ref_tag)
+        if location is None:
+            return None
+        return read_archive_record(self.archive_dir / location["segment"], location["member_offset"],
+                                   location["line"])
+    
+    def _update_handover_index(self, ref_tag, handover_data):
+        """Update the handover index with current handover, never rolling back a newer version"""
+        entry = index_entry(dict(handover_data, ref_tag=ref_tag))
+        if not self.index.insert(entry):
+            self.index.update_if_newer(entry)
 
 def main():
     if len(sys.argv) < 2:
@@ -157,6 +392,8 @@ def main():
         print("  python3 agent_handover.py read <ref_tag>")
         print("  python3 agent_handover.py complete <ref_tag> [completion_notes]")
         print("  python3 agent_handover.py list [agent_name]")
+        print("  python3 agent_handover.py claim <agent_name> [timeout_seconds]")
+        print("  python3 agent_handover.py archive [retention_days] [ttl_days]")
         sys.exit(1)
         
     handover = AgentHandover()
@@ -178,7 +415,7 @@ def main():
             print("Error: read requires ref_tag")
             sys.exit(1)
         ref_tag = sys.argv[2]
-        handover_data = handover.read_handover(ref_tag)
+        handover_data = handover.read_handover(ref_tag, include_payload=True)
         if handover_data:
             print(json.dumps(handover_data, indent=2))
             
@@ -194,6 +431,23 @@ def main():
         for_agent = sys.argv[2] if len(sys.argv) > 2 else None
         handovers = handover.list_pending_handovers(for_agent)
         
+    elif command == "claim":
+        if len(sys.argv) < 3:
+            print("Error: claim requires agent_name")
+            sys.exit(1)
+        timeout = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        handover_data = handover.claim_next(sys.argv[2], timeout)
+        if handover_data:
+            print(json.dumps(handover_data, indent=2))
+        else:
+            print("No handover available")
+            sys.exit(1)
+            
+    elif command == "archive":
+        retention_days = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        ttl_days = float(sys.argv[3]) if len(sys.argv) > 3 else None
+        handover.archive_handovers(retention_days, ttl_days)
+        
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
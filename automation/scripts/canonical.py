@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Canonical JSON Encoding for Project Locus
+Single-pass canonical serialisation shared by context hashes, signatures and the receipt chain
+"""
+
+import json
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Canonical form: sorted keys, no whitespace, UTF-8 (non-ASCII left unescaped), stdlib float formatting.
+# Pinned to the stdlib encoder so hashes never depend on which optional packages a machine has installed.
+_stdlib_encoder = json.JSONEncoder(sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj canonically; use this for anything that is hashed, signed or chained"""
+    return _stdlib_encoder.encode(obj).encode()
+
+
+def fast_dumps(obj: Any) -> bytes:
+    """
+    Encode obj compactly with orjson when installed
+
+    The bytes are not canonical (orjson formats some floats differently,
+    e.g. 0.00001 for 1e-05), so they must never be hashed or compared with
+    dumps() output; use it for sizes and transient payloads only.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            # Integers wider than 64 bits
+            pass
+    return dumps(obj)
+
+
+def encodings(obj: Any) -> Iterator[bytes]:
+    """
+    Yield obj's canonical encoding, then its orjson encoding if that differs
+
+    Receipts chained while orjson was the canonical backend may hash the
+    orjson float formatting, so verifiers that re-encode a parsed document
+    also try it before declaring a mismatch. That fallback needs orjson on
+    the verifying machine; everything chained since is stdlib-encoded.
+    """
+    first = dumps(obj)
+    yield first
+    if orjson is not None:
+        legacy = fast_dumps(obj)
+        if legacy != first:
+            yield legacy
+
+
+def dumps_reusing(obj: Any, known: Dict[int, bytes]) -> bytes:
+    """
+    Encode obj canonically, splicing in known encodings of nested dicts
+
+    Args:
+        obj: Value to encode
+        known: id() of nested objects to their canonical encoding
+
+    Returns:
+        Canonical encoding of obj
+    """
+    if id(obj) in known:
+        return known[id(obj)]
+    if isinstance(obj, dict) and _contains_known(obj, known):
+        return join_object({key: dumps_reusing(value, known) for key, value in obj.items()})
+    return dumps(obj)
+
+
+def _contains_known(obj: Dict[str, Any], known: Dict[int, bytes]) -> bool:
+    """Whether any nested dict value of obj (string-keyed) has a known encoding"""
+    if not all(isinstance(key, str) for key in obj):
+        return False
+    return any(id(value) in known or (isinstance(value, dict) and _contains_known(value, known))
+               for value in obj.values())
+
+
+def join_object(fragments: Dict[str, bytes]) -> bytes:
+    """
+    Assemble the canonical encoding of an object from already-encoded values
+
+    join_object({k: dumps(v) for k, v in obj.items()}) == dumps(obj), so large
+    members such as context snapshots can be encoded once and reused in every
+    document that embeds them.
+
+    Args:
+        fragments: Member name to canonical encoding of its value
+
+    Returns:
+        Canonical encoding of the object
+    """
+    return b"{" + b",".join(dumps(key) + b":" + fragments[key] for key in sorted(fragments)) + b"}"
+
+
+class Encoded(dict):
+    """
+    A dict carrying its canonical encoding
+
+    Producers that assembled the bytes with join_object attach them (and the
+    per-member fragments) here so consumers such as hashing and the receipt
+    store never serialise the dict again. Members covered by the encoding must
+    not be modified after construction.
+    """
+
+    __slots__ = ("canonical", "members")
+
+    def __init__(self, value: Dict[str, Any], canonical: bytes, members: Optional[Dict[str, bytes]] = None):
+        super().__init__(value)
+        self.canonical = canonical
+        self.members = members or {}
+
+
+def canonical_bytes(obj: Dict[str, Any]) -> bytes:
+    """Return obj's attached canonical encoding, or encode it now"""
+    return obj.canonical if isinstance(obj, Encoded) else dumps(obj)
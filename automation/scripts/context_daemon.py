@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Context Daemon for Project Locus
+Long-running ContextTracker serving captures and health reports over a Unix domain socket
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+DEFAULT_SOCKET_PATH = Path(os.environ.get("LOCUS_CONTEXT_SOCKET", "/tmp/locus_context.sock"))
+CONNECT_TIMEOUT = 0.5
+REQUEST_TIMEOUT = 30.0
+
+
+def _event_summary(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {'ref_tag': event['ref_tag'], 'receipt_id': event['receipt_id'], 'hash': event['hash']}
+
+
+def _make_server(socket_path: Path, context_daemon: 'ContextDaemon'):
+    """Create the threaded Unix socket server; socketserver is only imported by the daemon itself"""
+    import socketserver
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        """Serves newline-delimited JSON requests until the client disconnects"""
+
+        def handle(self) -> None:
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    response = self.server.context_daemon.handle(json.loads(line))
+                except Exception as e:
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+    class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    server = UnixServer(str(socket_path), RequestHandler)
+    server.context_daemon = context_daemon
+    return server
+
+
+class ContextDaemon:
+    """
+    Keeps one warm ContextTracker and serves it on a Unix domain socket
+
+    Requests are one JSON object per line with an 'op' of ping, capture,
+    capture_batch, health or shutdown; each gets one JSON line back. Tracker
+    calls are serialised, and anything they print is returned as 'output' so
+    the client can show it.
+    """
+
+    def __init__(self, tracker, socket_path: Path = DEFAULT_SOCKET_PATH):
+        self.tracker = tracker
+        self.socket_path = Path(socket_path)
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._server = None
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Execute one request
+
+        Args:
+            request: Decoded request
+
+        Returns:
+            Response with 'ok' and either 'result' and 'output' or 'error'
+        """
+        op = request.get('op')
+        if op == 'ping':
+            return {'ok': True, 'result': {'pid': os.getpid()}}
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True, 'result': None}
+
+        output = io.StringIO()
+        with self._lock, redirect_stdout(output):
+            if op == 'capture':
+                event = self.tracker.capture_context_event(
+                    request['action'], request.get('trigger', 'cli_invocation'), request.get('changes') or {}
+                )
+                result = _event_summary(event)
+            elif op == 'capture_batch':
+                result = [_event_summary(event) for event in self.tracker.capture_context_events(request['events'])]
+            elif op == 'health':
+                if self._monitor is None:
+                    from context_toolkit import ContextHealthMonitor
+                    self._monitor = ContextHealthMonitor(self.tracker)
+                result = self._monitor.check_context_health()
+            else:
+                return {'ok': False, 'error': f"Unknown op: {op}"}
+
+        return {'ok': True, 'result': result, 'output': output.getvalue()}
+
+    def _claim_socket(self) -> None:
+        """Remove a stale socket file, refusing to start if another daemon answers on it"""
+        if not self.socket_path.exists():
+            return
+        if DaemonClient(self.socket_path).request('ping') is not None:
+            raise RuntimeError(f"Context daemon already running on {self.socket_path}")
+        self.socket_path.unlink()
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until shutdown() or SIGTERM/SIGINT"""
+        self._claim_socket()
+        # Bind under a restrictive umask so the socket is never reachable by other users, even briefly
+        umask = os.umask(0o117)
+        try:
+            self._server = _make_server(self.socket_path, self)
+        finally:
+            os.umask(umask)
+
+        # Signal handlers can only be installed from the main thread (tests embed the daemon in a thread)
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: threading.Thread(target=self.shutdown, daemon=True).start())
+
+        print(f"✓ Context daemon listening on {self.socket_path} (pid {os.getpid()})", flush=True)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self.tracker.flush()
+                self.tracker.receipt_store.close()
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class DaemonClient:
+    """
+    Thin client for ContextDaemon
+
+    request() returns None when no daemon is listening, so callers can fall back
+    to running in-process. Failures after the request was sent are raised, since
+    the daemon may already have acted on it.
+    """
+
+    def __init__(self, socket_path: Path = DEFAULT_SOCKET_PATH, timeout: float = REQUEST_TIMEOUT):
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+
+    def request(self, op: str, **params) -> Optional[Dict[str, Any]]:
+        """
+        Send one request and wait for its response
+
+        Args:
+            op: Operation name
+            **params: Operation parameters
+
+        Returns:
+            Decoded response, or None if the daemon is not running
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            try:
+                sock.connect(str(self.socket_path))
+            except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+                return None
+
+            sock.settimeout(self.timeout)
+            sock.sendall(json.dumps(dict(params, op=op)).encode() + b"\n")
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+            if not line:
+                raise ConnectionError("Context daemon closed the connection without responding")
+            return json.loads(line)
+        finally:
+            sock.close()
+
+
+def main():
+    """Run, stop or query the context daemon"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Locus Context Daemon')
+    parser.add_argument('--socket', default=str(DEFAULT_SOCKET_PATH), help='Unix socket path')
+    parser.add_argument('--project', help='Project path for git and agent status')
+    parser.add_argument('--stop', action='store_true', help='Stop a running daemon')
+    parser.add_argument('--status', action='store_true', help='Check whether a daemon is running')
+    args = parser.parse_args()
+
+    client = DaemonClient(Path(args.socket))
+    if args.stop or args.status:
+        response = client.request('shutdown' if args.stop else 'ping')
+        if response is None:
+            print(f"Context daemon not running on {args.socket}")
+            sys.exit(1)
+        if args.stop:
+            print("✓ Context daemon stopping")
+        else:
+            print(f"✓ Context daemon running (pid {response['result']['pid']})")
+        return
+
+    from context_toolkit import ContextTracker
+    tracker = ContextTracker(args.project) if args.project else ContextTracker()
+    ContextDaemon(tracker, Path(args.socket)).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,130 @@ Python implementation for context event capture and monitoring
 """
 
 import json
-import hashlib
-import subprocess
 import os
 import sys
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+# Loaded on first use, so the daemon client path and --help stay fast
+asyncio = lazy_import("asyncio")
+futures = lazy_import("concurrent.futures")
+hashlib = lazy_import("hashlib")
+subprocess = lazy_import("subprocess")
+canonical = lazy_import("canonical")
+receipt_store = lazy_import("receipt_store")
+ref_tags = lazy_import("ref_tags")
+snapshot_store = lazy_import("snapshot_store")
+
+
+DEFAULT_CONTEXT_TTL = 2.0
+AUDIT_READ_CHUNK = 1024 * 1024
+DEFAULT_HEARTBEAT_INTERVAL = 60
+# An agent is in sync while its heartbeat is at most this many intervals old
+DEFAULT_HEARTBEAT_GRACE = 2.0
+DEFAULT_LAG_WINDOW = 300
+DEFAULT_ASYNC_QUEUE_SIZE = 256
+DEFAULT_ASYNC_WRITE_BATCH = 1000
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Return (mtime_ns, size, inode) of a file, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ContextSnapshotCache:
+    """
+    Cached git change count and agent status for get_current_context
+    
+    The agent status is re-read only when AGENT_STATUS.json changes on disk. The git
+    change count is refreshed when .git/index or .git/HEAD changes, or once it is
+    older than the TTL, since edits to unstaged files do not touch the index.
+    LOCUS_CONTEXT_TTL overrides the default TTL; 0 disables git caching.
+    """
+    
+    def __init__(self, project_path: Path, ttl: Optional[float] = None):
+        self.project_path = Path(project_path)
+        self.agent_status_path = self.project_path / "context" / "AGENT_STATUS.json"
+        self.git_dir = self.project_path / ".git"
+        self.ttl = float(os.environ.get("LOCUS_CONTEXT_TTL", DEFAULT_CONTEXT_TTL)) if ttl is None else ttl
+        
+        self._git_changes = None
+        self._git_stamp = None
+        self._git_taken_at = 0.0
+        self._agents = None
+        self._agents_stamp = None
+    
+    def git_stamp(self) -> Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]]]:
+        """Current stamps of .git/index and .git/HEAD"""
+        return _file_stamp(self.git_dir / "index"), _file_stamp(self.git_dir / "HEAD")
+    
+    def cached_git_changes(self) -> Optional[int]:
+        """Cached git change count if still valid, otherwise None"""
+        if (self._git_changes is not None and self.git_stamp() == self._git_stamp
+                and time.monotonic() - self._git_taken_at < self.ttl):
+            return self._git_changes
+        return None
+    
+    def record_git_changes(self, porcelain: str, stamp: Tuple, taken_at: float) -> int:
+        """
+        Cache the result of a `git status --porcelain` run
+        
+        Args:
+            porcelain: Output of the git run
+            stamp: git_stamp() taken before the run started
+            taken_at: time.monotonic() when the run started
+            
+        Returns:
+            Number of changed entries
+        """
+        self._git_changes = len([line for line in porcelain.split('\n') if line.strip()])
+        self._git_stamp = stamp
+        self._git_taken_at = taken_at
+        return self._git_changes
+    
+    def git_changes(self) -> int:
+        """Number of entries in `git status --porcelain`, cached per index/HEAD state"""
+        cached = self.cached_git_changes()
+        if cached is not None:
+            return cached
+        
+        stamp = self.git_stamp()
+        taken_at = time.monotonic()
+        git_result = subprocess.run(
+            ["git", "status", "--porcelain"],
+            capture_output=True,
+            text=True,
+            cwd=self.project_path
+        )
+        return self.record_git_changes(git_result.stdout, stamp, taken_at)
+    
+    def agent_status(self) -> Dict[str, Any]:
+        """Parsed AGENT_STATUS.json, re-read only when the file changes"""
+        stamp = _file_stamp(self.agent_status_path)
+        if self._agents is not None and stamp == self._agents_stamp:
+            return self._agents
+        
+        agents = {}
+        if stamp is not None:
+            with open(self.agent_status_path, 'r') as f:
+                agents = json.load(f)
+        self._agents = agents
+        self._agents_stamp = stamp
+        return agents
+    
+    def invalidate(self) -> None:
+        """Force the next lookups to hit git and the filesystem"""
+        self._git_changes = None
+        self._agents = None
 
 
 class ContextTracker:
@@ -19,13 +136,24 @@ class ContextTracker:
     Main class for context tracking and receipt generation
     """
     
-    def __init__(self, project_path: str = "/home/runner/work/locus-proxmox-infra/locus-proxmox-infra"):
+    def __init__(self, project_path: str = "/home/runner/work/locus-proxmox-infra/locus-proxmox-infra",
+                 context_ttl: Optional[float] = None, receipt_dir: str = "/tmp/locus_receipts",
+                 buffered: bool = False, delta_snapshots: bool = True):
         self.project_path = Path(project_path)
-        self.receipt_dir = Path("/tmp/locus_receipts")
-        self.audit_log_path = Path("/tmp/locus_ref_audit.log")
+        self.receipt_dir = Path(receipt_dir)
+        # The health counters read the same audit log the allocator writes, overrides included
+        self.audit_log_path = ref_tags.get_allocator().audit_log_path or ref_tags.DEFAULT_AUDIT_LOG_PATH
+        self.snapshot_cache = ContextSnapshotCache(self.project_path, context_ttl)
         
         # Ensure receipt directory exists
         self.receipt_dir.mkdir(exist_ok=True)
+        self.receipt_store = receipt_store.ReceiptStore(self.receipt_dir)
+        
+        # Buffered mode hands receipts to a background writer instead of appending inline
+        self.receipt_writer = receipt_store.BufferedReceiptWriter(self.receipt_store) if buffered else None
+        
+        # Receipts reference a shared base snapshot and carry patches instead of full states
+        self.delta_encoder = snapshot_store.DeltaEncoder(self.receipt_store.snapshots) if delta_snapshots else None
     
     def capture_context_event(self, action: str, trigger: str, changes: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -45,24 +173,10 @@ class ContextTracker:
         try:
             # Generate REF tag
             ref_tag = self.generate_ref_tag(action)
-            timestamp = int(datetime.now().timestamp())
             
             # Capture current context
             context_before = self.get_current_context()
-            context_after = self.apply_changes(context_before, changes)
-            context_hash = self.generate_context_hash(context_after)
-            
-            # Create context event
-            context_event = {
-                'ref_tag': ref_tag,
-                'timestamp': timestamp,
-                'trigger': trigger,
-                'context_before': context_before,
-                'changes': changes,
-                'context_after': context_after,
-                'hash': context_hash,
-                'receipt_id': f"CTX-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-            }
+            context_event = self.build_context_event(ref_tag, trigger, context_before, changes)
             
             # Generate receipt
             self.generate_context_receipt(context_event)
@@ -73,9 +187,99 @@ class ContextTracker:
             print(f"Error capturing context event: {e}")
             raise
     
+    def capture_context_events(self, batch: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Capture several context events with shared context, tag and write costs
+        
+        The current context is read once, REF tags are allocated with one counter
+        increment per action type, and all receipts are stored in a single append.
+        Each event still gets its own REF tag, hash and receipt.
+        
+        Args:
+            batch: Events as dicts with 'action', optional 'trigger' and 'changes'
+            
+        Returns:
+            Context events with receipts, in batch order
+        """
+        batch = list(batch)
+        if not batch:
+            return []
+        
+        try:
+            # Allocate REF tags per action type, preserving batch order
+            positions: Dict[str, List[int]] = {}
+            for position, item in enumerate(batch):
+                positions.setdefault(item['action'], []).append(position)
+            batch_tags: List[Optional[str]] = [None] * len(batch)
+            for action, indices in positions.items():
+                for position, ref_tag in zip(indices, self.generate_ref_tags(action, len(indices))):
+                    batch_tags[position] = ref_tag
+            
+            # Capture and encode current context once for the whole batch
+            context_before = self.get_current_context()
+            before_encoded = canonical.dumps(context_before)
+            events = [
+                self.build_context_event(ref_tag, item.get('trigger', 'batch_capture'),
+                                         context_before, item.get('changes') or {}, before_encoded)
+                for ref_tag, item in zip(batch_tags, batch)
+            ]
+            
+            # Generate receipts
+            self.generate_context_receipts(events)
+            
+            return events
+            
+        except Exception as e:
+            print(f"Error capturing context events: {e}")
+            raise
+    
+    def build_context_event(self, ref_tag: str, trigger: str, context_before: Dict[str, Any],
+                            changes: Dict[str, Any],
+                            before_encoded: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Assemble a context event from an allocated REF tag and captured context
+        
+        The event is canonically encoded once; the context hash, signature and
+        receipt are all derived from those bytes.
+        
+        Args:
+            ref_tag: REF tag of the event
+            trigger: What triggered this event
+            context_before: Context captured before the changes
+            changes: Changes being made to context
+            before_encoded: Canonical encoding of context_before, if already known
+            
+        Returns:
+            Context event
+        """
+        now = datetime.now()
+        context_after = self.apply_changes(context_before, changes)
+        
+        if before_encoded is None:
+            before_encoded = canonical.dumps(context_before)
+        after_encoded = canonical.dumps(context_after) if changes else before_encoded
+        context_hash = hashlib.sha256(after_encoded).hexdigest()[:8]
+        
+        event = {
+            'ref_tag': ref_tag,
+            'timestamp': int(now.timestamp()),
+            'trigger': trigger,
+            'context_before': context_before,
+            'changes': changes,
+            'context_after': context_after,
+            'hash': context_hash,
+            'receipt_id': f"CTX-{now.strftime('%Y%m%d-%H%M%S')}"
+        }
+        members = {key: canonical.dumps(value) for key, value in event.items()
+                   if key not in ('context_before', 'context_after')}
+        members['context_before'] = before_encoded
+        members['context_after'] = after_encoded
+        
+        return canonical.Encoded(event, canonical.join_object(members), members)
+    
     def generate_ref_tag(self, action: str) -> str:
         """
-        Generate REF tag using the existing shell script
+        Generate REF tag using the in-process allocator
         
         Args:
             action: Action type
@@ -84,66 +288,81 @@ class ContextTracker:
             Generated REF tag
         """
         try:
-            cmd = [
-                str(self.project_path / "automation" / "scripts" / "generate_ref_tag.sh"),
-                action,
-                "Python context capture"
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, cwd=self.project_path)
-            
-            if result.returncode == 0:
-                return result.stdout.strip()
-            else:
-                print(f"Error generating REF tag: {result.stderr}")
-                return f"LOCUS-{action.upper()}-{int(datetime.now().timestamp())}-ERROR"
+            return ref_tags.generate_ref_tag(action, "Python context capture")
                 
         except Exception as e:
             print(f"Error generating REF tag: {e}")
             return f"LOCUS-{action.upper()}-{int(datetime.now().timestamp())}-ERROR"
     
+    def generate_ref_tags(self, action: str, count: int) -> List[str]:
+        """
+        Generate a block of REF tags with one counter increment
+        
+        Args:
+            action: Action type
+            count: Number of tags
+            
+        Returns:
+            Generated REF tags
+        """
+        try:
+            return ref_tags.allocate_ref_tags(action, count, "Python context capture")
+                
+        except Exception as e:
+            print(f"Error generating REF tags: {e}")
+            timestamp = int(datetime.now().timestamp())
+            return [f"LOCUS-{action.upper()}-{timestamp}-ERROR-{i:03d}" for i in range(count)]
+    
     def get_current_context(self) -> Dict[str, Any]:
         """
         Get current context state
         
+        Git and agent status are served from the snapshot cache while the
+        underlying files are unchanged, so repeated captures skip the git fork.
+        
         Returns:
             Current context dictionary
         """
         try:
-            # Get git status
-            git_result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                capture_output=True,
-                text=True,
-                cwd=self.project_path
-            )
-            git_changes = len([line for line in git_result.stdout.split('\n') if line.strip()])
-            
-            # Get agent status
-            agent_status_path = self.project_path / "context" / "AGENT_STATUS.json"
-            agent_status = {}
-            
-            if agent_status_path.exists():
-                with open(agent_status_path, 'r') as f:
-                    agent_status = json.load(f)
-            
-            return {
-                'working_directory': str(self.project_path),
-                'git_changes': git_changes,
-                'agents': agent_status,
-                'timestamp': datetime.now().isoformat(),
-                'python_version': sys.version,
-                'platform': sys.platform
-            }
+            # Git status and agent status come from the snapshot cache
+            git_changes = self.snapshot_cache.git_changes()
+            agent_status = self.snapshot_cache.agent_status()
+            
+            return self.assemble_context(git_changes, agent_status)
             
         except Exception as e:
             print(f"Error getting current context: {e}")
-            return {
-                'working_directory': str(self.project_path),
-                'git_changes': 0,
-                'agents': {},
-                'timestamp': datetime.now().isoformat(),
-                'error': str(e)
-            }
+            return self.fallback_context(e)
+    
+    def assemble_context(self, git_changes: int, agent_status: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a context state from captured git and agent status
+        
+        Args:
+            git_changes: Number of uncommitted git changes
+            agent_status: Parsed agent status
+            
+        Returns:
+            Context dictionary
+        """
+        return {
+            'working_directory': str(self.project_path),
+            'git_changes': git_changes,
+            'agents': agent_status,
+            'timestamp': datetime.now().isoformat(),
+            'python_version': sys.version,
+            'platform': sys.platform
+        }
+    
+    def fallback_context(self, error: Exception) -> Dict[str, Any]:
+        """Context recorded when git or agent status could not be read"""
+        return {
+            'working_directory': str(self.project_path),
+            'git_changes': 0,
+            'agents': {},
+            'timestamp': datetime.now().isoformat(),
+            'error': str(error)
+        }
     
     def apply_changes(self, context: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -170,8 +389,7 @@ class ContextTracker:
         Returns:
             8-character hash
         """
-        context_str = json.dumps(context, sort_keys=True)
-        return hashlib.sha256(context_str.encode()).hexdigest()[:8]
+        return hashlib.sha256(canonical.dumps(context)).hexdigest()[:8]
     
     def generate_context_receipt(self, context_event: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -183,24 +401,88 @@ class ContextTracker:
         Returns:
             Generated receipt
         """
+        receipt = self.build_context_receipt(context_event)
+        
+        # Store receipt
+        if self.receipt_writer is not None:
+            self.receipt_writer.submit(receipt)
+            print(f"✓ Context receipt queued: {receipt['ref_tag']}")
+            return receipt
+        
+        location = self.receipt_store.append(receipt)
+        
+        print(f"✓ Context receipt generated: {self.receipt_store.segment_path(location.segment)}#{location.seq}")
+        return receipt
+    
+    def generate_context_receipts(self, context_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate receipts for a batch of events and store them in one append
+        
+        Args:
+            context_events: Context events, in order
+            
+        Returns:
+            Generated receipts
+        """
+        receipts = [self.build_context_receipt(event) for event in context_events]
+        
+        if self.receipt_writer is not None:
+            self.receipt_writer.submit_many(receipts)
+            print(f"✓ {len(receipts)} context receipts queued")
+            return receipts
+        
+        locations = self.receipt_store.append_many(receipts)
+        
+        first, last = locations[0], locations[-1]
+        print(f"✓ {len(receipts)} context receipts generated: "
+              f"{self.receipt_store.segment_path(first.segment)}#{first.seq}-{last.seq}")
+        return receipts
+    
+    def flush(self) -> None:
+        """Wait for buffered receipts to reach the store and sync it to disk"""
+        if self.receipt_writer is not None:
+            self.receipt_writer.flush()
+        else:
+            self.receipt_store.flush()
+    
+    def build_context_receipt(self, context_event: Dict[str, Any],
+                              staged_snapshots: Optional[List[Tuple[str, bytes]]] = None) -> Dict[str, Any]:
+        """
+        Build the receipt for a context event without storing it
+        
+        Args:
+            context_event: Context event data
+            staged_snapshots: If given, a new base snapshot is staged here instead of
+                written, for the caller to write before storing the receipt
+            
+        Returns:
+            Receipt
+        """
         # Enhanced cryptographic features
         crypto_signature = self.generate_cryptographic_signature(context_event)
         audit_fingerprint = self.generate_audit_fingerprint(context_event)
         
+        members = getattr(context_event, 'members', {})
+        generation_context = {'trigger': context_event['trigger']}
+        if self.delta_encoder is not None:
+            generation_context.update(self.delta_encoder.encode(
+                context_event['context_before'], context_event['context_after'],
+                members.get('context_before'), staged_snapshots
+            ))
+        else:
+            generation_context['prior_state'] = context_event['context_before']
+            generation_context['current_state'] = context_event['context_after']
+        generation_context['delta_summary'] = {
+            'fields_changed': list(context_event['changes'].keys()),
+            'new_capabilities': context_event['changes'].get('new_capabilities', []),
+            'risk_adjustments': context_event['changes'].get('risk_adjustments', 'none')
+        }
+        
         receipt = {
             'receipt_id': context_event['receipt_id'],
             'ref_tag': context_event['ref_tag'],
             'timestamp': context_event['timestamp'],
-            'generation_context': {
-                'trigger': context_event['trigger'],
-                'prior_state': context_event['context_before'],
-                'current_state': context_event['context_after'],
-                'delta_summary': {
-                    'fields_changed': list(context_event['changes'].keys()),
-                    'new_capabilities': context_event['changes'].get('new_capabilities', []),
-                    'risk_adjustments': context_event['changes'].get('risk_adjustments', 'none')
-                }
-            },
+            'generation_context': generation_context,
             'validation': {
                 'checksum': context_event['hash'],
                 'cryptographic_signature': crypto_signature,
@@ -222,13 +504,12 @@ class ContextTracker:
             }
         }
         
-        # Store receipt
-        receipt_path = self.receipt_dir / f"receipt_{context_event['ref_tag']}.json"
-        with open(receipt_path, 'w') as f:
-            json.dump(receipt, f, indent=2)
-        
-        print(f"✓ Context receipt generated: {receipt_path}")
-        return receipt
+        # Reuse the event's encoded snapshots instead of serialising them again
+        known = {
+            id(context_event[key]): members[key]
+            for key in ('context_before', 'context_after') if key in members
+        }
+        return canonical.Encoded(receipt, canonical.dumps_reusing(receipt, known))
     
     def generate_cryptographic_signature(self, context_event: Dict[str, Any]) -> str:
         """
@@ -241,8 +522,9 @@ class ContextTracker:
             Enhanced signature
         """
         import platform
-        signing_input = f"{context_event['timestamp']}:{json.dumps(context_event, sort_keys=True)}:{platform.node()}"
-        signature = hashlib.sha256(signing_input.encode()).hexdigest()[:32]
+        signing_input = b"%d:%s:%s" % (context_event['timestamp'], canonical.canonical_bytes(context_event),
+                                       platform.node().encode())
+        signature = hashlib.sha256(signing_input).hexdigest()[:32]
         verification_hash = hashlib.sha256(f"{signature}:{context_event['ref_tag']}".encode()).hexdigest()[:16]
         return f"{signature}:{verification_hash}"
     
@@ -269,8 +551,7 @@ class ContextTracker:
         Returns:
             Signature
         """
-        event_str = json.dumps(context_event, sort_keys=True)
-        return hashlib.sha256(event_str.encode()).hexdigest()[:16]
+        return hashlib.sha256(canonical.canonical_bytes(context_event)).hexdigest()[:16]
     
     def validate_context_chain(self, start_ref: str, end_ref: str) -> bool:
         """
@@ -284,16 +565,26 @@ class ContextTracker:
             Chain validity
         """
         try:
-            receipts = self.get_context_chain(start_ref, end_ref)
+            previous_hash = None
             
-            for i in range(len(receipts) - 1):
-                current = receipts[i]
-                next_receipt = receipts[i + 1]
+            # Links are verified on receipts exactly as stored, before rehydration
+            for payload in self.receipt_store.iter_chain_records(start_ref, end_ref):
+                tombstone = receipt_store.tombstone_link(payload)
+                if tombstone is not None:
+                    # Compaction dropped this receipt's body; its link still carries the chain
+                    if previous_hash is not None and tombstone.get('previous_hash') != previous_hash:
+                        print("Invalid chain link across a compacted receipt")
+                        return False
+                    previous_hash = tombstone.get('hash')
+                    continue
                 
-                # Verify signature (simplified check)
-                if not self.verify_signature(current):
-                    print(f"Invalid signature for {current.get('ref_tag', 'unknown')}")
+                receipt = json.loads(payload)
+                # Each receipt must hash correctly and point at its predecessor
+                if not self.verify_signature(receipt, previous_hash):
+                    print(f"Invalid signature for {receipt.get('ref_tag', 'unknown')}")
                     return False
+                
+                previous_hash = receipt['chain']['hash']
             
             return True
             
@@ -301,43 +592,434 @@ class ContextTracker:
             print(f"Error validating context chain: {e}")
             return False
     
-    def get_context_chain(self, start_ref: str, end_ref: str) -> List[Dict[str, Any]]:
+    def get_context_chain(self, start_ref: str, end_ref: str) -> Iterator[Dict[str, Any]]:
         """
-        Get context chain between two REF tags
+        Stream the context chain between two REF tags
         
         Args:
             start_ref: Starting REF tag
             end_ref: Ending REF tag
             
         Returns:
-            Chain of context receipts
+            Lazy iterator over the chain of context receipts, with full context states
         """
-        # Simplified implementation
-        receipt_files = sorted([
-            f for f in self.receipt_dir.iterdir()
-            if f.name.startswith('receipt_') and f.name.endswith('.json')
-        ])
-        
-        receipts = []
-        for receipt_file in receipt_files:
-            with open(receipt_file, 'r') as f:
-                receipts.append(json.load(f))
+        for receipt in self.receipt_store.iter_chain(start_ref, end_ref):
+            yield snapshot_store.rehydrate_receipt(receipt, self.receipt_store.snapshots)
+    
+    def get_receipt(self, ref_tag: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a receipt by REF tag, with full context states
         
-        return receipts
+        Args:
+            ref_tag: REF tag of the receipt
+            
+        Returns:
+            Receipt, or None if it is not stored
+        """
+        receipt = self.receipt_store.get(ref_tag)
+        return snapshot_store.rehydrate_receipt(receipt, self.receipt_store.snapshots) if receipt else None
     
-    def verify_signature(self, receipt: Dict[str, Any]) -> bool:
+    def verify_signature(self, receipt: Dict[str, Any], previous_hash: Optional[str] = None) -> bool:
         """
-        Verify receipt signature
+        Verify a receipt's link in the hash chain in O(1)
         
         Args:
             receipt: Receipt to verify
+            previous_hash: Chain hash of the preceding receipt, if known
             
         Returns:
             Signature validity
         """
-        validation = receipt.get('validation', {})
-        signature = validation.get('signature', '')
-        return len(signature) == 16
+        return receipt_store.verify_link(receipt, previous_hash)
+    
+    @property
+    def chain_head(self) -> str:
+        """Chain hash of the most recent receipt written through this tracker's store"""
+        return self.receipt_store.chain_head
+
+
+class AsyncContextTracker:
+    """
+    Asyncio front end to ContextTracker
+    
+    The REF tag allocation and the git query of a capture run concurrently, and
+    concurrent captures that miss the snapshot cache share one git subprocess.
+    Receipts are built with the wrapped tracker, so they are identical to the
+    sync API's, and handed to a bounded queue drained by a single writer task;
+    producers only wait when the queue is full. A delta base snapshot is
+    staged rather than written, and the writer stores it on its I/O thread
+    just before the receipts that reference it, so the event loop never
+    blocks on a snapshot fsync. A write error is re-raised from the next
+    flush() or close().
+    """
+    
+    def __init__(self, tracker: Optional[ContextTracker] = None, queue_size: int = DEFAULT_ASYNC_QUEUE_SIZE,
+                 max_batch: int = DEFAULT_ASYNC_WRITE_BATCH, **tracker_kwargs):
+        self.tracker = tracker if tracker is not None else ContextTracker(**tracker_kwargs)
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._git_pending: Optional[asyncio.Future] = None
+        self._error: Optional[BaseException] = None
+        # Base snapshots staged by captures, written on the I/O thread ahead of their receipts
+        self._snapshot_writes: List[Tuple[str, bytes]] = []
+        # One thread for store I/O keeps appends in submission order
+        self._io = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="async-receipt-writer")
+    
+    async def capture_context_event(self, action: str, trigger: str,
+                                    changes: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Capture a context event and queue its receipt
+        
+        Args:
+            action: The action type (notify, research, dash, etc.)
+            trigger: What triggered this event
+            changes: Changes being made to context
+            
+        Returns:
+            Context event
+        """
+        if changes is None:
+            changes = {}
+        
+        try:
+            loop = asyncio.get_running_loop()
+            ref_tag, context_before = await asyncio.gather(
+                loop.run_in_executor(None, self.tracker.generate_ref_tag, action),
+                self.get_current_context()
+            )
+            context_event = self.tracker.build_context_event(ref_tag, trigger, context_before, changes)
+            await self._submit([self.tracker.build_context_receipt(context_event, self._snapshot_writes)])
+            return context_event
+            
+        except Exception as e:
+            print(f"Error capturing context event: {e}")
+            raise
+    
+    async def capture_context_events(self, batch: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Capture a batch of context events, like ContextTracker.capture_context_events
+        
+        Args:
+            batch: Events as dicts with 'action', optional 'trigger' and 'changes'
+            
+        Returns:
+            Context events, in batch order
+        """
+        batch = list(batch)
+        if not batch:
+            return []
+        
+        try:
+            loop = asyncio.get_running_loop()
+            positions: Dict[str, List[int]] = {}
+            for position, item in enumerate(batch):
+                positions.setdefault(item['action'], []).append(position)
+            
+            allocations = [
+                loop.run_in_executor(None, self.tracker.generate_ref_tags, action, len(indices))
+                for action, indices in positions.items()
+            ]
+            *tag_blocks, context_before = await asyncio.gather(*allocations, self.get_current_context())
+            
+            batch_tags: List[Optional[str]] = [None] * len(batch)
+            for indices, block in zip(positions.values(), tag_blocks):
+                for position, ref_tag in zip(indices, block):
+                    batch_tags[position] = ref_tag
+            
+            before_encoded = canonical.dumps(context_before)
+            events = [
+                self.tracker.build_context_event(ref_tag, item.get('trigger', 'batch_capture'),
+                                                 context_before, item.get('changes') or {}, before_encoded)
+                for ref_tag, item in zip(batch_tags, batch)
+            ]
+            await self._submit([self.tracker.build_context_receipt(event, self._snapshot_writes) for event in events])
+            return events
+            
+        except Exception as e:
+            print(f"Error capturing context events: {e}")
+            raise
+    
+    async def get_current_context(self) -> Dict[str, Any]:
+        """Async counterpart of ContextTracker.get_current_context"""
+        try:
+            git_changes = await self._git_changes()
+            agent_status = self.tracker.snapshot_cache.agent_status()
+            return self.tracker.assemble_context(git_changes, agent_status)
+            
+        except Exception as e:
+            print(f"Error getting current context: {e}")
+            return self.tracker.fallback_context(e)
+    
+    async def _git_changes(self) -> int:
+        cache = self.tracker.snapshot_cache
+        cached = cache.cached_git_changes()
+        if cached is not None:
+            return cached
+        
+        # Captures arriving while git runs wait for the same result
+        if self._git_pending is None:
+            self._git_pending = asyncio.ensure_future(self._run_git_status())
+            self._git_pending.add_done_callback(lambda _: setattr(self, '_git_pending', None))
+        return await asyncio.shield(self._git_pending)
+    
+    async def _run_git_status(self) -> int:
+        cache = self.tracker.snapshot_cache
+        stamp = cache.git_stamp()
+        taken_at = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            "git", "status", "--porcelain",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=self.tracker.project_path
+        )
+        stdout, _ = await process.communicate()
+        return cache.record_git_changes(stdout.decode(), stamp, taken_at)
+    
+    async def _submit(self, receipts: List[Dict[str, Any]]) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._writer = asyncio.create_task(self._write_receipts())
+        for receipt in receipts:
+            await self._queue.put(receipt)
+    
+    async def _write_receipts(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            receipts = [receipt for receipt in batch if receipt is not None]
+            stopping = len(receipts) < len(batch)
+            # Every receipt in the batch staged its snapshot before it was queued
+            snapshot_writes, self._snapshot_writes = self._snapshot_writes, []
+            try:
+                if (receipts or snapshot_writes) and self._error is None:
+                    await loop.run_in_executor(self._io, self._store, snapshot_writes, receipts)
+            except Exception as e:
+                self._error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    def _store(self, snapshot_writes: List[Tuple[str, bytes]], receipts: List[Dict[str, Any]]) -> None:
+        """Write staged snapshots, then the receipts referencing them (runs on the I/O thread)"""
+        store = self.tracker.receipt_store
+        for digest, encoded in snapshot_writes:
+            store.snapshots.write(digest, encoded)
+        if receipts:
+            store.append_many(receipts)
+    
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+    
+    async def flush(self) -> None:
+        """Wait until every queued receipt has been appended and synced"""
+        if self._queue is not None:
+            await self._queue.join()
+        self._raise_error()
+        await asyncio.get_running_loop().run_in_executor(self._io, self.tracker.receipt_store.flush)
+    
+    async def close(self) -> None:
+        """Write any queued receipts and stop the writer task"""
+        if self._writer is not None:
+            await self._queue.put(None)
+            await self._writer
+            self._queue = self._writer = None
+        try:
+            self._raise_error()
+            await asyncio.get_running_loop().run_in_executor(self._io, self.tracker.receipt_store.flush)
+        finally:
+            self._io.shutdown()
+    
+    async def __aenter__(self) -> 'AsyncContextTracker':
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+class HealthCounters:
+    """
+    Incremental audit-log and legacy-receipt counters persisted in a sidecar state file
+    
+    The audit log is only read from the last recorded offset, in fixed-size binary
+    chunks, so each refresh costs O(new data). A changed inode or a shrunken file
+    (rotation, truncation) restarts the count. Legacy receipt_*.json files are only
+    re-globbed when the receipt directory's mtime changes.
+    """
+    
+    def __init__(self, audit_log_path: Path, receipt_dir: Path, state_path: Optional[Path] = None,
+                 chunk_size: int = AUDIT_READ_CHUNK):
+        self.audit_log_path = Path(audit_log_path)
+        self.receipt_dir = Path(receipt_dir)
+        self.state_path = Path(state_path) if state_path else self.audit_log_path.with_name(
+            self.audit_log_path.name + ".health")
+        self.chunk_size = chunk_size
+    
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.state_path.with_name(f".{self.state_path.name}.{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+    
+    def _count_audit_lines(self, cursor: Dict[str, Any]) -> Dict[str, Any]:
+        """Advance the audit-log cursor over data appended since it was saved"""
+        try:
+            f = open(self.audit_log_path, 'rb')
+        except FileNotFoundError:
+            return {}
+        
+        with f:
+            st = os.fstat(f.fileno())
+            if cursor.get('inode') != st.st_ino or st.st_size < cursor.get('offset', 0):
+                cursor = {}
+            offset = cursor.get('offset', 0)
+            lines = cursor.get('lines', 0)
+            # A trailing line without its newline yet still counts as an entry
+            partial = cursor.get('partial', False)
+            
+            f.seek(offset)
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+                offset += len(chunk)
+                partial = not chunk.endswith(b"\n")
+            
+            return {'inode': st.st_ino, 'offset': offset, 'lines': lines, 'partial': partial}
+    
+    def _count_legacy_receipts(self, cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Count legacy receipt_*.json files, re-globbing only if the directory changed"""
+        try:
+            mtime_ns = os.stat(self.receipt_dir).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if cached.get('mtime_ns') == mtime_ns:
+            return cached
+        return {'mtime_ns': mtime_ns, 'count': len(list(self.receipt_dir.glob('receipt_*.json')))}
+    
+    def refresh(self) -> Dict[str, int]:
+        """
+        Bring the counters up to date and persist them
+        
+        Returns:
+            'audit_entries' and 'legacy_receipts' counts
+        """
+        state = self._load_state()
+        audit = self._count_audit_lines(state.get('audit', {}))
+        legacy = self._count_legacy_receipts(state.get('legacy_receipts', {}))
+        
+        new_state = {'audit': audit, 'legacy_receipts': legacy}
+        if new_state != state:
+            self._save_state(new_state)
+        
+        return {
+            'audit_entries': audit.get('lines', 0) + (1 if audit.get('partial') else 0),
+            'legacy_receipts': legacy.get('count', 0)
+        }
+
+
+def _parse_heartbeat(value: Any) -> Optional[float]:
+    """Parse an ISO-8601 heartbeat into a POSIX timestamp, or None if absent/invalid"""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class HeartbeatTable:
+    """
+    In-memory table of agent heartbeats with a rolling window of lag samples
+    
+    Heartbeat timestamps are re-parsed only when the agents map changes (the
+    snapshot cache hands back the same object while AGENT_STATUS.json is
+    untouched), so each sample costs O(agents). Lag percentiles are computed
+    on demand from the last `window` samples per agent.
+    """
+    
+    def __init__(self, grace: float = DEFAULT_HEARTBEAT_GRACE, window: int = DEFAULT_LAG_WINDOW):
+        self.grace = grace
+        self.window = window
+        self._source = None
+        self._table: Dict[str, Tuple[Optional[float], float]] = {}
+        self._lags: Dict[str, deque] = {}
+    
+    def load(self, agents: Dict[str, Any]) -> None:
+        """Rebuild the (last heartbeat, interval) table if the agents map changed"""
+        if agents is self._source:
+            return
+        self._source = agents
+        self._table = {
+            name: (_parse_heartbeat(info.get('last_heartbeat')),
+                   float(info.get('heartbeat_interval') or DEFAULT_HEARTBEAT_INTERVAL))
+            for name, info in agents.items() if isinstance(info, dict)
+        }
+        for name in list(self._lags):
+            if name not in self._table:
+                del self._lags[name]
+    
+    def sample(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Record one lag sample per agent
+        
+        Args:
+            now: Sample time as a POSIX timestamp (default: current time)
+            
+        Returns:
+            Per-agent lag in seconds (None if never seen) and sync state
+        """
+        now = time.time() if now is None else now
+        status = {}
+        for name, (last_heartbeat, interval) in self._table.items():
+            lag = None if last_heartbeat is None else max(0.0, now - last_heartbeat)
+            self._lags.setdefault(name, deque(maxlen=self.window)).append(
+                float('inf') if lag is None else lag)
+            status[name] = {
+                'lag_seconds': lag,
+                'interval': interval,
+                'in_sync': lag is not None and lag <= interval * self.grace
+            }
+        return status
+    
+    @staticmethod
+    def synchronization(status: Dict[str, Dict[str, Any]]) -> float:
+        """Percentage of agents whose heartbeat is within the grace period"""
+        if not status:
+            return 100.0
+        return round(100.0 * sum(1 for agent in status.values() if agent['in_sync']) / len(status), 1)
+    
+    def lag_percentiles(self, percentiles: Tuple[int, ...] = (50, 95, 99)) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Per-agent lag percentiles over the sample window (nearest-rank)
+        
+        Returns:
+            {agent: {'p50': seconds, ...}}; None where the agent has never sent a heartbeat
+        """
+        result = {}
+        for name, samples in self._lags.items():
+            ordered = sorted(samples)
+            result[name] = {}
+            for pct in percentiles:
+                value = ordered[min(len(ordered) - 1, max(0, -(-pct * len(ordered) // 100) - 1))]
+                result[name][f"p{pct}"] = None if value == float('inf') else round(value, 3)
+        return result
 
 
 class ContextHealthMonitor:
@@ -347,6 +1029,8 @@ class ContextHealthMonitor:
     
     def __init__(self, tracker: ContextTracker):
         self.tracker = tracker
+        self.counters = HealthCounters(tracker.audit_log_path, tracker.receipt_dir)
+        self.heartbeats = HeartbeatTable()
     
     def check_context_health(self) -> Dict[str, Any]:
         """
@@ -355,16 +1039,22 @@ class ContextHealthMonitor:
         Returns:
             Health report
         """
-        receipt_count = len(list(self.tracker.receipt_dir.glob('receipt_*.json')))
-        audit_lines = 0
+        counts = self.counters.refresh()
+        receipt_count = self.tracker.receipt_store.count() + counts['legacy_receipts']
+        audit_lines = counts['audit_entries']
         
-        if self.tracker.audit_log_path.exists():
-            with open(self.tracker.audit_log_path, 'r') as f:
-                audit_lines = len(f.readlines())
+        # Agent synchronization from heartbeats in AGENT_STATUS.json
+        try:
+            agents = self.tracker.snapshot_cache.agent_status().get('agents', {})
+        except (OSError, ValueError) as e:
+            print(f"Error reading agent status: {e}")
+            agents = {}
+        self.heartbeats.load(agents)
+        heartbeats = self.heartbeats.sample()
         
         # Calculate health metrics
         context_integrity = 100 if receipt_count > 0 else 0
-        agent_sync = 85  # Simulated - would check actual heartbeats in production
+        agent_sync = self.heartbeats.synchronization(heartbeats)
         schema_compliance = 100 if audit_lines > 0 else 0
         audit_completeness = 100
         
@@ -380,16 +1070,20 @@ class ContextHealthMonitor:
             },
             'receipt_count': receipt_count,
             'audit_entries': audit_lines,
-            'alerts': self.generate_alerts(agent_sync, context_integrity)
+            'heartbeats': heartbeats,
+            'alerts': self.generate_alerts(agent_sync, context_integrity,
+                                           [name for name, agent in heartbeats.items() if not agent['in_sync']])
         }
     
-    def generate_alerts(self, agent_sync: int, context_integrity: int) -> List[str]:
+    def generate_alerts(self, agent_sync: float, context_integrity: int,
+                        stale_agents: Optional[List[str]] = None) -> List[str]:
         """
         Generate health alerts
         
         Args:
             agent_sync: Agent synchronization percentage
             context_integrity: Context integrity percentage
+            stale_agents: Agents whose heartbeat is overdue
             
         Returns:
             List of alerts
@@ -397,7 +1091,10 @@ class ContextHealthMonitor:
         alerts = []
         
         if agent_sync < 90:
-            alerts.append("Agent synchronization below threshold")
+            if stale_agents:
+                alerts.append(f"Agent synchronization below threshold (stale: {', '.join(stale_agents)})")
+            else:
+                alerts.append("Agent synchronization below threshold")
         
         if context_integrity < 100:
             alerts.append("Context integrity issues detected")
@@ -405,6 +1102,28 @@ class ContextHealthMonitor:
         return alerts
 
 
+def print_health(health: Dict[str, Any]) -> None:
+    """Print a health report from ContextHealthMonitor"""
+    print(f"Overall Health: {health['overall_health']:.1f}%")
+    print("Metrics:")
+    for metric, value in health['metrics'].items():
+        print(f"  {metric}: {value}%")
+    
+    if health['heartbeats']:
+        print("Heartbeats:")
+        for agent, heartbeat in health['heartbeats'].items():
+            lag = heartbeat['lag_seconds']
+            state = "in sync" if heartbeat['in_sync'] else "stale"
+            print(f"  {agent}: {'never' if lag is None else f'{lag:.0f}s ago'} ({state})")
+    
+    if health['alerts']:
+        print("Alerts:")
+        for alert in health['alerts']:
+            print(f"  ⚠️ {alert}")
+    else:
+        print("✅ No alerts")
+
+
 def main():
     """CLI interface for the Python toolkit"""
     import argparse
@@ -414,39 +1133,52 @@ def main():
     parser.add_argument('--trigger', default='cli_invocation', help='Event trigger')
     parser.add_argument('--changes', help='JSON string of changes')
     parser.add_argument('--health', action='store_true', help='Show health report')
+    parser.add_argument('--no-daemon', action='store_true', help='Run in-process even if a context daemon is running')
     
     args = parser.parse_args()
     
     print('=== LOCUS Python Context Toolkit ===')
     
-    tracker = ContextTracker()
+    # Parse changes if provided
+    changes = {}
+    if args.changes:
+        changes = json.loads(args.changes)
     
-    if args.health:
-        monitor = ContextHealthMonitor(tracker)
-        health = monitor.check_context_health()
-        
-        print(f"Overall Health: {health['overall_health']:.1f}%")
-        print("Metrics:")
-        for metric, value in health['metrics'].items():
-            print(f"  {metric}: {value}%")
-        
-        if health['alerts']:
-            print("Alerts:")
-            for alert in health['alerts']:
-                print(f"  ⚠️ {alert}")
+    if not args.health:
+        print(f"Action: {args.action}")
+        print(f"Trigger: {args.trigger}")
+        print('=' * 40)
+    
+    # Forward to a warm context daemon when one is listening
+    response = None
+    if not args.no_daemon:
+        from context_daemon import DaemonClient
+        if args.health:
+            response = DaemonClient().request('health')
         else:
-            print("✅ No alerts")
+            response = DaemonClient().request('capture', action=args.action, trigger=args.trigger, changes=changes)
         
+        if response is not None and not response['ok']:
+            print(f"Error from context daemon: {response['error']}")
+            sys.exit(1)
+    
+    if response is not None:
+        print(response['output'], end='')
+        if args.health:
+            print_health(response['result'])
+        else:
+            event = response['result']
+            print(f"📊 Context Event Captured: {event['ref_tag']}")
+            print(f"🔐 Receipt ID: {event['receipt_id']}")
+            print(f"📝 Context Hash: {event['hash']}")
         return
     
-    # Parse changes if provided
-    changes = {}
-    if args.changes:
-        changes = json.loads(args.changes)
+    tracker = ContextTracker()
     
-    print(f"Action: {args.action}")
-    print(f"Trigger: {args.trigger}")
-    print('=' * 40)
+    if args.health:
+        monitor = ContextHealthMonitor(tracker)
+        print_health(monitor.check_context_health())
+        return
     
     # Capture context event
     event = tracker.capture_context_event(args.action, args.trigger, changes)
@@ -457,4 +1189,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -7,24 +7,35 @@ set -euo pipefail
 # Configuration
 REF_PREFIX="LOCUS"
 TIMESTAMP=$(date +%Y%m%d-%H%M%S)
-COUNTER_FILE="/tmp/locus_ref_counter"
-
-# Initialize counter file if it doesn't exist
-if [ ! -f "$COUNTER_FILE" ]; then
-    echo "001" > "$COUNTER_FILE"
-fi
+# LOCUS_REF_COUNTER / LOCUS_REF_AUDIT_LOG point tests and benchmarks at scratch files
+COUNTER_FILE="${LOCUS_REF_COUNTER:-/tmp/locus_ref_counter}"
+AUDIT_LOG="${LOCUS_REF_AUDIT_LOG:-/tmp/locus_ref_audit.log}"
+# Shared with automation/scripts/ref_tags.py so shell and Python callers never interleave
+LOCK_FILE="${COUNTER_FILE}.lock"
 
 # Function to generate REF tag
 generate_ref_tag() {
     local type="$1"
     local description="${2:-}"
     
-    # Read and increment counter
+    # Read and increment counter under an exclusive lock, replacing the file atomically
     local counter
     local next_counter
+    local tmp_file
+    exec 9>>"$LOCK_FILE"
+    if command -v flock >/dev/null; then
+        flock 9
+    fi
+    if [ ! -f "$COUNTER_FILE" ]; then
+        echo "001" > "$COUNTER_FILE"
+    fi
     counter=$(cat "$COUNTER_FILE")
     next_counter=$(printf "%03d" $((10#$counter + 1)))
-    echo "$next_counter" > "$COUNTER_FILE"
+    tmp_file=$(mktemp "${COUNTER_FILE}.XXXXXX")
+    echo "$next_counter" > "$tmp_file"
+    chmod 644 "$tmp_file"
+    mv -f "$tmp_file" "$COUNTER_FILE"
+    exec 9>&-
     
     # Generate REF tag based on type
     case "$type" in
@@ -70,7 +81,7 @@ generate_ref_tag() {
     esac
     
     # Log generation for audit trail
-    echo "$(date -Iseconds): Generated REF tag ${REF_PREFIX}-${type^^}${TIMESTAMP}-${counter} ${description}" >> /tmp/locus_ref_audit.log
+    echo "$(date -Iseconds): Generated REF tag ${REF_PREFIX}-${type^^}${TIMESTAMP}-${counter} ${description}" >> "$AUDIT_LOG"
 }
 
 # Main execution
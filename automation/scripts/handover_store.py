@@ -0,0 +1,668 @@
+#!/usr/bin/env python3
+"""
+Handover Index for Project Locus
+SQLite-backed index of agent handovers replacing the rewritten handover_index.json
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lazy_imports import lazy_import
+
+gzip = lazy_import("gzip")
+sqlite3 = lazy_import("sqlite3")
+tempfile = lazy_import("tempfile")
+zstandard = lazy_import("zstandard")
+
+
+# Blocked claimers re-check the index this often even without a wake-up, e.g. for synced handovers
+DEFAULT_CLAIM_POLL_INTERVAL = 1.0
+
+# Task and decision context larger than this (as compact JSON) is spilled to a compressed payload file
+DEFAULT_PAYLOAD_INLINE_LIMIT = 4096
+PAYLOAD_ENCODINGS = {"gzip": ".gz", "zstd": ".zst"}
+
+# Completed handovers leave the hot index after this many days; pending ones expire after the TTL
+DEFAULT_RETENTION_DAYS = 7.0
+DEFAULT_PENDING_TTL_DAYS = 30.0
+# Archived records per gzip member; a lookup decompresses at most one member
+ARCHIVE_MEMBER_RECORDS = 1000
+# Hidden, so state sync never ships one endpoint's writer id to another
+ARCHIVE_WRITER_FILE = ".archive_writer"
+
+INDEX_FIELDS = ("ref_tag", "from_agent", "to_agent", "status", "created_at", "machine_source", "version",
+                "updated_at")
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS handovers (
+    ref_tag TEXT PRIMARY KEY,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    machine_source TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS handovers_by_agent ON handovers (to_agent, status, created_at);
+CREATE INDEX IF NOT EXISTS handovers_by_status ON handovers (status, created_at);
+CREATE TABLE IF NOT EXISTS archived (
+    ref_tag TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    member_offset INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    to_agent TEXT,
+    archived_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Columns added after the first release of the index, with their definitions
+INDEX_MIGRATIONS = (
+    ("version", "INTEGER NOT NULL DEFAULT 1"),
+    ("updated_at", "TEXT"),
+)
+
+
+def _row(entry: Dict[str, Any]) -> tuple:
+    """
+    Index columns of an entry in INDEX_FIELDS order
+
+    Records written before versioning count as version 1, and updated_at
+    falls back to the latest status change recorded on the handover.
+    """
+    values = []
+    for field in INDEX_FIELDS:
+        if field == "version":
+            values.append(entry.get("version", 1))
+        elif field == "updated_at":
+            values.append(entry.get("updated_at") or entry.get("completed_at") or entry.get("expired_at")
+                          or entry.get("claimed_at") or entry.get("created_at"))
+        else:
+            values.append(entry.get(field))
+    return tuple(values)
+
+
+def index_entry(handover_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a handover record onto the fields kept in the index"""
+    return dict(zip(INDEX_FIELDS, _row(handover_data)))
+
+
+def write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    """
+    Replace path with data as indented JSON via a synced temp file and rename
+
+    Readers see either the old or the new document, never a partial write.
+    """
+    write_bytes_atomic(path, json.dumps(data, indent=2).encode())
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data via a synced temp file and rename"""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def payload_encoding(name: Optional[str] = None) -> str:
+    """
+    Resolve the payload compression to use
+
+    gzip is the default because every machine can read it; zstd is used when
+    requested (LOCUS_HANDOVER_COMPRESSION=zstd) and the zstandard package is installed.
+    """
+    name = name or os.environ.get("LOCUS_HANDOVER_COMPRESSION", "gzip")
+    if name not in PAYLOAD_ENCODINGS:
+        raise ValueError(f"Unknown handover payload encoding: {name}")
+    return name
+
+
+def write_payload(path: Path, payload: Dict[str, Any], encoding: str) -> Dict[str, Any]:
+    """
+    Write a compressed payload file
+
+    Args:
+        path: Payload file path
+        payload: Document to store
+        encoding: 'gzip' or 'zstd'
+
+    Returns:
+        Header entry describing the payload
+    """
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    if encoding == "zstd":
+        data = zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        # mtime=0 keeps the bytes reproducible, so synced copies hash identically
+        data = gzip.compress(raw, compresslevel=6, mtime=0)
+    write_bytes_atomic(path, data)
+    return {
+        "file": Path(path).name,
+        "encoding": encoding,
+        "size": len(raw),
+        "compressed_size": len(data),
+        "sha256": hashlib.sha256(raw).hexdigest()
+    }
+
+
+def read_payload(base_dir: Path, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Load and verify a payload described by a header entry from write_payload
+
+    Raises:
+        ValueError: If the payload does not match its recorded hash
+    """
+    with open(Path(base_dir) / meta["file"], 'rb') as f:
+        data = f.read()
+    if meta["encoding"] == "zstd":
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    if hashlib.sha256(raw).hexdigest() != meta["sha256"]:
+        raise ValueError(f"Handover payload {meta['file']} does not match its hash")
+    return json.loads(raw)
+
+
+def archive_writer_id(base_dir: Path) -> str:
+    """
+    Identifier of the handover directory's archive writer, created on first use
+
+    Archive segments carry it in their names, so two endpoints archiving on
+    the same day never write segments that a sync would confuse.
+    """
+    path = Path(base_dir) / ARCHIVE_WRITER_FILE
+    try:
+        return path.read_text().strip()
+    except FileNotFoundError:
+        pass
+    host = re.sub(r"[^A-Za-z0-9-]", "-", socket.gethostname()) or "host"
+    temp_path = path.with_name(f"{ARCHIVE_WRITER_FILE}.{os.getpid()}.tmp")
+    temp_path.write_text(f"{host}-{os.urandom(4).hex()}\n")
+    try:
+        # Whichever process links first wins; everyone then reads its id
+        os.link(temp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        temp_path.unlink()
+    return path.read_text().strip()
+
+
+def append_archive_member(path: Path, records: List[Dict[str, Any]]) -> int:
+    """
+    Append records to an archive segment as one gzip member of JSON lines
+
+    Concatenated gzip members form a valid gzip file, so segments can be read
+    whole with gzip.open or one member at a time with read_archive_record.
+
+    Args:
+        path: Segment path
+        records: Records to append
+
+    Returns:
+        Byte offset of the new member within the segment
+    """
+    data = gzip.compress(
+        b"".join(json.dumps(record, separators=(',', ':')).encode() + b"\n" for record in records),
+        compresslevel=9, mtime=0
+    )
+    with open(path, 'ab') as f:
+        offset = f.tell()
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return offset
+
+
+def read_archive_record(path: Path, member_offset: int, line: int) -> Dict[str, Any]:
+    """Decompress the gzip member at member_offset of a segment and return its line-th record"""
+    decompressor = zlib.decompressobj(wbits=31)
+    chunks = []
+    with open(path, 'rb') as f:
+        f.seek(member_offset)
+        while not decompressor.eof:
+            data = f.read(64 * 1024)
+            if not data:
+                raise ValueError(f"Truncated archive member at {path}:{member_offset}")
+            chunks.append(decompressor.decompress(data))
+    return json.loads(b"".join(chunks).split(b"\n")[line])
+
+
+def iter_archive_members(path: Path) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Yield (member_offset, records) for every gzip member of an archive segment
+
+    Used to rebuild archive lookups for segments that arrived from another machine.
+    """
+    data = memoryview(Path(path).read_bytes())
+    offset = 0
+    while offset < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        raw = decompressor.decompress(data[offset:])
+        if not decompressor.eof:
+            raise ValueError(f"Truncated archive member at {path}:{offset}")
+        yield offset, [json.loads(line) for line in raw.split(b"\n") if line]
+        offset = len(data) - len(decompressor.unused_data)
+
+
+@contextmanager
+def handover_lock(lock_dir: Path, ref_tag: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock on one handover for the duration of the block"""
+    lock_dir = Path(lock_dir)
+    lock_dir.mkdir(exist_ok=True)
+    fd = os.open(lock_dir / f"{ref_tag}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+class HandoverIndex:
+    """
+    SQLite index of handovers keyed by REF tag
+
+    The database runs in WAL mode, so readers never block the writer and
+    concurrent agents on one machine serialise their updates inside SQLite
+    instead of racing on a rewritten JSON file. Lookups by target agent and
+    status use secondary indexes rather than scanning every handover.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        # SQLite connections must not be shared across fork() or threads
+        local = self._local
+        if getattr(local, 'conn', None) is None or local.pid != os.getpid():
+            local.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            local.conn.row_factory = sqlite3.Row
+            local.conn.execute("PRAGMA journal_mode=WAL")
+            local.conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn.executescript(INDEX_SCHEMA)
+            if not self._migrated(local.conn):
+                self._migrate(local.conn)
+            local.conn.execute(
+                "CREATE INDEX IF NOT EXISTS handovers_by_update ON handovers (status, updated_at)"
+            )
+            local.pid = os.getpid()
+        return local.conn
+
+    @staticmethod
+    def _migrated(conn: "sqlite3.Connection") -> bool:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(handovers)")}
+        return all(column in columns for column, _ in INDEX_MIGRATIONS)
+
+    @staticmethod
+    def _migrate(conn: "sqlite3.Connection") -> None:
+        """Add columns missing from an index created by an older version"""
+        # Several agents may open an old index at once; re-check under the write lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(handovers)")}
+            for column, definition in INDEX_MIGRATIONS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE handovers ADD COLUMN {column} {definition}")
+            if "updated_at" not in columns:
+                conn.execute("UPDATE handovers SET updated_at = created_at WHERE updated_at IS NULL")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def upsert(self, entry: Dict[str, Any]) -> None:
+        """Insert or replace the index entry for one handover"""
+        self.upsert_many([entry])
+
+    def upsert_many(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Insert or replace index entries in a single transaction"""
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO handovers ({', '.join(INDEX_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(INDEX_FIELDS))})",
+                [_row(entry) for entry in entries]
+            )
+
+    def insert(self, entry: Dict[str, Any]) -> bool:
+        """
+        Add the index entry for a new handover
+
+        Returns:
+            False if a handover with the same REF tag is already indexed
+        """
+        try:
+            with self.conn:
+                self.conn.execute(
+                    f"INSERT INTO handovers ({', '.join(INDEX_FIELDS)}) "
+                    f"VALUES ({', '.join('?' * len(INDEX_FIELDS))})",
+                    _row(entry)
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def update_if_newer(self, entry: Dict[str, Any]) -> bool:
+        """
+        Replace an index entry only if it carries a higher version
+
+        Versions only move forward, so a writer holding a stale copy of a
+        handover can never roll back a newer update.
+
+        Returns:
+            True if the entry was written
+        """
+        columns = [field for field in INDEX_FIELDS if field != "ref_tag"]
+        with self.conn:
+            cursor = self.conn.execute(
+                f"UPDATE handovers SET {', '.join(f'{field} = ?' for field in columns)} "
+                f"WHERE ref_tag = ? AND version < ?",
+                [entry.get(field) for field in columns] + [entry["ref_tag"], entry["version"]]
+            )
+        return cursor.rowcount == 1
+
+    def claim_next(self, to_agent: str, updated_at: str,
+                   skip: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Atomically move the oldest pending handover for an agent to 'claimed'
+
+        The select and update run in one IMMEDIATE transaction, so concurrent
+        claimers in any process never receive the same handover.
+
+        Args:
+            to_agent: Agent claiming work
+            updated_at: Timestamp of the claim
+            skip: REF tags not to claim, e.g. ones whose claim was just rolled back
+
+        Returns:
+            The claimed index entry with its bumped version, or None if nothing is pending
+        """
+        skip = list(skip)
+        excluded = f" AND ref_tag NOT IN ({', '.join('?' * len(skip))})" if skip else ""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT * FROM handovers WHERE to_agent = ? AND status = 'pending'{excluded} "
+                "ORDER BY created_at LIMIT 1",
+                [to_agent, *skip]
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE handovers SET status = 'claimed', updated_at = ?, version = version + 1 "
+                    "WHERE ref_tag = ?",
+                    (updated_at, row["ref_tag"])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return dict(row, status="claimed", updated_at=updated_at, version=row["version"] + 1)
+
+    def transition(self, ref_tag: str, from_status: str, to_status: str, updated_at: str) -> bool:
+        """
+        Change a handover's status only if it still has from_status, bumping its version
+
+        Returns:
+            True if the status was changed
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE handovers SET status = ?, updated_at = ?, version = version + 1 "
+                "WHERE ref_tag = ? AND status = ?",
+                (to_status, updated_at, ref_tag, from_status)
+            )
+        return cursor.rowcount == 1
+
+    def retention_candidates(self, completed_before: str,
+                             pending_before: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Entries due for archiving
+
+        Args:
+            completed_before: Completed handovers last updated before this timestamp
+            pending_before: Pending handovers created before this timestamp; None disables expiry
+
+        Returns:
+            Matching index entries
+        """
+        rows = list(self.conn.execute(
+            "SELECT * FROM handovers WHERE status IN ('completed', 'expired') AND updated_at < ? "
+            "ORDER BY updated_at",
+            (completed_before,)
+        ))
+        if pending_before is not None:
+            rows += self.conn.execute(
+                "SELECT * FROM handovers WHERE status = 'pending' AND created_at < ? ORDER BY created_at",
+                (pending_before,)
+            )
+        return [dict(row) for row in rows]
+
+    def archive(self, locations: Iterable[Dict[str, Any]], archived_at: str) -> None:
+        """
+        Move entries from the hot index to the archive lookup in one transaction
+
+        Args:
+            locations: Dicts with ref_tag, segment, member_offset, line, status and to_agent
+            archived_at: Archive timestamp
+        """
+        locations = list(locations)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO archived "
+                "(ref_tag, segment, member_offset, line, status, to_agent, archived_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(loc["ref_tag"], loc["segment"], loc["member_offset"], loc["line"], loc["status"],
+                  loc["to_agent"], archived_at) for loc in locations]
+            )
+            self.conn.executemany("DELETE FROM handovers WHERE ref_tag = ?",
+                                  [(loc["ref_tag"],) for loc in locations])
+
+    def unarchive(self, entry: Dict[str, Any]) -> None:
+        """Drop a handover's archive lookup and put its entry back in the hot index"""
+        with self.conn:
+            self.conn.execute("DELETE FROM archived WHERE ref_tag = ?", (entry["ref_tag"],))
+        if not self.insert(entry):
+            self.update_if_newer(entry)
+
+    def archived_location(self, ref_tag: str) -> Optional[Dict[str, Any]]:
+        """Return where an archived handover is stored, or None if it is not archived"""
+        row = self.conn.execute("SELECT * FROM archived WHERE ref_tag = ?", (ref_tag,)).fetchone()
+        return dict(row) if row else None
+
+    def archived_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM archived").fetchone()[0]
+
+    def get(self, ref_tag: str) -> Optional[Dict[str, Any]]:
+        """Return the index entry for a handover, or None if it is not indexed"""
+        row = self.conn.execute("SELECT * FROM handovers WHERE ref_tag = ?", (ref_tag,)).fetchone()
+        return dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, to_agent: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        List index entries in creation order
+
+        Args:
+            status: Only entries with this status
+            to_agent: Only entries addressed to this agent
+
+        Returns:
+            Matching entries
+        """
+        clauses, params = [], []
+        if to_agent is not None:
+            clauses.append("to_agent = ?")
+            params.append(to_agent)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(f"SELECT * FROM handovers{where} ORDER BY created_at", params)
+        return [dict(row) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of indexed handovers, optionally with a given status"""
+        if status is None:
+            return self.conn.execute("SELECT COUNT(*) FROM handovers").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM handovers WHERE status = ?", (status,)).fetchone()[0]
+
+    def migrate_json(self, json_path: Path) -> int:
+        """
+        Import a legacy handover_index.json once and retire the file
+
+        The JSON file is renamed to <name>.migrated so it is not mistaken for
+        live state; entries already in the database are left untouched.
+
+        Args:
+            json_path: Path to handover_index.json
+
+        Returns:
+            Number of entries imported
+        """
+        json_path = Path(json_path)
+        try:
+            with open(json_path, 'r') as f:
+                entries = json.load(f).get("handovers", [])
+        except FileNotFoundError:
+            return 0
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO handovers ({', '.join(INDEX_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(INDEX_FIELDS))})",
+                [_row(entry) for entry in entries]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)", (str(json_path),)
+            )
+        try:
+            os.replace(json_path, json_path.with_name(json_path.name + ".migrated"))
+        except FileNotFoundError:
+            # Another process migrated the same file concurrently; the inserts above were no-ops
+            pass
+        return len(entries)
+
+    def close(self) -> None:
+        local = self._local
+        if getattr(local, 'conn', None) is not None and local.pid == os.getpid():
+            local.conn.close()
+        local.conn = None
+
+
+class HandoverListener:
+    """A bound notification socket an agent waits on; see HandoverNotifier.listen"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """
+        Block until a notification arrives or timeout elapses
+
+        Returns:
+            True if woken by a notification
+        """
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.recv(64)
+        except socket.timeout:
+            return False
+        # Coalesce wake-ups that arrived together
+        self.sock.setblocking(False)
+        try:
+            while True:
+                self.sock.recv(64)
+        except BlockingIOError:
+            pass
+        return True
+
+
+class HandoverNotifier:
+    """
+    Wakes agents blocked waiting for handovers over Unix datagram sockets
+
+    Each waiting agent process binds <notify_dir>/<agent>.<pid>.<nonce>.sock;
+    notify() sends a datagram to every socket of the target agent and removes
+    sockets whose owner has gone away. Notifications only say "look again",
+    so a lost or duplicated one costs at most a poll interval or an extra
+    index query.
+    """
+
+    def __init__(self, notify_dir: Path):
+        self.notify_dir = Path(notify_dir)
+
+    @staticmethod
+    def _prefix(agent: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_-]', '_', agent)
+
+    @contextmanager
+    def listen(self, agent: str) -> Iterator[HandoverListener]:
+        """Bind a notification socket for an agent for the duration of the block"""
+        self.notify_dir.mkdir(exist_ok=True)
+        path = self.notify_dir / f"{self._prefix(agent)}.{os.getpid()}.{os.urandom(4).hex()}.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(str(path))
+            yield HandoverListener(sock)
+        finally:
+            sock.close()
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def notify(self, agent: str) -> int:
+        """
+        Wake every process waiting for handovers addressed to agent
+
+        Returns:
+            Number of listeners notified
+        """
+        if not self.notify_dir.exists():
+            return 0
+        notified = 0
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            for path in self.notify_dir.glob(f"{self._prefix(agent)}.*.sock"):
+                try:
+                    sock.sendto(b"1", str(path))
+                    notified += 1
+                except BlockingIOError:
+                    # The listener's queue is full, so it already has a wake-up pending
+                    notified += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+        finally:
+            sock.close()
+        return notified
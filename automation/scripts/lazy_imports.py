@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Lazy Imports for Project Locus
+Deferred module loading so CLI entry points only pay for the modules a command uses
+"""
+
+import importlib.util
+import sys
+import types
+
+
+class _MissingModule(types.ModuleType):
+    """Stand-in for an optional module that is not installed; any use raises ImportError"""
+
+    def __getattr__(self, attr: str):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'", name=self.__name__)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Return a module that is executed on first attribute access
+
+    Modules already imported are returned as is. A module that cannot be found
+    yields a stand-in raising ModuleNotFoundError when used, so optional
+    dependencies such as psutil only fail the commands that need them.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module, loaded lazily
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return _MissingModule(name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,1166 @@
+#!/usr/bin/env python3
+"""
+Segmented Receipt Store for Project Locus
+Append-only, size-rotated segment log for context receipts with a REF tag index,
+hash-linked chain and legacy JSON export
+"""
+
+import atexit
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+import queue
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import canonical
+from lazy_imports import lazy_import
+from snapshot_store import SnapshotStore, rehydrate_receipt
+
+# Only the index and compaction need these, so `--help` skips them
+shutil = lazy_import("shutil")
+sqlite3 = lazy_import("sqlite3")
+
+
+DEFAULT_RECEIPT_DIR = Path("/tmp/locus_receipts")
+DEFAULT_SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_INDEX_INTERVAL = 64
+DEFAULT_FSYNC_BATCH = 32
+DEFAULT_FSYNC_INTERVAL = 1.0
+DEFAULT_CHECKPOINT_INTERVAL = 1024
+DEFAULT_WRITER_BATCH = 1000
+DEFAULT_WRITER_DELAY = 0.05
+
+# Predecessor hash of the first receipt in the chain
+GENESIS_HASH = "0" * 64
+
+# Compaction leaves {"compacted": {"hash": ..., "previous_hash": ...}} in place of a dropped receipt,
+# so sequence numbers, checkpoints and every surviving chain link stay as they were
+TOMBSTONE_KEY = "compacted"
+TOMBSTONE_PREFIX = b'{"%s":' % TOMBSTONE_KEY.encode()
+
+# Record: <length:u32><crc32:u32><compact JSON payload>
+RECORD_HEADER = struct.Struct(">II")
+# Sparse index entry: <global seq:u64><ordinal within segment:u64><byte offset:u64>
+INDEX_ENTRY = struct.Struct(">QQQ")
+
+SEGMENT_PREFIX = "segment_"
+
+# Compaction builds the new log beside the live one, then swaps it in while this marker exists
+COMPACT_STAGING_DIR = "segments.compact"
+COMPACT_RETIRED_DIR = "segments.retired"
+COMPACT_MARKER = ".compact_swap"
+
+
+class ReceiptLocation(NamedTuple):
+    """Position of a receipt in the segment log"""
+    segment: int
+    offset: int
+    seq: int
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    ref_tag TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL UNIQUE,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    first_seq INTEGER
+);
+CREATE TABLE IF NOT EXISTS chain_checkpoints (
+    seq INTEGER PRIMARY KEY,
+    chain_hash TEXT NOT NULL
+);
+"""
+
+
+class ReceiptIndex:
+    """
+    SQLite B-tree index of receipt locations keyed by REF tag and sequence number
+
+    Writes are idempotent (INSERT OR REPLACE), so a reader catching the index up
+    after a crash can safely race the writer doing the same.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        # SQLite connections must not be shared across fork() or threads
+        local = self._local
+        if getattr(local, 'conn', None) is None or local.pid != os.getpid():
+            local.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            local.conn.execute("PRAGMA journal_mode=WAL")
+            local.conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn.executescript(INDEX_SCHEMA)
+            if not self._has_first_seq(local.conn):
+                self._add_first_seq(local.conn)
+            local.pid = os.getpid()
+        return local.conn
+
+    @staticmethod
+    def _has_first_seq(conn: "sqlite3.Connection") -> bool:
+        return any(row[1] == 'first_seq' for row in conn.execute("PRAGMA table_info(receipts)"))
+
+    @classmethod
+    def _add_first_seq(cls, conn: "sqlite3.Connection") -> None:
+        # Another process may be migrating the same index; re-check under the write lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not cls._has_first_seq(conn):
+                conn.execute("ALTER TABLE receipts ADD COLUMN first_seq INTEGER")
+                # Older rows only know the latest position of a REF tag, so rebuild them from the log
+                conn.execute("DELETE FROM receipts")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def add(self, entries: Iterable[Tuple[str, ReceiptLocation]]) -> None:
+        """
+        Record the locations of newly appended receipts
+
+        Args:
+            entries: (ref_tag, location) pairs
+        """
+        with self.conn:
+            # A re-appended REF tag points at its latest copy but keeps its first position
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO receipts (ref_tag, seq, segment, offset, first_seq) VALUES "
+                "(?, ?, ?, ?, COALESCE((SELECT first_seq FROM receipts WHERE ref_tag = ?), ?))",
+                [(ref_tag, loc.seq, loc.segment, loc.offset, ref_tag, loc.seq) for ref_tag, loc in entries]
+            )
+
+    def next_seq(self) -> int:
+        """Return the sequence number of the first receipt not yet indexed"""
+        row = self.conn.execute("SELECT MAX(seq) FROM receipts").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def lookup(self, ref_tag: str) -> Optional[ReceiptLocation]:
+        """
+        Find where a receipt is stored
+
+        Args:
+            ref_tag: REF tag of the receipt
+
+        Returns:
+            Location of the receipt, or None if it is not indexed
+        """
+        row = self.conn.execute(
+            "SELECT segment, offset, seq FROM receipts WHERE ref_tag = ?", (ref_tag,)
+        ).fetchone()
+        return ReceiptLocation(*row) if row else None
+
+    def first_seq(self, ref_tag: str) -> Optional[int]:
+        """Return the sequence number of the first receipt recorded under ref_tag, or None"""
+        row = self.conn.execute("SELECT first_seq FROM receipts WHERE ref_tag = ?", (ref_tag,)).fetchone()
+        return row[0] if row else None
+
+    def range(self, start_seq: int, end_seq: int) -> Iterator[ReceiptLocation]:
+        """Yield indexed locations with start_seq <= seq <= end_seq in append order"""
+        cursor = self.conn.execute(
+            "SELECT segment, offset, seq FROM receipts WHERE seq BETWEEN ? AND ? ORDER BY seq",
+            (start_seq, end_seq)
+        )
+        for row in cursor:
+            yield ReceiptLocation(*row)
+
+    def add_checkpoint(self, seq: int, chain_hash: str) -> None:
+        """Record that the chain up to and including seq was verified to end in chain_hash"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chain_checkpoints (seq, chain_hash) VALUES (?, ?)",
+                (seq, chain_hash)
+            )
+
+    def latest_checkpoint(self, max_seq: int) -> Optional[Tuple[int, str]]:
+        """Return the (seq, chain_hash) of the newest checkpoint at or before max_seq"""
+        row = self.conn.execute(
+            "SELECT seq, chain_hash FROM chain_checkpoints WHERE seq <= ? ORDER BY seq DESC LIMIT 1",
+            (max_seq,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def clear(self) -> None:
+        """Drop every receipt location, e.g. after compaction moves records between segments"""
+        with self.conn:
+            self.conn.execute("DELETE FROM receipts")
+
+    def close(self) -> None:
+        local = self._local
+        if getattr(local, 'conn', None) is not None and local.pid == os.getpid():
+            local.conn.close()
+        local.conn = None
+
+
+def frame_record(payload: bytes) -> bytes:
+    """Wrap a payload in a length-prefixed, checksummed record"""
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+# Chained payloads are the canonical receipt body with this member spliced onto the end
+CHAIN_SUFFIX = re.compile(rb'[,{]"chain":\{"hash":"([0-9a-f]{64})","previous_hash":"([0-9a-f]{64})"\}\}')
+CHAIN_SUFFIX_LEN = len(b',"chain":{"hash":"","previous_hash":""}}') + 128
+
+
+def _receipt_body(receipt: Dict[str, Any]) -> bytes:
+    """Canonical encoding of a receipt without its 'chain' member"""
+    if isinstance(receipt, canonical.Encoded):
+        return receipt.canonical
+    return canonical.dumps({key: value for key, value in receipt.items() if key != 'chain'})
+
+
+def _digest(previous_hash: str, body: bytes) -> str:
+    return hashlib.sha256(previous_hash.encode() + b":" + body).hexdigest()
+
+
+def chain_digest(receipt: Dict[str, Any], previous_hash: str) -> str:
+    """
+    Hash a receipt together with its predecessor's chain hash
+
+    The digest covers the canonical encoding of the receipt with its own 'chain'
+    field left out, which is exactly the body stored in the log.
+    """
+    return _digest(previous_hash, _receipt_body(receipt))
+
+
+def link_receipt(receipt: Dict[str, Any], previous_hash: str) -> Tuple[str, bytes]:
+    """
+    Embed the predecessor hash and the receipt's own chain hash
+
+    The receipt is serialised once; the same bytes are hashed and stored.
+
+    Returns:
+        (chain hash, record payload)
+    """
+    body = _receipt_body(receipt)
+    chain_hash = _digest(previous_hash, body)
+    receipt['chain'] = {'previous_hash': previous_hash, 'hash': chain_hash}
+
+    suffix = b'"chain":{"hash":"%s","previous_hash":"%s"}}' % (chain_hash.encode(), previous_hash.encode())
+    payload = body[:-1] + (b"," + suffix if body != b"{}" else suffix)
+    return chain_hash, payload
+
+
+def verify_link(receipt: Dict[str, Any], previous_hash: Optional[str] = None) -> bool:
+    """
+    Check a single chain link in O(1)
+
+    Args:
+        receipt: Receipt carrying a 'chain' field
+        previous_hash: Expected predecessor hash (default: trust the embedded one)
+
+    Returns:
+        True if the receipt hashes to its recorded chain hash and follows previous_hash
+    """
+    chain = receipt.get('chain')
+    if not isinstance(chain, dict):
+        return False
+    embedded_previous = chain.get('previous_hash')
+    if previous_hash is not None and embedded_previous != previous_hash:
+        return False
+    body = {key: value for key, value in receipt.items() if key != 'chain'}
+    return any(chain.get('hash') == _digest(embedded_previous, encoded)
+               for encoded in canonical.encodings(body))
+
+
+def _split_chained(payload: bytes) -> Optional[Tuple[bytes, str, str]]:
+    """Split a chained payload into (body, chain hash, previous hash) without parsing it"""
+    match = CHAIN_SUFFIX.fullmatch(payload, max(0, len(payload) - CHAIN_SUFFIX_LEN))
+    if match is None:
+        return None
+    body = payload[:match.start()] + b"}" if match.start() > 0 else b"{}"
+    return body, match.group(1).decode(), match.group(2).decode()
+
+
+def verify_record(payload: bytes, previous_hash: Optional[str] = None) -> bool:
+    """
+    Check the chain link of a stored record straight from its bytes
+
+    Records written before receipts were canonically encoded are parsed and
+    re-encoded instead.
+    """
+    split = _split_chained(payload)
+    if split is None:
+        return verify_link(json.loads(payload), previous_hash)
+    body, chain_hash, embedded_previous = split
+    if previous_hash is not None and embedded_previous != previous_hash:
+        return False
+    return chain_hash == _digest(embedded_previous, body) or verify_link(json.loads(payload), previous_hash)
+
+
+def tombstone_link(payload: bytes) -> Optional[Dict[str, str]]:
+    """Chain link kept by a compaction tombstone (empty if the receipt was unchained), or None for a receipt"""
+    if not payload.startswith(TOMBSTONE_PREFIX):
+        return None
+    record = json.loads(payload)
+    return record[TOMBSTONE_KEY] if len(record) == 1 else None
+
+
+def make_tombstone(payload: bytes) -> bytes:
+    """Tombstone payload standing in for a stored record, carrying its chain link but not its body"""
+    split = _split_chained(payload)
+    if split is not None:
+        return canonical.dumps({TOMBSTONE_KEY: {'hash': split[1], 'previous_hash': split[2]}})
+    chain = json.loads(payload).get('chain')
+    if not isinstance(chain, dict) or 'hash' not in chain:
+        return canonical.dumps({TOMBSTONE_KEY: {}})
+    return canonical.dumps({TOMBSTONE_KEY: {'hash': chain['hash'], 'previous_hash': chain.get('previous_hash')}})
+
+
+def _record_chain_hash(payload: bytes) -> Optional[str]:
+    """Chain hash recorded in a stored record, or None for unchained legacy records"""
+    split = _split_chained(payload)
+    if split is not None:
+        return split[1]
+    tombstone = tombstone_link(payload)
+    if tombstone is not None:
+        return tombstone.get('hash')
+    chain = json.loads(payload).get('chain')
+    return chain['hash'] if isinstance(chain, dict) and 'hash' in chain else None
+
+
+def _chain_hash_of(payload: bytes) -> str:
+    """Chain hash a successor of this record links to"""
+    return _record_chain_hash(payload) or GENESIS_HASH
+
+
+def _fsync_dir(path: Path) -> None:
+    """Make renames and file creations inside a directory durable"""
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _scan_records(f, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (offset, payload) for each complete, valid record from offset onwards
+
+    Stops silently at the first torn or corrupt record, which is where a crashed
+    writer left the tail of the segment.
+    """
+    f.seek(offset)
+    while True:
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return
+        length, crc = RECORD_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        yield offset, payload
+        offset += RECORD_HEADER.size + length
+
+
+class ReceiptStore:
+    """
+    Append-only receipt log split into size-rotated segments
+
+    Each segment_<n>.log holds length-prefixed compact JSON records and has a sparse
+    segment_<n>.idx mapping every index_interval-th record to its byte offset, so
+    counting and seeking never scan more than index_interval records. Appends from
+    several processes are serialised with an flock on the segment directory, and
+    fsyncs are batched by record count and elapsed time. Every append is also
+    recorded in a ReceiptIndex so receipts can be found by REF tag.
+
+    Receipts form a hash chain: under the writer lock each one is stamped with the
+    hash of its predecessor, taken from the chain head kept in memory, so appending
+    and verifying a link is O(1). Audits store checkpoints in the index and resume
+    from the newest one instead of rehashing from genesis.
+    """
+
+    def __init__(self, base_dir: Path = DEFAULT_RECEIPT_DIR,
+                 segment_max_bytes: int = DEFAULT_SEGMENT_MAX_BYTES,
+                 index_interval: int = DEFAULT_INDEX_INTERVAL,
+                 fsync_batch: int = DEFAULT_FSYNC_BATCH,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                 checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        self.base_dir = Path(base_dir)
+        self.segment_dir = self.base_dir / "segments"
+        self.lock_path = self.base_dir / ".segments.lock"
+        self.segment_max_bytes = segment_max_bytes
+        self.index_interval = index_interval
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.checkpoint_interval = checkpoint_interval
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.index = ReceiptIndex(self.base_dir / "receipt_index.sqlite")
+        self.snapshots = SnapshotStore(self.base_dir / "snapshots")
+
+        # Writer state, loaded lazily on first append
+        self._log_fd = None
+        self._idx_fd = None
+        self._segment_id = 0
+        self._offset = 0
+        self._ordinal = 0
+        self._seq = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self._atexit_registered = False
+        self._chain_head = GENESIS_HASH
+        # flock only excludes other open files, so threads sharing this store also need a mutex
+        self._thread_lock = threading.Lock()
+
+        # Must run before the segment directory is created, or a half-swapped log would look empty
+        self._recover_compaction()
+        self.segment_dir.mkdir(exist_ok=True)
+
+    def segment_path(self, segment_id: int) -> Path:
+        return self.segment_dir / f"{SEGMENT_PREFIX}{segment_id:08d}.log"
+
+    def index_path(self, segment_id: int) -> Path:
+        return self.segment_dir / f"{SEGMENT_PREFIX}{segment_id:08d}.idx"
+
+    def segment_ids(self) -> List[int]:
+        """Return the ids of all segments in ascending order"""
+        return sorted(
+            int(path.stem[len(SEGMENT_PREFIX):])
+            for path in self.segment_dir.glob(f"{SEGMENT_PREFIX}*.log")
+        )
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the exclusive writer lock for the duration of the block"""
+        with self._thread_lock:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def _read_index(self, segment_id: int) -> List[Tuple[int, int, int]]:
+        """Read all (seq, ordinal, offset) entries of a segment's sparse index"""
+        try:
+            data = self.index_path(segment_id).read_bytes()
+        except FileNotFoundError:
+            return []
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        return [INDEX_ENTRY.unpack_from(data, pos) for pos in range(0, usable, INDEX_ENTRY.size)]
+
+    def _last_index_entry(self, segment_id: int) -> Optional[Tuple[int, int, int]]:
+        """Read only the final entry of a segment's sparse index"""
+        try:
+            with open(self.index_path(segment_id), 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                size -= size % INDEX_ENTRY.size
+                if size == 0:
+                    return None
+                f.seek(size - INDEX_ENTRY.size)
+                return INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+        except FileNotFoundError:
+            return None
+
+    def _segment_start(self, segment_id: int) -> int:
+        """Return the global sequence number of a segment's first record"""
+        try:
+            with open(self.index_path(segment_id), 'rb') as f:
+                entry = f.read(INDEX_ENTRY.size)
+        except FileNotFoundError:
+            entry = b""
+        if len(entry) == INDEX_ENTRY.size:
+            return INDEX_ENTRY.unpack(entry)[0]
+
+        # Segment created but never indexed: it starts where the previous one ends
+        previous = [sid for sid in self.segment_ids() if sid < segment_id]
+        return self._segment_end(previous[-1])[0] if previous else 0
+
+    def _segment_end(self, segment_id: int) -> Tuple[int, int, int]:
+        """
+        Compute (next seq, record count, end offset) of a segment
+
+        Starts from the last sparse index entry, so the cost is bounded by the index
+        interval rather than the segment length.
+        """
+        entry = self._last_index_entry(segment_id) or (self._segment_start(segment_id), 0, 0)
+
+        seq, ordinal, offset = entry
+        try:
+            with open(self.segment_path(segment_id), 'rb') as f:
+                for offset, payload in _scan_records(f, offset):
+                    seq += 1
+                    ordinal += 1
+                    offset += RECORD_HEADER.size + len(payload)
+        except FileNotFoundError:
+            pass
+        return seq, ordinal, offset
+
+    def _close_fds(self) -> None:
+        for fd in (self._log_fd, self._idx_fd):
+            if fd is not None:
+                os.close(fd)
+        self._log_fd = self._idx_fd = None
+
+    def _open_segment(self, segment_id: int) -> None:
+        """Open a segment for appending, recovering its tail if a writer crashed"""
+        self._close_fds()
+        seq, ordinal, offset = self._segment_end(segment_id)
+
+        self._log_fd = os.open(self.segment_path(segment_id), os.O_RDWR | os.O_CREAT, 0o644)
+        self._idx_fd = os.open(self.index_path(segment_id), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+        # Drop a torn record left behind by a crashed writer (we hold the lock)
+        if os.fstat(self._log_fd).st_size > offset:
+            os.ftruncate(self._log_fd, offset)
+        if os.fstat(self._idx_fd).st_size == 0:
+            os.write(self._idx_fd, INDEX_ENTRY.pack(seq, 0, 0))
+
+        self._segment_id = segment_id
+        self._seq, self._ordinal, self._offset = seq, ordinal, offset
+
+    def _sync_tail(self) -> None:
+        """Catch up with records appended by other processes since our last write"""
+        ids = self.segment_ids()
+        latest = ids[-1] if ids else 1
+
+        if self._log_fd is None or latest != self._segment_id:
+            self._open_segment(latest)
+            self._chain_head = self._read_chain_head()
+            return
+
+        try:
+            on_disk = os.stat(self.segment_path(latest))
+        except FileNotFoundError:
+            on_disk = None
+        current = os.fstat(self._log_fd)
+        if on_disk is None or on_disk.st_ino != current.st_ino or on_disk.st_size < self._offset:
+            # The segment was replaced underneath us (e.g. by compaction)
+            self._open_segment(latest)
+            self._chain_head = self._read_chain_head()
+        elif on_disk.st_size > self._offset:
+            last_payload = None
+            with open(self.segment_path(latest), 'rb') as f:
+                for offset, payload in _scan_records(f, self._offset):
+                    self._seq += 1
+                    self._ordinal += 1
+                    self._offset = offset + RECORD_HEADER.size + len(payload)
+                    last_payload = payload
+            if last_payload is not None:
+                self._chain_head = _chain_hash_of(last_payload)
+            if on_disk.st_size > self._offset:
+                os.ftruncate(self._log_fd, self._offset)
+
+    def _read_chain_head(self) -> str:
+        """Read the chain hash of the last stored record (bounded by the index interval)"""
+        if self._seq == 0:
+            return GENESIS_HASH
+        for _, payload in self.iter_records(self._seq - 1):
+            return _chain_hash_of(payload)
+        return GENESIS_HASH
+
+    @property
+    def chain_head(self) -> str:
+        """Chain hash of the last receipt this process appended or caught up with"""
+        return self._chain_head
+
+    def append(self, receipt: Dict[str, Any]) -> ReceiptLocation:
+        """
+        Append a receipt to the log
+
+        Args:
+            receipt: Receipt to store
+
+        Returns:
+            Location of the stored receipt
+        """
+        return self.append_many([receipt])[0]
+
+    def append_many(self, receipts: Iterable[Dict[str, Any]]) -> List[ReceiptLocation]:
+        """
+        Append several receipts under a single lock acquisition
+
+        Each receipt is linked to its predecessor in place (its 'chain' field is set).
+
+        Args:
+            receipts: Receipts to store, in order
+
+        Returns:
+            Locations of the stored receipts
+        """
+        receipts = list(receipts)
+        ref_tags = [receipt.get('ref_tag') for receipt in receipts]
+
+        with self._locked():
+            self._sync_tail()
+            self._catch_up_index(self._seq)
+
+            payloads = []
+            for receipt in receipts:
+                self._chain_head, payload = link_receipt(receipt, self._chain_head)
+                payloads.append(payload)
+
+            locations = self._write_payloads(payloads)
+            self.index.add(zip(ref_tags, locations))
+
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+        return locations
+
+    def _write_payloads(self, payloads: Iterable[bytes]) -> List[ReceiptLocation]:
+        """Frame and append already linked payloads at the tail (the caller holds the writer lock)"""
+        locations = []
+        for payload in payloads:
+            record = frame_record(payload)
+            if self._ordinal > 0 and self._offset + len(record) > self.segment_max_bytes:
+                self._fsync()
+                self._open_segment(self._segment_id + 1)
+
+            if self._ordinal > 0 and self._ordinal % self.index_interval == 0:
+                os.write(self._idx_fd, INDEX_ENTRY.pack(self._seq, self._ordinal, self._offset))
+
+            os.pwrite(self._log_fd, record, self._offset)
+            locations.append(ReceiptLocation(self._segment_id, self._offset, self._seq))
+
+            self._offset += len(record)
+            self._ordinal += 1
+            self._seq += 1
+            self._pending += 1
+
+        if (self._pending >= self.fsync_batch
+                or time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._fsync()
+        return locations
+
+    def _fsync(self) -> None:
+        if self._pending and self._log_fd is not None:
+            os.fsync(self._log_fd)
+            os.fsync(self._idx_fd)
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def flush(self) -> None:
+        """Force pending appends to stable storage"""
+        with self._thread_lock:
+            self._fsync()
+
+    def close(self) -> None:
+        """Flush pending appends and release file descriptors"""
+        with self._thread_lock:
+            self._fsync()
+            self._close_fds()
+        self.index.close()
+
+    def __enter__(self) -> 'ReceiptStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read_at(self, segment: int, offset: int) -> Dict[str, Any]:
+        """
+        Read the receipt stored at a known location
+
+        Args:
+            segment: Segment id
+            offset: Byte offset of the record within the segment
+
+        Returns:
+            Stored receipt
+        """
+        with open(self.segment_path(segment), 'rb') as f:
+            for _, payload in _scan_records(f, offset):
+                return json.loads(payload)
+        raise KeyError(f"No receipt at segment {segment} offset {offset}")
+
+    def iter_receipts(self, start_seq: int = 0) -> Iterator[Tuple[ReceiptLocation, Dict[str, Any]]]:
+        """
+        Stream receipts in append order, starting at a global sequence number
+
+        Tombstones left by compaction are skipped.
+
+        Args:
+            start_seq: Sequence number of the first receipt to yield
+
+        Yields:
+            (location, receipt) pairs
+        """
+        for location, payload in self.iter_records(start_seq):
+            if tombstone_link(payload) is None:
+                yield location, json.loads(payload)
+
+    def iter_records(self, start_seq: int = 0) -> Iterator[Tuple[ReceiptLocation, bytes]]:
+        """
+        Stream raw record payloads in append order, starting at a global sequence number
+
+        Args:
+            start_seq: Sequence number of the first record to yield
+
+        Yields:
+            (location, payload) pairs
+        """
+        ids = self.segment_ids()
+        for position, segment_id in enumerate(ids):
+            if position + 1 < len(ids) and self._segment_start(ids[position + 1]) <= start_seq:
+                continue
+
+            # Seek to the last indexed record at or before start_seq
+            index = self._read_index(segment_id) or [(self._segment_start(segment_id), 0, 0)]
+            position = max(bisect.bisect_right([entry[0] for entry in index], start_seq) - 1, 0)
+            seq, _, offset = index[position]
+
+            with open(self.segment_path(segment_id), 'rb') as f:
+                for record_offset, payload in _scan_records(f, offset):
+                    if seq >= start_seq:
+                        yield ReceiptLocation(segment_id, record_offset, seq), payload
+                    seq += 1
+
+    def _catch_up_index(self, end_seq: Optional[int] = None) -> None:
+        """Index receipts appended without an index update (older logs, crashed writers)"""
+        start_seq = self.index.next_seq()
+        if end_seq is not None and start_seq >= end_seq:
+            return
+
+        batch = []
+        # Tombstones are indexed too, without a REF tag, so next_seq moves past them
+        for location, payload in self.iter_records(start_seq):
+            batch.append((json.loads(payload).get('ref_tag'), location))
+            if len(batch) >= 1000:
+                self.index.add(batch)
+                batch = []
+        if batch:
+            self.index.add(batch)
+
+    def lookup(self, ref_tag: str) -> Optional[ReceiptLocation]:
+        """
+        Find a receipt's location by REF tag in O(log n)
+
+        Args:
+            ref_tag: REF tag of the receipt
+
+        Returns:
+            Location of the receipt, or None if it is not stored
+        """
+        location = self.index.lookup(ref_tag)
+        if location is None:
+            self._catch_up_index(self.count())
+            location = self.index.lookup(ref_tag)
+        return location
+
+    def get(self, ref_tag: str) -> Optional[Dict[str, Any]]:
+        """Read a receipt by REF tag"""
+        location = self.lookup(ref_tag)
+        return self.read_at(location.segment, location.offset) if location else None
+
+    def verify_chain(self, resume: bool = True) -> Dict[str, Any]:
+        """
+        Audit the hash chain, checkpointing progress in the index
+
+        Args:
+            resume: Start from the newest stored checkpoint instead of genesis
+
+        Returns:
+            Audit result: validity, first broken sequence number and records hashed
+        """
+        end_seq = self.count()
+        self._catch_up_index(end_seq)
+
+        start_seq, expected = 0, GENESIS_HASH
+        checkpoint = self.index.latest_checkpoint(end_seq - 1) if resume else None
+        if checkpoint is not None:
+            seq, chain_hash = checkpoint
+            # The checkpointed record itself must still end the verified prefix
+            stored = next((payload for _, payload in self.iter_records(seq)), None)
+            if stored is not None and _record_chain_hash(stored) == chain_hash:
+                start_seq, expected = seq + 1, chain_hash
+
+        verified = 0
+        unchained = 0
+        compacted = 0
+        for location, payload in self.iter_records(start_seq):
+            if location.seq >= end_seq:
+                break
+            chain_hash = _record_chain_hash(payload)
+            if chain_hash is None:
+                # Written before receipts were chained; the next link restarts at genesis
+                unchained += 1
+                expected = GENESIS_HASH
+                continue
+            tombstone = tombstone_link(payload)
+            # A tombstone's body was dropped by compaction, so only its link can be checked
+            intact = (tombstone.get('previous_hash') == expected if tombstone is not None
+                      else verify_record(payload, expected))
+            if not intact:
+                return {'valid': False, 'broken_at': location.seq, 'start_seq': start_seq,
+                        'verified': verified, 'unchained': unchained, 'compacted': compacted}
+            if tombstone is not None:
+                compacted += 1
+            else:
+                verified += 1
+            expected = chain_hash
+            if (location.seq + 1) % self.checkpoint_interval == 0:
+                self.index.add_checkpoint(location.seq, expected)
+
+        if end_seq > start_seq and (verified or compacted):
+            self.index.add_checkpoint(end_seq - 1, expected)
+        return {'valid': True, 'broken_at': None, 'start_seq': start_seq,
+                'verified': verified, 'unchained': unchained, 'compacted': compacted}
+
+    def iter_chain_records(self, start_ref: str, end_ref: str) -> Iterator[bytes]:
+        """
+        Lazily stream the raw records from start_ref to end_ref inclusive, in append order
+
+        Compaction tombstones inside the chain are yielded too, so callers can
+        follow the hash chain across receipts that compaction dropped. A REF tag
+        recorded more than once starts the chain at its first position and ends
+        it at its latest one.
+
+        Args:
+            start_ref: REF tag of the first receipt in the chain
+            end_ref: REF tag of the last receipt in the chain
+
+        Yields:
+            Record payloads in the chain
+        """
+        start = self.lookup(start_ref)
+        end = self.lookup(end_ref)
+        if start is None or end is None:
+            missing = start_ref if start is None else end_ref
+            raise KeyError(f"Receipt not found for REF tag: {missing}")
+        start_seq = self.index.first_seq(start_ref)
+        if start_seq > end.seq:
+            raise ValueError(f"{start_ref} was recorded after {end_ref}")
+
+        for location, payload in self.iter_records(start_seq):
+            if location.seq > end.seq:
+                break
+            yield payload
+
+    def iter_chain(self, start_ref: str, end_ref: str) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily stream the receipts from start_ref to end_ref inclusive, in append order
+
+        Costs two index lookups plus a sparse-index seek, then reads only the chain.
+        Tombstones left by compaction are skipped.
+
+        Args:
+            start_ref: REF tag of the first receipt in the chain
+            end_ref: REF tag of the last receipt in the chain
+
+        Yields:
+            Receipts in the chain
+        """
+        for payload in self.iter_chain_records(start_ref, end_ref):
+            if tombstone_link(payload) is None:
+                yield json.loads(payload)
+
+    def count(self) -> int:
+        """Return the number of stored receipts without scanning whole segments"""
+        ids = self.segment_ids()
+        return self._segment_end(ids[-1])[0] if ids else 0
+
+    def export_legacy(self, out_dir: Path, ref_tags: Optional[Iterable[str]] = None) -> int:
+        """
+        Write receipts as legacy receipt_<ref>.json files, with full context states
+
+        Args:
+            out_dir: Directory to write into
+            ref_tags: Only export these REF tags (default: all)
+
+        Returns:
+            Number of files written
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        wanted = set(ref_tags) if ref_tags else None
+
+        written = 0
+        for _, receipt in self.iter_receipts():
+            ref_tag = receipt.get('ref_tag')
+            if wanted is not None and ref_tag not in wanted:
+                continue
+            with open(out_dir / f"receipt_{ref_tag}.json", 'w') as f:
+                json.dump(rehydrate_receipt(receipt, self.snapshots), f, indent=2)
+            written += 1
+        return written
+
+    def import_legacy(self, source_dir: Path, remove: bool = False) -> int:
+        """
+        Append legacy receipt_<ref>.json files to the log, oldest first
+
+        Args:
+            source_dir: Directory holding legacy receipt files
+            remove: Delete each file once it has been imported
+
+        Returns:
+            Number of receipts imported
+        """
+        files = sorted(Path(source_dir).glob('receipt_*.json'), key=lambda path: path.stat().st_mtime)
+        imported = 0
+        for start in range(0, len(files), 1000):
+            batch = files[start:start + 1000]
+            receipts = []
+            for path in batch:
+                with open(path, 'r') as f:
+                    receipts.append(json.load(f))
+            self.append_many(receipts)
+            self.flush()
+            if remove:
+                for path in batch:
+                    path.unlink()
+            imported += len(receipts)
+        return imported
+
+    def _recover_compaction(self) -> None:
+        """Finish or roll back a compaction that was interrupted by a crash"""
+        marker = self.base_dir / COMPACT_MARKER
+        staging_dir = self.base_dir / COMPACT_STAGING_DIR
+        retired_dir = self.base_dir / COMPACT_RETIRED_DIR
+        if not (marker.exists() or staging_dir.exists() or retired_dir.exists()):
+            return
+
+        with self._locked():
+            if marker.exists():
+                # The marker is only written once the staged log is complete, so roll forward
+                staged = staging_dir / self.segment_dir.name
+                if staged.exists():
+                    if self.segment_dir.exists():
+                        os.replace(self.segment_dir, retired_dir)
+                    os.replace(staged, self.segment_dir)
+                    _fsync_dir(self.base_dir)
+                self.index.clear()
+                marker.unlink()
+                _fsync_dir(self.base_dir)
+            elif retired_dir.exists() and not self.segment_dir.exists():
+                os.replace(retired_dir, self.segment_dir)
+            # Without a marker any staged log is incomplete, and a retired one is already replaced
+            for stale in (staging_dir, retired_dir):
+                if stale.exists():
+                    shutil.rmtree(stale)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the log into full segments
+
+        Torn tails are dropped and, where a REF tag was stored more than once, only
+        its latest receipt is kept. Receipts without a REF tag are all kept. Each
+        dropped receipt is replaced by a tombstone carrying its chain link, so every
+        surviving record keeps its bytes, sequence number and link, the chain head
+        is unchanged and existing checkpoints stay valid.
+
+        Returns:
+            Receipt counts before and after compaction, and the number of tombstones
+        """
+        # Clears staging and retired logs left behind by an earlier crashed compaction
+        self._recover_compaction()
+
+        with self._locked():
+            self._fsync()
+            self._close_fds()
+
+            latest: Dict[Any, int] = {}
+            total = 0
+            for location, receipt in self.iter_receipts():
+                # Receipts without a REF tag are never duplicates of one another
+                latest[receipt.get('ref_tag') or location] = location.seq
+                total += 1
+            keep = set(latest.values())
+
+            staging_dir = self.base_dir / COMPACT_STAGING_DIR
+            staging = ReceiptStore(staging_dir, self.segment_max_bytes, self.index_interval,
+                                   self.fsync_batch, self.fsync_interval, self.checkpoint_interval)
+
+            tombstones = 0
+            batch = []
+            with staging._locked():
+                staging._sync_tail()
+                for location, payload in self.iter_records():
+                    if location.seq not in keep:
+                        tombstones += 1
+                        if tombstone_link(payload) is None:
+                            payload = make_tombstone(payload)
+                    batch.append(payload)
+                    if len(batch) >= 1000:
+                        staging._write_payloads(batch)
+                        batch = []
+                staging._write_payloads(batch)
+            staging.close()
+            _fsync_dir(staging.segment_dir)
+
+            # From here on a crash is rolled forward by _recover_compaction
+            marker = self.base_dir / COMPACT_MARKER
+            os.close(os.open(marker, os.O_WRONLY | os.O_CREAT, 0o644))
+            _fsync_dir(self.base_dir)
+
+            retired_dir = self.base_dir / COMPACT_RETIRED_DIR
+            os.replace(self.segment_dir, retired_dir)
+            os.replace(staging.segment_dir, self.segment_dir)
+            _fsync_dir(self.base_dir)
+
+            # Compaction moves records between segments, but sequence numbers are unchanged
+            self.index.clear()
+            marker.unlink()
+            _fsync_dir(self.base_dir)
+            shutil.rmtree(retired_dir)
+            shutil.rmtree(staging_dir)
+            self._catch_up_index()
+
+        return {'records_before': total, 'records_after': len(keep), 'tombstones': tombstones}
+
+
+class BufferedReceiptWriter:
+    """
+    Background writer that coalesces submitted receipts into append_many batches
+
+    Producers hand receipts to submit() and return immediately; a daemon thread
+    drains the queue, waiting up to max_delay for more receipts before writing up
+    to max_batch of them under a single store lock. Receipts are linked into the
+    chain when they are written, not when they are submitted. A write error is
+    re-raised from the next flush() or close().
+    """
+
+    def __init__(self, store: ReceiptStore, max_batch: int = DEFAULT_WRITER_BATCH,
+                 max_delay: float = DEFAULT_WRITER_DELAY):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="receipt-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, receipt: Dict[str, Any]) -> None:
+        """Queue a receipt for writing"""
+        if self._closed:
+            raise RuntimeError("BufferedReceiptWriter is closed")
+        self._queue.put(receipt)
+
+    def submit_many(self, receipts: Iterable[Dict[str, Any]]) -> None:
+        """Queue several receipts for writing, in order"""
+        for receipt in receipts:
+            self.submit(receipt)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                if self._error is None:
+                    self.store.append_many(batch)
+            except BaseException as e:
+                self._error = e
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every submitted receipt has been appended and synced"""
+        self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        self.store.flush()
+
+    def close(self) -> None:
+        """Write any queued receipts and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        self.store.flush()
+
+    def __enter__(self) -> 'BufferedReceiptWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main():
+    """CLI for inspecting, compacting and exporting the receipt log"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Locus Segmented Receipt Store')
+    parser.add_argument('--dir', default=str(DEFAULT_RECEIPT_DIR), help='Receipt directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('stats', help='Show segment and record counts')
+    list_parser = sub.add_parser('list', help='List the most recent receipts')
+    list_parser.add_argument('limit', nargs='?', type=int, default=5)
+    export_parser = sub.add_parser('export', help='Export receipts as legacy receipt_<ref>.json files')
+    export_parser.add_argument('out_dir')
+    export_parser.add_argument('ref_tags', nargs='*')
+    import_parser = sub.add_parser('import', help='Import legacy receipt_<ref>.json files')
+    import_parser.add_argument('source_dir', nargs='?')
+    import_parser.add_argument('--remove', action='store_true', help='Delete files after import')
+    sub.add_parser('compact', help='Rewrite segments, tombstoning duplicates and dropping torn tails')
+    verify_parser = sub.add_parser('verify', help='Audit the receipt hash chain')
+    verify_parser.add_argument('--full', action='store_true', help='Rehash from genesis, ignoring checkpoints')
+
+    args = parser.parse_args()
+    store = ReceiptStore(Path(args.dir))
+
+    if args.command == 'stats':
+        ids = store.segment_ids()
+        size = sum(store.segment_path(sid).stat().st_size for sid in ids)
+        print(f"Segments: {len(ids)}")
+        print(f"Receipts: {store.count()}")
+        print(f"Size: {size} bytes")
+
+    elif args.command == 'list':
+        start = max(0, store.count() - args.limit)
+        for location, receipt in store.iter_receipts(start):
+            print(f"  {receipt.get('ref_tag')} (segment {location.segment}, seq {location.seq})")
+
+    elif args.command == 'export':
+        written = store.export_legacy(Path(args.out_dir), args.ref_tags or None)
+        print(f"✓ Exported {written} receipts to {args.out_dir}")
+
+    elif args.command == 'import':
+        imported = store.import_legacy(Path(args.source_dir or args.dir), args.remove)
+        print(f"✓ Imported {imported} legacy receipts")
+
+    elif args.command == 'compact':
+        result = store.compact()
+        print(f"✓ Compacted {result['records_before']} receipts into {result['records_after']}"
+              f" ({result['tombstones']} tombstones)")
+
+    elif args.command == 'verify':
+        result = store.verify_chain(resume=not args.full)
+        if result['valid']:
+            print(f"✓ Chain valid: {result['verified']} receipts verified from seq {result['start_seq']}")
+        else:
+            print(f"✗ Chain broken at seq {result['broken_at']}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+REF Tag Allocator for Project Locus
+In-process replacement for generate_ref_tag.sh sharing its counter file and audit log
+"""
+
+import fcntl
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+
+REF_PREFIX = "LOCUS"
+DEFAULT_COUNTER_PATH = Path("/tmp/locus_ref_counter")
+DEFAULT_AUDIT_LOG_PATH = Path("/tmp/locus_ref_audit.log")
+MAX_COUNTER = 2**64 - 1
+
+# Mirrors the case statement in generate_ref_tag.sh
+TAG_FORMATS = {
+    "task": "TASK{timestamp}-{counter}",
+    "agent": "AGENT-{counter}",
+    "resource": "RES-{counter}",
+    "job": "JOB{timestamp}-{counter}",
+    "artifact": "ART{timestamp}-{counter}",
+    "notify": "NOTIFY-{timestamp}-{counter}",
+    "research": "RESEARCH-{timestamp}-{counter}",
+    "dash": "DASH-{timestamp}-{counter}",
+    "dashboard": "DASH-{timestamp}-{counter}",
+    "schema": "SCHEMA-{timestamp}-{counter}",
+    "validate": "VALIDATE-{timestamp}-{counter}",
+    "deploy": "DEPLOY-{timestamp}-{counter}",
+}
+
+
+def format_ref_tag(ref_type: str, timestamp: str, counter: int) -> str:
+    """
+    Format a REF tag exactly as generate_ref_tag.sh would
+
+    Args:
+        ref_type: Tag type (task, job, notify, ...) or a custom type
+        timestamp: Timestamp in YYYYMMDD-HHMMSS form
+        counter: Counter value
+
+    Returns:
+        Formatted REF tag
+    """
+    template = TAG_FORMATS.get(ref_type, ref_type.upper() + "{timestamp}-{counter}")
+    return f"{REF_PREFIX}-" + template.format(timestamp=timestamp, counter=f"{counter:03d}")
+
+
+class RefTagAllocator:
+    """
+    Allocates REF tags from the shared counter file without forking the shell script
+
+    The counter file is only modified under an exclusive flock on <counter>.lock (the
+    same lock generate_ref_tag.sh takes) and is replaced atomically, so concurrent
+    writers never see a torn or rolled-back value. With lease_size > 1 each process
+    reserves a block of counters per lock acquisition and serves tags from it locally.
+    """
+
+    def __init__(self, counter_path: Path = DEFAULT_COUNTER_PATH,
+                 audit_log_path: Optional[Path] = DEFAULT_AUDIT_LOG_PATH,
+                 lease_size: int = 1):
+        if lease_size < 1:
+            raise ValueError(f"lease_size must be positive, got {lease_size}")
+
+        self.counter_path = Path(counter_path)
+        self.lock_path = self.counter_path.with_name(self.counter_path.name + ".lock")
+        self.audit_log_path = Path(audit_log_path) if audit_log_path else None
+        self.lease_size = lease_size
+
+        self._lease_lock = threading.Lock()
+        self._lease_next = 0
+        self._lease_end = 0
+        self._lease_pid = None
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold an exclusive advisory lock on the counter for the duration of the block"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _read_counter(self) -> int:
+        """Read the current counter value, initialising it like the shell script does"""
+        try:
+            text = self.counter_path.read_text().strip()
+        except FileNotFoundError:
+            return 1
+
+        try:
+            value = int(text, 10)
+        except ValueError:
+            raise ValueError(f"Corrupt REF counter in {self.counter_path}: {text!r}") from None
+
+        if not 1 <= value <= MAX_COUNTER + 1:
+            raise ValueError(f"REF counter out of range in {self.counter_path}: {value}")
+        return value
+
+    def _write_counter(self, value: int) -> None:
+        """Atomically persist the next counter value in the %03d format used by the shell script"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.counter_path.parent, prefix=f".{self.counter_path.name}.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(f"{value:03d}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.counter_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _reserve_from_file(self, count: int) -> int:
+        """Reserve count values directly from the counter file under the lock"""
+        with self._locked():
+            first = self._read_counter()
+            if first + count - 1 > MAX_COUNTER:
+                raise OverflowError(f"REF counter exhausted 64-bit range at {first}")
+            self._write_counter(first + count)
+
+        return first
+
+    def reserve(self, count: int = 1) -> int:
+        """
+        Reserve a contiguous block of counter values
+
+        Requests that fit in the current lease are served without touching the
+        counter file; otherwise a new lease of max(count, lease_size) values is
+        taken in a single locked increment.
+
+        Args:
+            count: Number of counter values to reserve
+
+        Returns:
+            First counter value of the reserved block
+        """
+        if count < 1:
+            raise ValueError(f"count must be positive, got {count}")
+
+        with self._lease_lock:
+            # A forked child must never reuse the lease it inherited from its parent
+            if self._lease_pid != os.getpid():
+                self._lease_next = self._lease_end = 0
+                self._lease_pid = os.getpid()
+
+            if self._lease_end - self._lease_next < count:
+                block = max(count, self.lease_size)
+                self._lease_next = self._reserve_from_file(block)
+                self._lease_end = self._lease_next + block
+
+            first = self._lease_next
+            self._lease_next += count
+
+        return first
+
+    def allocate(self, ref_type: str, description: str = "", count: int = 1) -> List[str]:
+        """
+        Allocate a block of REF tags sharing one timestamp
+
+        Args:
+            ref_type: Tag type (task, job, notify, ...)
+            description: Description recorded in the audit log
+            count: Number of tags to allocate
+
+        Returns:
+            List of generated REF tags
+        """
+        now = datetime.now()
+        timestamp = now.strftime('%Y%m%d-%H%M%S')
+        first = self.reserve(count)
+        counters = range(first, first + count)
+
+        tags = [format_ref_tag(ref_type, timestamp, counter) for counter in counters]
+        self._audit(ref_type, description, timestamp, counters, now)
+        return tags
+
+    def generate(self, ref_type: str, description: str = "") -> str:
+        """
+        Allocate a single REF tag
+
+        Args:
+            ref_type: Tag type (task, job, notify, ...)
+            description: Description recorded in the audit log
+
+        Returns:
+            Generated REF tag
+        """
+        return self.allocate(ref_type, description, 1)[0]
+
+    def _audit(self, ref_type: str, description: str, timestamp: str, counters: range,
+               now: datetime) -> None:
+        """Append one audit line per tag, in the same format as the shell script"""
+        if self.audit_log_path is None:
+            return
+
+        logged_at = now.astimezone().isoformat(timespec='seconds')
+        lines = "".join(
+            f"{logged_at}: Generated REF tag {REF_PREFIX}-{ref_type.upper()}{timestamp}-{counter:03d} {description}\n"
+            for counter in counters
+        )
+        with open(self.audit_log_path, 'a') as f:
+            f.write(lines)
+
+
+_default_allocator: Optional[RefTagAllocator] = None
+
+
+def get_allocator() -> RefTagAllocator:
+    """
+    Return the process-wide allocator for the default counter and audit log
+
+    LOCUS_REF_LEASE_SIZE sets how many counters a long-running process reserves per
+    lock acquisition; the default of 1 keeps the counter file free of gaps.
+    LOCUS_REF_COUNTER and LOCUS_REF_AUDIT_LOG override the counter and audit
+    log paths, as they do for generate_ref_tag.sh.
+    """
+    global _default_allocator
+    if _default_allocator is None:
+        lease_size = int(os.environ.get("LOCUS_REF_LEASE_SIZE", "1"))
+        _default_allocator = RefTagAllocator(
+            Path(os.environ.get("LOCUS_REF_COUNTER", DEFAULT_COUNTER_PATH)),
+            Path(os.environ.get("LOCUS_REF_AUDIT_LOG", DEFAULT_AUDIT_LOG_PATH)),
+            lease_size=lease_size
+        )
+    return _default_allocator
+
+
+def generate_ref_tag(ref_type: str, description: str = "") -> str:
+    """Generate a single REF tag using the shared counter"""
+    return get_allocator().generate(ref_type, description)
+
+
+def allocate_ref_tags(ref_type: str, count: int, description: str = "") -> List[str]:
+    """Generate a block of REF tags with one locked counter increment"""
+    return get_allocator().allocate(ref_type, description, count)
+
+
+def main():
+    """CLI interface compatible with generate_ref_tag.sh"""
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <type> [description] [count]")
+        print("Types: task, agent, resource, job, artifact, notify, research, dash, schema, validate, deploy, or custom")
+        sys.exit(1)
+
+    ref_type = sys.argv[1]
+    description = sys.argv[2] if len(sys.argv) > 2 else ""
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    for tag in allocate_ref_tags(ref_type, count, description):
+        print(tag)
+
+
+if __name__ == '__main__':
+    main()
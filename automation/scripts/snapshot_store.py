@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Context Snapshot Store for Project Locus
+Content-addressed base snapshots and JSON-patch deltas for compact context receipts
+"""
+
+import copy
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import canonical
+from lazy_imports import lazy_import
+
+# Only needed when a new snapshot is written
+tempfile = lazy_import("tempfile")
+
+
+SNAPSHOT_ENCODING = "delta-v1"
+DEFAULT_CACHE_SIZE = 64
+# Start a new base once the patch to the current one outgrows this share of it
+DEFAULT_REBASE_RATIO = 0.25
+
+
+def _escape(key: str) -> str:
+    """Escape a member name as a JSON pointer token (RFC 6901)"""
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(source: Dict[str, Any], target: Dict[str, Any], path: str = "") -> List[Dict[str, Any]]:
+    """
+    Compute a JSON patch (RFC 6902) turning source into target
+
+    Nested objects are diffed member by member; any other changed value,
+    including lists, is replaced whole.
+
+    Args:
+        source: Original document
+        target: Desired document
+        path: JSON pointer of source within the enclosing document
+
+    Returns:
+        List of add/remove/replace operations
+    """
+    ops = []
+    for key, value in source.items():
+        pointer = f"{path}/{_escape(key)}"
+        if key not in target:
+            ops.append({"op": "remove", "path": pointer})
+        elif value != target[key] or type(value) is not type(target[key]):
+            if isinstance(value, dict) and isinstance(target[key], dict):
+                ops.extend(make_patch(value, target[key], pointer))
+            else:
+                ops.append({"op": "replace", "path": pointer, "value": target[key]})
+    for key, value in target.items():
+        if key not in source:
+            ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+    return ops
+
+
+def apply_patch(document: Dict[str, Any], patch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Apply add/remove/replace operations from make_patch to a copy of document
+
+    Args:
+        document: Document to patch (left untouched)
+        patch: Operations to apply
+
+    Returns:
+        Patched document
+    """
+    result = copy.deepcopy(document)
+    for op in patch:
+        tokens = [_unescape(token) for token in op["path"].split("/")[1:]]
+        parent = result
+        for token in tokens[:-1]:
+            parent = parent[token]
+        if op["op"] == "remove":
+            del parent[tokens[-1]]
+        elif op["op"] in ("add", "replace"):
+            parent[tokens[-1]] = copy.deepcopy(op["value"])
+        else:
+            raise ValueError(f"Unsupported patch operation: {op['op']}")
+    return result
+
+
+class SnapshotStore:
+    """
+    Write-once store of context snapshots named by the SHA-256 of their canonical encoding
+
+    Snapshots live in <base_dir>/<hash[:2]>/<hash>.json and are written with a
+    temp-file rename, so concurrent writers of the same snapshot are harmless.
+    Reads go through a small LRU cache because receipts share few bases.
+    """
+
+    def __init__(self, base_dir: Path, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.base_dir = Path(base_dir)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def path(self, digest: str) -> Path:
+        return self.base_dir / digest[:2] / f"{digest}.json"
+
+    def put(self, snapshot: Dict[str, Any], encoded: Optional[bytes] = None) -> str:
+        """
+        Store a snapshot unless an identical one is already stored
+
+        Args:
+            snapshot: Snapshot to store
+            encoded: Its canonical encoding, if already known
+
+        Returns:
+            Content hash of the snapshot
+        """
+        digest, encoded = self.stage(snapshot, encoded)
+        self.write(digest, encoded)
+        return digest
+
+    def stage(self, snapshot: Dict[str, Any], encoded: Optional[bytes] = None) -> Tuple[str, bytes]:
+        """
+        Hash a snapshot and cache it for reads, leaving the file to a later write()
+
+        Returns:
+            (content hash, canonical encoding)
+        """
+        if encoded is None:
+            encoded = canonical.dumps(snapshot)
+        digest = hashlib.sha256(encoded).hexdigest()
+        self._remember(digest, snapshot)
+        return digest, encoded
+
+    def write(self, digest: str, encoded: bytes) -> None:
+        """Durably write a staged snapshot unless an identical one is already stored"""
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{digest[:8]}.")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(encoded)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+
+    def get(self, digest: str) -> Dict[str, Any]:
+        """
+        Load a snapshot by content hash
+
+        Raises:
+            KeyError: If no snapshot with that hash is stored
+        """
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+        try:
+            data = self.path(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(f"Snapshot not found: {digest}") from None
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Snapshot {digest} does not match its content hash")
+        snapshot = json.loads(data)
+        self._remember(digest, snapshot)
+        return snapshot
+
+    def _remember(self, digest: str, snapshot: Dict[str, Any]) -> None:
+        self._cache[digest] = snapshot
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+class DeltaEncoder:
+    """
+    Encodes prior/current context pairs as patches against a shared base snapshot
+
+    The encoder keeps one base per process and only starts a new one when the
+    patch from the base to the prior state grows past rebase_ratio of the base's
+    encoded size, so a run of captures with stable agent status shares one base.
+    """
+
+    def __init__(self, snapshots: SnapshotStore, rebase_ratio: float = DEFAULT_REBASE_RATIO):
+        self.snapshots = snapshots
+        self.rebase_ratio = rebase_ratio
+        self._base: Optional[Tuple[str, Dict[str, Any], int]] = None
+
+    def encode(self, prior: Dict[str, Any], current: Dict[str, Any],
+               prior_encoded: Optional[bytes] = None,
+               staged: Optional[List[Tuple[str, bytes]]] = None) -> Dict[str, Any]:
+        """
+        Delta-encode a prior/current state pair
+
+        Args:
+            prior: State before the event
+            current: State after the event
+            prior_encoded: Canonical encoding of prior, if already known
+            staged: If given, a new base snapshot is only staged and its (digest, encoding)
+                appended here; the caller must write() it before storing the receipt
+
+        Returns:
+            Members replacing prior_state/current_state in a receipt's generation_context
+        """
+        prior_patch = None
+        if self._base is not None:
+            digest, base, base_size = self._base
+            prior_patch = make_patch(base, prior)
+            # Only sized, never hashed, so the fast encoder will do
+            if len(canonical.fast_dumps(prior_patch)) > base_size * self.rebase_ratio:
+                prior_patch = None
+
+        if prior_patch is None:
+            if prior_encoded is None:
+                prior_encoded = canonical.dumps(prior)
+            if staged is None:
+                digest = self.snapshots.put(prior, prior_encoded)
+            else:
+                digest, prior_encoded = self.snapshots.stage(prior, prior_encoded)
+                staged.append((digest, prior_encoded))
+            self._base = (digest, prior, len(prior_encoded))
+            prior_patch = []
+
+        return {
+            'snapshot_encoding': SNAPSHOT_ENCODING,
+            'snapshot': self._base[0],
+            'prior_patch': prior_patch,
+            'current_patch': make_patch(prior, current)
+        }
+
+
+def rehydrate_receipt(receipt: Dict[str, Any], snapshots: SnapshotStore) -> Dict[str, Any]:
+    """
+    Return a receipt with full prior_state/current_state, resolving delta encoding
+
+    Receipts that already carry full states are returned unchanged.
+
+    Args:
+        receipt: Receipt as stored
+        snapshots: Store holding the receipt's base snapshot
+
+    Returns:
+        Receipt with full states
+    """
+    generation = receipt.get('generation_context', {})
+    if generation.get('snapshot_encoding') != SNAPSHOT_ENCODING:
+        return receipt
+
+    prior = apply_patch(snapshots.get(generation['snapshot']), generation['prior_patch'])
+    current = apply_patch(prior, generation['current_patch'])
+
+    rehydrated = {}
+    for key, value in generation.items():
+        if key == 'snapshot':
+            rehydrated['prior_state'] = prior
+            rehydrated['current_state'] = current
+        elif key not in ('snapshot_encoding', 'prior_patch', 'current_patch'):
+            rehydrated[key] = value
+
+    result = dict(receipt)
+    result['generation_context'] = rehydrated
+    return result
@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""
+State Sync for Project Locus
+Delta replication of REF state, handover and coordination endpoints between machines
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from handover_store import (HandoverIndex, handover_lock, index_entry, iter_archive_members, read_archive_record,
+                            write_json_atomic)
+from lazy_imports import lazy_import
+
+# Only the manifest needs it, so `--help` skips it
+sqlite3 = lazy_import("sqlite3")
+
+
+DEFAULT_TOPOLOGY_PATH = Path(__file__).resolve().parents[2] / "config" / "machine_topology.json"
+DEFAULT_ENDPOINTS = {
+    "ref_state": "/tmp/locus_ref_state/",
+    "handover": "/tmp/locus_handover/",
+    "coordination": "/tmp/locus_coordination/",
+}
+# Sync bookkeeping lives here on both sides and is never shipped
+SYNC_DIR_NAME = ".locus_sync"
+# Acknowledge progress on the target after this many applied changes
+DEFAULT_CHECKPOINT_EVERY = 1000
+# Files modified this recently are rehashed even if size and mtime match the manifest
+RACY_WINDOW_NS = 2_000_000_000
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    seq INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_by_seq ON files (seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def load_endpoints(topology_path: Path = DEFAULT_TOPOLOGY_PATH, machine: str = "core_machine") -> Dict[str, str]:
+    """
+    Read a machine's sync endpoints from machine_topology.json
+
+    Args:
+        topology_path: Topology file
+        machine: Machine whose endpoints to use
+
+    Returns:
+        Endpoint name to directory, DEFAULT_ENDPOINTS if the file is missing
+    """
+    try:
+        with open(topology_path, 'r') as f:
+            topology = json.load(f)
+    except FileNotFoundError:
+        return dict(DEFAULT_ENDPOINTS)
+    return topology["machines"][machine]["sync_endpoints"]
+
+
+def _excluded(name: str) -> bool:
+    """Hidden entries (locks, notify sockets, temp files, sync state) and live SQLite files are not shipped"""
+    return name.startswith(".") or name.endswith((".db", ".db-wal", ".db-shm", ".db-journal"))
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Replace path via a temp file and rename; durability comes from the sync before each checkpoint"""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.sync")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SyncManifest:
+    """
+    Source-side manifest of an endpoint's files
+
+    Each scan compares the directory with the manifest by size and mtime,
+    rehashes only files that differ, and gives every new, changed or deleted
+    file the next sequence number. A target that has applied everything up to
+    seq N therefore only needs the rows with seq > N.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.db_path = self.root / SYNC_DIR_NAME / "manifest.db"
+        self._conn = None
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(MANIFEST_SCHEMA)
+            with self._conn:
+                self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('manifest_id', ?)",
+                                   (uuid.uuid4().hex,))
+                self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('seq', '0')")
+        return self._conn
+
+    @property
+    def manifest_id(self) -> str:
+        """Identifies this manifest, so targets restart from zero if it is ever recreated"""
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'manifest_id'").fetchone()[0]
+
+    @property
+    def seq(self) -> int:
+        return int(self.conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()[0])
+
+    def _walk(self, directory: Path, prefix: str = "") -> Iterator[Tuple[str, os.stat_result]]:
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if _excluded(entry.name):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._walk(Path(entry.path), f"{prefix}{entry.name}/")
+            elif entry.is_file(follow_symlinks=False):
+                try:
+                    yield f"{prefix}{entry.name}", entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+
+    def scan(self) -> Dict[str, int]:
+        """
+        Record changes made to the endpoint since the last scan
+
+        Returns:
+            Counts of files scanned, hashed, changed and removed
+        """
+        known = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT path, size, mtime_ns, sha256, deleted FROM files"
+        )}
+        seq = self.seq
+        racy_after = time.time_ns() - RACY_WINDOW_NS
+        changes = []
+        seen = set()
+        hashed = 0
+
+        for rel_path, stat in self._walk(self.root):
+            seen.add(rel_path)
+            previous = known.get(rel_path)
+            if previous is not None and not previous[3] and previous[0] == stat.st_size \
+                    and previous[1] == stat.st_mtime_ns and stat.st_mtime_ns < racy_after:
+                continue
+            try:
+                sha256 = _sha256_file(self.root / rel_path)
+            except FileNotFoundError:
+                continue
+            hashed += 1
+            if previous is not None and not previous[3] and previous[2] == sha256:
+                # Touched but unchanged: refresh the stat without shipping it again
+                changes.append((rel_path, stat.st_size, stat.st_mtime_ns, sha256, None))
+                continue
+            seq += 1
+            changes.append((rel_path, stat.st_size, stat.st_mtime_ns, sha256, seq))
+
+        deleted = [path for path, row in known.items() if not row[3] and path not in seen]
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                [(size, mtime_ns, path) for path, size, mtime_ns, _, change_seq in changes if change_seq is None]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, seq, deleted) VALUES (?, ?, ?, ?, ?, 0)",
+                [change for change in changes if change[4] is not None]
+            )
+            tombstones = []
+            for path in deleted:
+                seq += 1
+                tombstones.append((seq, path))
+            self.conn.executemany("UPDATE files SET deleted = 1, sha256 = NULL, seq = ? WHERE path = ?", tombstones)
+            self.conn.execute("UPDATE meta SET value = ? WHERE key = 'seq'", (str(seq),))
+
+        return {
+            "scanned": len(seen),
+            "hashed": hashed,
+            "changed": sum(1 for change in changes if change[4] is not None),
+            "removed": len(deleted),
+        }
+
+    def changes_since(self, seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Return up to limit manifest rows with a sequence number above seq, oldest first"""
+        rows = self.conn.execute(
+            "SELECT path, size, sha256, seq, deleted FROM files WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+        )
+        return [{"path": path, "size": size, "sha256": sha256, "seq": row_seq, "deleted": bool(deleted)}
+                for path, size, sha256, row_seq, deleted in rows]
+
+    def pending(self, seq: int) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM files WHERE seq > ?", (seq,)).fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class EndpointSync:
+    """
+    Ships one endpoint's changes from a source directory to a target directory
+
+    The target records, per source manifest, the highest sequence number it
+    has applied in <target>/.locus_sync/<manifest_id>.json. That checkpoint is
+    written every checkpoint_every changes, after flushing the applied files
+    to disk with one sync rather than an fsync per file. An interrupted sync
+    resumes from the last checkpoint; changes applied after it are simply
+    applied again, which is harmless because every write is an atomic
+    replace. Files whose content already matches on the target are not
+    rewritten.
+    """
+
+    def __init__(self, name: str, source: Path, target: Path, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        self.name = name
+        self.source = Path(source)
+        self.target = Path(target)
+        self.checkpoint_every = checkpoint_every
+        self.manifest = SyncManifest(self.source)
+
+    def _checkpoint_path(self) -> Path:
+        return self.target / SYNC_DIR_NAME / f"{self.manifest.manifest_id}.json"
+
+    def acked_seq(self) -> int:
+        """Highest source sequence number the target has applied"""
+        try:
+            with open(self._checkpoint_path(), 'r') as f:
+                return json.load(f)["seq"]
+        except FileNotFoundError:
+            return 0
+
+    def _checkpoint(self, seq: int) -> None:
+        write_json_atomic(self._checkpoint_path(), {
+            "endpoint": self.name,
+            "source": str(self.source),
+            "manifest_id": self.manifest.manifest_id,
+            "seq": seq,
+            "updated_at": time.time()
+        })
+
+    def sync(self, max_changes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Scan the source and apply its unacknowledged changes to the target
+
+        Args:
+            max_changes: Stop after this many changes (the rest ship on the next sync)
+
+        Returns:
+            Sync statistics
+        """
+        start = time.perf_counter()
+        self.source.mkdir(parents=True, exist_ok=True)
+        (self.target / SYNC_DIR_NAME).mkdir(parents=True, exist_ok=True)
+        scan = self.manifest.scan()
+
+        seq = acked = self.acked_seq()
+        stats = {"shipped": 0, "deleted": 0, "unchanged": 0, "skipped": 0, "bytes": 0}
+        while max_changes is None or stats["shipped"] + stats["deleted"] + stats["unchanged"] < max_changes:
+            limit = self.checkpoint_every
+            if max_changes is not None:
+                limit = min(limit, max_changes - stats["shipped"] - stats["deleted"] - stats["unchanged"])
+            changes = self.manifest.changes_since(seq, limit)
+            if not changes:
+                break
+            for change in changes:
+                stats[self._apply(change)] += 1
+                if not change["deleted"]:
+                    stats["bytes"] += change["size"]
+                seq = change["seq"]
+            os.sync()
+            self._checkpoint(seq)
+
+        stats.update(scan)
+        stats.update({
+            "endpoint": self.name,
+            "from_seq": acked,
+            "to_seq": seq,
+            "remaining": self.manifest.pending(seq),
+            "seconds": time.perf_counter() - start
+        })
+        return stats
+
+    def _apply(self, change: Dict[str, Any]) -> str:
+        """Apply one manifest change to the target, returning the stats counter it falls under"""
+        target_path = self.target / change["path"]
+        if change["deleted"]:
+            try:
+                target_path.unlink()
+            except FileNotFoundError:
+                return "unchanged"
+            return "deleted"
+
+        try:
+            data = (self.source / change["path"]).read_bytes()
+        except FileNotFoundError:
+            # Deleted since the scan; the tombstone ships next time
+            return "skipped"
+        if hashlib.sha256(data).hexdigest() != change["sha256"]:
+            # Modified since the scan; the new content gets a new seq next time
+            return "skipped"
+        try:
+            if target_path.stat().st_size == len(data) and _sha256_file(target_path) == change["sha256"]:
+                return "unchanged"
+        except FileNotFoundError:
+            pass
+        if not self._accept(change["path"], data, target_path):
+            return "skipped"
+
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_file(target_path, data)
+        self._applied(change["path"], data)
+        return "shipped"
+
+    def _accept(self, rel_path: str, data: bytes, target_path: Path) -> bool:
+        """Whether incoming content may replace the target's copy"""
+        return True
+
+    def _applied(self, rel_path: str, data: bytes) -> None:
+        """Hook run after a file was written to the target"""
+
+    def close(self) -> None:
+        self.manifest.close()
+
+
+class HandoverEndpointSync(EndpointSync):
+    """
+    Handover endpoint: never rolls back a newer handover and keeps the target's index current
+
+    Handover files carry a version that every status change bumps, so an
+    incoming header older than the target's copy (e.g. a stale pending record
+    arriving after the target completed it) is skipped. Applied headers are
+    entered into the target's handover index, which is not shipped itself,
+    and archive segments get their REF tag lookups rebuilt. Segments are
+    written before the archived headers are deleted, so they also ship first.
+
+    Archiving is the only thing that deletes handover files, so the same
+    guard covers it: an archived record older than the target's copy (e.g.
+    a pending handover the source expired after the target claimed it) gets
+    no archive lookup, and its header and payload deletions are skipped.
+
+    Segments are named after the endpoint that wrote them and only ever
+    grow, so an incoming segment replaces the target's copy only if it
+    extends it; anything else would repoint the target's own lookups at
+    another endpoint's records.
+    """
+
+    def __init__(self, name: str, source: Path, target: Path, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        super().__init__(name, source, target, checkpoint_every)
+        self._index = None
+
+    @staticmethod
+    def _is_header(rel_path: str) -> bool:
+        return "/" not in rel_path and rel_path.startswith("handover_") and rel_path.endswith(".json")
+
+    @staticmethod
+    def _is_segment(rel_path: str) -> bool:
+        return rel_path.startswith("archive/") and rel_path.endswith(".jsonl.gz")
+
+    @staticmethod
+    def _ref_tag(rel_path: str) -> Optional[str]:
+        """REF tag of a handover header or payload file"""
+        if "/" in rel_path or not rel_path.startswith("handover_"):
+            return None
+        return rel_path[len("handover_"):].split(".", 1)[0]
+
+    def _target_entry(self, ref_tag: str) -> Optional[Dict[str, Any]]:
+        """Index entry for the target's hot copy of a handover, or None if it has none"""
+        # A claim bumps the index before the file, so take whichever is newer
+        indexed = self.index.get(ref_tag)
+        try:
+            with open(self.target / f"handover_{ref_tag}.json", 'r') as f:
+                entry = index_entry(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return indexed
+        return indexed if indexed and indexed["version"] > entry["version"] else entry
+
+    @property
+    def index(self) -> HandoverIndex:
+        if self._index is None:
+            self._index = HandoverIndex(self.target / "handover_index.db")
+        return self._index
+
+    def _apply(self, change: Dict[str, Any]) -> str:
+        ref_tag = self._ref_tag(change["path"])
+        if ref_tag is None:
+            return super()._apply(change)
+        # Serialise with agents updating the same handover on the target
+        with handover_lock(self.target / ".locks", ref_tag):
+            if change["deleted"] and (self.target / change["path"]).exists() and not self._archived_here(ref_tag):
+                return "skipped"
+            return super()._apply(change)
+
+    def _archived_here(self, ref_tag: str) -> bool:
+        """
+        Whether the target archived a handover the source deleted, so its files may go
+
+        If the target's copy became newer after its archive lookup was
+        written, the lookup is dropped again and the hot entry restored.
+        """
+        location = self.index.archived_location(ref_tag)
+        if location is None:
+            return False
+        entry = self._target_entry(ref_tag)
+        if entry is None:
+            return True
+        archived = read_archive_record(self.target / "archive" / location["segment"], location["member_offset"],
+                                       location["line"])
+        if not self._diverged(entry, archived):
+            return True
+        self.index.unarchive(entry)
+        return False
+
+    @staticmethod
+    def _diverged(entry: Dict[str, Any], archived: Dict[str, Any]) -> bool:
+        """
+        Whether the target's copy must survive the source archiving its own
+
+        Besides a higher version, an equal version with another status means
+        both sides changed the same handover (e.g. the target claimed it while
+        the source expired it); the target keeps its work.
+        """
+        version = archived.get("version", 1)
+        return entry["version"] > version or (entry["version"] == version and entry["status"] != archived["status"])
+
+    def _newer_than_archived(self, record: Dict[str, Any], segment: str) -> bool:
+        """Whether an incoming archived record should replace the lookup the target already has for it"""
+        location = self.index.archived_location(record["ref_tag"])
+        if location is None or location["segment"] == segment:
+            return True
+        try:
+            archived = read_archive_record(self.target / "archive" / location["segment"], location["member_offset"],
+                                           location["line"])
+        except (OSError, ValueError, IndexError):
+            return True
+        return record.get("version", 1) > archived.get("version", 1)
+
+    def _accept(self, rel_path: str, data: bytes, target_path: Path) -> bool:
+        if self._is_segment(rel_path):
+            try:
+                return data.startswith(target_path.read_bytes())
+            except FileNotFoundError:
+                return True
+        if not self._is_header(rel_path):
+            return True
+        try:
+            with open(target_path, 'r') as f:
+                existing = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return True
+        return json.loads(data).get("version", 1) >= existing.get("version", 1)
+
+    def _applied(self, rel_path: str, data: bytes) -> None:
+        if self._is_header(rel_path):
+            entry = index_entry(json.loads(data))
+            if not self.index.insert(entry):
+                self.index.update_if_newer(entry)
+        elif self._is_segment(rel_path):
+            segment = rel_path[len("archive/"):]
+            locations = []
+            for offset, records in iter_archive_members(self.target / rel_path):
+                for line, record in enumerate(records):
+                    entry = self._target_entry(record["ref_tag"])
+                    if entry is not None and self._diverged(entry, record):
+                        # The target moved on since the source archived its copy
+                        continue
+                    if not self._newer_than_archived(record, segment):
+                        # The target archived this handover itself, at least as recently
+                        continue
+                    locations.append({"ref_tag": record["ref_tag"], "segment": segment, "member_offset": offset,
+                                      "line": line, "status": record["status"], "to_agent": record.get("to_agent")})
+            self.index.archive(locations, datetime.datetime.now().isoformat())
+
+    def close(self) -> None:
+        super().close()
+        if self._index is not None:
+            self._index.close()
+
+
+ENDPOINT_CLASSES = {"handover": HandoverEndpointSync}
+
+
+def sync_endpoints(endpoints: Dict[str, str], target_root: Optional[Path] = None,
+                   targets: Optional[Dict[str, str]] = None, max_changes: Optional[int] = None,
+                   checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY) -> List[Dict[str, Any]]:
+    """
+    Sync every endpoint from its source directory to its target
+
+    Args:
+        endpoints: Endpoint name to source directory
+        target_root: Directory standing in for the peer machine; each endpoint
+            lands at target_root + its source path (e.g. <root>/tmp/locus_handover)
+        targets: Endpoint name to explicit target directory, overriding target_root
+        max_changes: Per-endpoint change limit
+        checkpoint_every: Changes between target checkpoints
+
+    Returns:
+        Per-endpoint statistics
+    """
+    results = []
+    for name, source in endpoints.items():
+        if targets and name in targets:
+            target = Path(targets[name])
+        elif target_root is not None:
+            target = Path(target_root) / Path(source).relative_to(Path(source).anchor)
+        else:
+            raise ValueError(f"No target for endpoint {name}")
+        endpoint_sync = ENDPOINT_CLASSES.get(name, EndpointSync)(name, Path(source), target, checkpoint_every)
+        try:
+            results.append(endpoint_sync.sync(max_changes))
+        finally:
+            endpoint_sync.close()
+    return results
+
+
+def main():
+    """CLI for syncing endpoints to a peer directory"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Locus State Sync')
+    parser.add_argument('--topology', default=str(DEFAULT_TOPOLOGY_PATH), help='machine_topology.json path')
+    parser.add_argument('--machine', default='core_machine', help='Machine whose endpoints are the source')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = sub.add_parser('sync', help='Ship changed files to the peer directory')
+    sync_parser.add_argument('target_root', help='Directory standing in for the peer machine')
+    sync_parser.add_argument('--endpoint', action='append', help='Only sync these endpoints')
+    sync_parser.add_argument('--max-changes', type=int, help='Stop each endpoint after this many changes')
+    status_parser = sub.add_parser('status', help='Show unsynced changes per endpoint')
+    status_parser.add_argument('target_root')
+
+    args = parser.parse_args()
+    endpoints = load_endpoints(Path(args.topology), args.machine)
+
+    if args.command == 'sync':
+        if args.endpoint:
+            endpoints = {name: path for name, path in endpoints.items() if name in args.endpoint}
+        for result in sync_endpoints(endpoints, Path(args.target_root), max_changes=args.max_changes):
+            print(f"✓ {result['endpoint']}: {result['shipped']} shipped, {result['deleted']} deleted, "
+                  f"{result['skipped']} skipped (seq {result['from_seq']} → {result['to_seq']}, "
+                  f"{result['remaining']} remaining, {result['seconds'] * 1000:.0f} ms)")
+
+    elif args.command == 'status':
+        for name, source in endpoints.items():
+            target = Path(args.target_root) / Path(source).relative_to(Path(source).anchor)
+            endpoint_sync = EndpointSync(name, Path(source), target)
+            try:
+                endpoint_sync.manifest.scan()
+                acked = endpoint_sync.acked_seq()
+                print(f"  {name}: seq {endpoint_sync.manifest.seq}, target at {acked}, "
+                      f"{endpoint_sync.manifest.pending(acked)} pending")
+            finally:
+                endpoint_sync.close()
+
+
+if __name__ == '__main__':
+    main()
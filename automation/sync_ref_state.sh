@@ -0,0 +1,45 @@
+#!/bin/bash
+# REF State Sync for Project Locus Fork A
+# Prepares sync endpoints and ships changed REF, handover and coordination state to the peer machine
+# Usage: ./sync_ref_state.sh --init-core | --init-experimental | --sync [peer_root] | --status [peer_root]
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+STATE_SYNC="$SCRIPT_DIR/scripts/state_sync.py"
+# Directory standing in for the peer machine until a network transport is configured
+PEER_ROOT="${LOCUS_SYNC_PEER_ROOT:-/tmp/locus_sync_peer}"
+
+# Create the endpoint directories listed for a machine in machine_topology.json
+init_endpoints() {
+    local machine="$1"
+    python3 -c "
+import sys
+sys.path.insert(0, '$SCRIPT_DIR/scripts')
+from state_sync import load_endpoints
+print('\n'.join(load_endpoints(machine='$machine').values()))
+" | while read -r endpoint; do
+        mkdir -p "$endpoint"
+        echo "  - $endpoint"
+    done
+    echo "✓ Sync endpoints ready for $machine"
+}
+
+case "${1:-}" in
+    "--init-core")
+        init_endpoints "core_machine"
+        ;;
+    "--init-experimental")
+        init_endpoints "experimental_machine"
+        ;;
+    "--sync")
+        python3 "$STATE_SYNC" sync "${2:-$PEER_ROOT}"
+        ;;
+    "--status")
+        python3 "$STATE_SYNC" status "${2:-$PEER_ROOT}"
+        ;;
+    *)
+        echo "Usage: $0 --init-core | --init-experimental | --sync [peer_root] | --status [peer_root]"
+        exit 1
+        ;;
+esac
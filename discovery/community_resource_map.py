@@ -5,20 +5,20 @@ Maps template needs to existing community tools and services
 """
 
 import json
+import sys
 import datetime
-import subprocess
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+
 class CommunityResourceMap:
     def __init__(self):
         self.resource_database = self._load_resource_database()
         
     def generate_ref_tag(self, resource_type="resource"):
         """Generate REF tag for resource mapping"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"resource-{resource_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        return generate_ref_tag("job", f"resource-{resource_type}")
     
     def _load_resource_database(self):
         """Load community resource database"""
@@ -5,11 +5,14 @@ Matches user needs to appropriate community templates
 """
 
 import json
+import sys
 import os
 import datetime
-import subprocess
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+
 class TemplateMatcher:
     def __init__(self, templates_dir="/home/runner/work/locus-proxmox-infra/locus-proxmox-infra/templates"):
         self.templates_dir = Path(templates_dir)
@@ -17,10 +20,7 @@ class TemplateMatcher:
         
     def generate_ref_tag(self, match_type="match"):
         """Generate REF tag for template matching"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"template-{match_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        return generate_ref_tag("job", f"template-{match_type}")
     
     def _load_templates(self):
         """Load all available templates"""
@@ -5,11 +5,13 @@ Coordinates between existing community tools and templates
 """
 
 import json
+import sys
 import datetime
-import subprocess
-import requests
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+
 class ToolCoordinator:
     def __init__(self):
         self.coordination_log = []
@@ -17,10 +19,7 @@ class ToolCoordinator:
         
     def generate_ref_tag(self, coord_type="coordination"):
         """Generate REF tag for tool coordination"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"tool-{coord_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        return generate_ref_tag("job", f"tool-{coord_type}")
     
     def coordinate_template_deployment(self, template_name, user_config, resource_mapping):
         """Coordinate deployment of a template with existing tools"""
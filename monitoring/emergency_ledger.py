@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Emergency Approval Ledger for Project Locus Fork B
+Append-only record of emergency actions and their human approvals, indexed for expert-authority checks
+"""
+
+import datetime
+import fcntl
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+EMERGENCY_PATTERN = "locus_emergency_*.json"
+# Hidden, so it never matches a decision log or emergency pattern itself
+LEDGER_NAME = ".locus_emergency_ledger.jsonl"
+DEFAULT_APPROVAL_TIMEOUT = 300.0
+# Compact once the log holds this many lines per emergency it indexes
+COMPACT_RATIO = 4
+
+# Entry states, in the order an emergency moves through them
+PENDING = "pending"
+ESCALATED = "escalated"
+APPROVED = "approved"
+REMOVED = "removed"
+RETIRED = (APPROVED, REMOVED)
+
+
+class Transition(NamedTuple):
+    name: str
+    ref_tag: Optional[str]
+    state: str
+    # State before this transition, None for an emergency the ledger had not seen
+    previous: Optional[str]
+    since: float
+
+
+class PendingEntry(NamedTuple):
+    ref_tag: Optional[str]
+    since: float
+    identity: Tuple[int, int, int]
+    escalated: bool
+
+
+def read_emergency(path: Path) -> Optional[dict]:
+    """Parse an emergency record, or None if it is missing or not valid JSON"""
+    try:
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+class EmergencyLedger:
+    """
+    Tracks which emergency actions still await human approval
+
+    Every state change, from first sighting through escalation to approval
+    or removal, is appended to a JSON-lines log in the log directory. The
+    in-memory index is rebuilt from that log and follows lines appended by
+    other processes, so each emergency is reported once, however many
+    trackers read it.
+
+    New records arrive through observe(), fed by a directory watcher, and
+    reconcile() lists the log directory to catch any the watcher missed, so
+    it costs O(directory entries) and belongs on a slow periodic timer. A
+    check() between reconciliations costs O(pending): it stats each pending
+    record and re-reads only the ones that changed, so an approval written
+    with human_approval_received retires its entry and an overdue one is
+    escalated. Retired records are never opened again.
+    """
+
+    def __init__(self, log_dir: Path, approval_timeout: float = DEFAULT_APPROVAL_TIMEOUT,
+                 pattern: str = EMERGENCY_PATTERN):
+        self.log_dir = Path(log_dir)
+        self.approval_timeout = approval_timeout
+        self._match = re.compile(fnmatch.translate(pattern)).match
+        self.ledger_path = self.log_dir / LEDGER_NAME
+        self.pending: Dict[str, PendingEntry] = {}
+        self.retired: Dict[str, str] = {}
+        self._lines = 0
+        self._offset = 0
+        self._ledger_inode = None
+
+    def _apply(self, record: dict) -> None:
+        name = record["name"]
+        state = record["state"]
+        if state in RETIRED:
+            self.pending.pop(name, None)
+            self.retired[name] = state
+            return
+        self.retired.pop(name, None)
+        previous = self.pending.get(name)
+        self.pending[name] = PendingEntry(
+            record.get("ref_tag"),
+            previous.since if previous else record["since"],
+            tuple(record["identity"]),
+            state == ESCALATED
+        )
+
+    def _replay(self, f) -> None:
+        """Apply ledger lines appended since the last replay, starting over if the ledger was compacted"""
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != self._ledger_inode or stat.st_size < self._offset:
+            self.pending.clear()
+            self.retired.clear()
+            self._lines = self._offset = 0
+            self._ledger_inode = stat.st_ino
+        f.seek(self._offset)
+        data = f.read()
+        # A torn final line from a crashed writer is left for the next replay
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line:
+                self._apply(json.loads(line))
+                self._lines += 1
+        self._offset += end
+
+    def _append(self, f, records: List[dict]) -> None:
+        if not records:
+            return
+        f.seek(0, os.SEEK_END)
+        f.write(b"".join(json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records))
+        f.flush()
+        os.fsync(f.fileno())
+        for record in records:
+            self._apply(record)
+        self._lines += len(records)
+        self._offset = f.tell()
+
+    def _open(self):
+        fd = os.open(self.ledger_path, os.O_RDWR | os.O_CREAT, 0o644)
+        f = os.fdopen(fd, "r+b")
+        fcntl.flock(f, fcntl.LOCK_EX)
+        # Compaction replaces the file; if it happened while waiting for the lock, take the new one
+        if os.fstat(f.fileno()).st_ino != os.stat(self.ledger_path).st_ino:
+            f.close()
+            return self._open()
+        return f
+
+    def _evaluate(self, name: str, now: float) -> Optional[dict]:
+        """Ledger record for a change in one emergency record's state, or None if nothing changed"""
+        path = self.log_dir / name
+        entry = self.pending.get(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return {"name": name, "state": REMOVED, "at": now} if entry else None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        overdue = entry is not None and (entry.escalated or now - entry.since >= self.approval_timeout)
+        if entry is not None and entry.identity == identity:
+            if overdue and not entry.escalated:
+                return {"name": name, "state": ESCALATED, "ref_tag": entry.ref_tag, "since": entry.since,
+                        "identity": identity, "at": now}
+            return None
+
+        data = read_emergency(path)
+        if data is None:
+            # Half-written: retried on the next check if already pending, else by the next reconcile
+            return None
+        if data.get("human_approval_received"):
+            return {"name": name, "state": APPROVED, "ref_tag": data.get("ref_tag"), "at": now}
+        return {"name": name, "state": ESCALATED if overdue else PENDING,
+                "ref_tag": data.get("ref_tag"), "since": entry.since if entry else now,
+                "identity": identity, "at": now}
+
+    def state(self, name: str) -> Optional[str]:
+        entry = self.pending.get(name)
+        if entry is not None:
+            return ESCALATED if entry.escalated else PENDING
+        return self.retired.get(name)
+
+    def _commit(self, f, records: List[dict]) -> List[Transition]:
+        previous = [self.state(record["name"]) for record in records]
+        self._append(f, records)
+        transitions = [
+            Transition(record["name"], record.get("ref_tag"), record["state"], state,
+                       record.get("since", record["at"]))
+            for record, state in zip(records, previous)
+        ]
+        if self._lines > COMPACT_RATIO * max(1, len(self.pending) + len(self.retired)):
+            self._compact(f)
+        return transitions
+
+    def check(self, now: Optional[float] = None) -> List[Transition]:
+        """
+        Re-examine the pending emergencies, without looking for new records
+
+        Returns:
+            Transitions recorded by this call: pending emergencies past
+            approval_timeout, approvals and removals. Entries another process
+            already recorded are not returned again.
+        """
+        return self._check(now, rescan=False)
+
+    def reconcile(self, now: Optional[float] = None) -> List[Transition]:
+        """
+        Bring the index up to date with the whole log directory
+
+        Returns:
+            Transitions recorded by this call, as for check(), plus new pending
+            emergencies no watcher reported through observe().
+        """
+        return self._check(now, rescan=True)
+
+    def _check(self, now: Optional[float], rescan: bool) -> List[Transition]:
+        now = time.time() if now is None else now
+        with self._open() as f:
+            self._replay(f)
+            names = list(self.pending)
+            if rescan:
+                with os.scandir(self.log_dir) as entries:
+                    names.extend(entry.name for entry in entries if self._match(entry.name)
+                                 and entry.name not in self.pending and self.retired.get(entry.name) != APPROVED)
+
+            records = [record for record in (self._evaluate(name, now) for name in names) if record]
+            return self._commit(f, records)
+
+    def next_escalation(self) -> Optional[float]:
+        """Time at which the oldest pending emergency passes approval_timeout, or None if none is pending"""
+        since = min((entry.since for entry in self.pending.values() if not entry.escalated), default=None)
+        return None if since is None else since + self.approval_timeout
+
+    def observe(self, names: Iterable[str], now: Optional[float] = None) -> List[Transition]:
+        """Record specific emergency files reported by a watcher, e.g. a new record or a newly written approval"""
+        now = time.time() if now is None else now
+        with self._open() as f:
+            self._replay(f)
+            records = []
+            for name in dict.fromkeys(names):
+                if not self._match(name) or self.retired.get(name) == APPROVED:
+                    continue
+                record = self._evaluate(name, now)
+                if record:
+                    records.append(record)
+            return self._commit(f, records)
+
+    def _compact(self, f) -> None:
+        """Rewrite the ledger as one line per emergency, replacing it atomically"""
+        temp_path = self.ledger_path.with_name(f"{LEDGER_NAME}.tmp.{os.getpid()}")
+        now = time.time()
+        records = [{"name": name, "state": state, "at": now} for name, state in self.retired.items()]
+        records.extend({"name": name, "state": ESCALATED if entry.escalated else PENDING,
+                        "ref_tag": entry.ref_tag, "since": entry.since, "identity": entry.identity, "at": now}
+                       for name, entry in self.pending.items())
+        with open(temp_path, "wb") as temp:
+            temp.write(b"".join(json.dumps(record, separators=(",", ":")).encode() + b"\n" for record in records))
+            temp.flush()
+            os.fsync(temp.fileno())
+        os.rename(temp_path, self.ledger_path)
+        self._ledger_inode = os.stat(self.ledger_path).st_ino
+        self._lines = len(records)
+        self._offset = os.path.getsize(self.ledger_path)
+
+    def counts(self) -> Dict[str, int]:
+        retired = list(self.retired.values())
+        return {
+            PENDING: sum(1 for entry in self.pending.values() if not entry.escalated),
+            ESCALATED: sum(1 for entry in self.pending.values() if entry.escalated),
+            APPROVED: retired.count(APPROVED),
+            REMOVED: retired.count(REMOVED)
+        }
+
+
+def main():
+    """Bring the ledger up to date and list emergencies awaiting approval"""
+    log_dir = Path(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("LOCUS_LOG_DIR", "/tmp"))
+    ledger = EmergencyLedger(log_dir)
+    ledger.reconcile()
+    counts = ledger.counts()
+    print(f"✓ Emergency ledger {ledger.ledger_path}: " + ", ".join(f"{count} {state}" for state, count in counts.items()))
+    for name, entry in sorted(ledger.pending.items(), key=lambda item: item[1].since):
+        since = datetime.datetime.fromtimestamp(entry.since).isoformat(timespec="seconds")
+        print(f"  - {entry.ref_tag or name} awaiting approval since {since}" + (" (escalated)" if entry.escalated else ""))
+
+
+if __name__ == "__main__":
+    main()
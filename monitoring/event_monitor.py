@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Event-Driven Principle Monitor for Project Locus Fork B
+Reacts to new decision logs, emergency records and resource threshold crossings instead of polling
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import selectors
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o0004000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+# The tracker's own records match locus_*_*.json too; reacting to them would loop forever
+OWN_RECORD_PATTERNS = ("locus_principle_check_*", "locus_enforcement_*")
+EMERGENCY_PATTERN = "locus_emergency_*.json"
+DECISION_LOG_PATTERN = "locus_*_*.json"
+# Full reconciliation check while idle, catching anything events missed
+DEFAULT_RECONCILE_INTERVAL = 300.0
+# Floor on the wait for an approval timeout, so a record that cannot be read yet is not polled in a tight loop
+MIN_ESCALATION_WAIT = 1.0
+
+
+class InotifyWatcher:
+    """
+    Minimal inotify binding over ctypes
+
+    Only files that were closed after writing or renamed into the directory
+    are reported, so a record is never read half-written.
+    """
+
+    def __init__(self, directory: Path, mask: int = IN_CLOSE_WRITE | IN_MOVED_TO):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read_events(self) -> Tuple[List[str], bool]:
+        """
+        Drain pending events
+
+        Returns:
+            (names of files written or moved in, whether the kernel queue overflowed)
+        """
+        names = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names, overflow
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif length:
+                    names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PrincipleEventMonitor:
+    """
+    Runs principle checks when something happens rather than every check_interval
+
+    - A new or rewritten locus_emergency_*.json goes to the approvals ledger
+      at once, so an emergency is reported on arrival and retired as soon as
+      its human approval is written. The monitor also wakes when the oldest
+      pending emergency reaches the approval timeout, and then re-examines
+      only the pending ones.
+    - Any other new locus_*_*.json decision log is checked for a REF tag.
+    - The resource sampler wakes the monitor only when a sample crosses the
+      warning threshold, and the monitor reports violations only when the set
+      of violated resources changes.
+
+    Between events the monitor blocks in select(), so idle cost is the
+    sampler's own work. A full check_all_principles() still runs every
+    reconcile_interval, and after an inotify queue overflow.
+    """
+
+    def __init__(self, tracker, reconcile_interval: float = DEFAULT_RECONCILE_INTERVAL,
+                 on_check: Optional[Callable[[Dict], None]] = None):
+        self.tracker = tracker
+        self.reconcile_interval = reconcile_interval
+        self.on_check = on_check or tracker.report_check
+        self._watcher = InotifyWatcher(tracker.log_dir)
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._resource_pending = threading.Event()
+        self._resource_state: Set[Tuple[str, str]] = set()
+        self._stopped = threading.Event()
+
+        principle = tracker.constitution["principles"]["resource_constraint_enforcement"]
+        self._memory_warning = float(principle["core_machine_memory_limit"].replace("GB", "")) * 1024**3 \
+            * principle["threshold_warning"]
+        self._cpu_warning = principle["core_machine_cpu_limit"] * principle["threshold_warning"]
+
+    def _on_sample(self, sample) -> None:
+        """Sampler listener: wake the monitor on threshold crossings, in either direction"""
+        scoped = sample.scope != "host"
+        memory = sample.locus_memory if scoped else sample.memory_used
+        cpu = sample.locus_cpu_cores if scoped else sample.cpu_cores_used
+        over = memory > self._memory_warning or cpu > self._cpu_warning
+        if over or self._resource_state:
+            self._resource_pending.set()
+            self._wake()
+
+    def handle_files(self, names: List[str]) -> List[Dict]:
+        """Check newly written records, returning their violations"""
+        violations = []
+        emergencies = []
+        decision_logs = []
+        for name in names:
+            if any(fnmatch.fnmatch(name, pattern) for pattern in OWN_RECORD_PATTERNS):
+                continue
+            if fnmatch.fnmatch(name, EMERGENCY_PATTERN):
+                emergencies.append(name)
+            elif fnmatch.fnmatch(name, DECISION_LOG_PATTERN):
+                decision_logs.append(name)
+        if emergencies:
+            violations.extend(self.tracker.check_emergency_files(emergencies))
+        if decision_logs:
+            # Through the scanner, so the next reconciliation does not validate them again
+            violations.extend(self.tracker.check_transparency_files(decision_logs))
+        return violations
+
+    def handle_resources(self) -> List[Dict]:
+        """Re-evaluate resource constraints, returning violations that are new since the last evaluation"""
+        violations = self.tracker.check_resource_constraints()
+        state = {(violation["resource"], violation["severity"]) for violation in violations}
+        new = [violation for violation in violations
+               if (violation["resource"], violation["severity"]) not in self._resource_state]
+        self._resource_state = state
+        return new
+
+    def run(self) -> None:
+        """Monitor until stop() or KeyboardInterrupt"""
+        sampler = self.tracker.resource_sampler
+        sampler.listeners.append(self._on_sample)
+        selector = selectors.DefaultSelector()
+        selector.register(self._watcher, selectors.EVENT_READ, "files")
+        selector.register(self._wake_read, selectors.EVENT_READ, "wake")
+
+        self.on_check(self.tracker.check_all_principles())
+        last_reconcile = time.monotonic()
+        try:
+            while not self._stopped.is_set():
+                remaining = self.reconcile_interval - (time.monotonic() - last_reconcile)
+                escalation = self.tracker.emergency_ledger.next_escalation()
+                if escalation is not None:
+                    remaining = min(remaining, max(escalation - time.time(), MIN_ESCALATION_WAIT))
+                ready = selector.select(max(0.0, remaining))
+                if self._stopped.is_set():
+                    break
+
+                violations = []
+                reconcile = time.monotonic() - last_reconcile >= self.reconcile_interval
+                for key, _ in ready:
+                    if key.data == "files":
+                        names, overflow = self._watcher.read_events()
+                        reconcile = reconcile or overflow
+                        violations.extend(self.handle_files(names))
+                    else:
+                        try:
+                            while os.read(self._wake_read, 4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                if self._resource_pending.is_set():
+                    self._resource_pending.clear()
+                    violations.extend(self.handle_resources())
+                escalation = self.tracker.emergency_ledger.next_escalation()
+                if not reconcile and escalation is not None and escalation <= time.time():
+                    violations.extend(self.tracker.check_pending_emergencies())
+
+                if reconcile:
+                    self.on_check(self.tracker.check_all_principles())
+                    last_reconcile = time.monotonic()
+                elif violations:
+                    self.on_check(self.tracker.record_check(violations, "constitutional_event"))
+        except KeyboardInterrupt:
+            print("\n🛑 Monitoring stopped by user")
+        finally:
+            sampler.listeners.remove(self._on_sample)
+            selector.close()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_write, b"\0")
+        except BlockingIOError:
+            # Pipe already full of unread wake-ups
+            pass
+
+    def stop(self) -> None:
+        """Stop run() from another thread"""
+        self._stopped.set()
+        self._wake()
+
+    def close(self) -> None:
+        self._watcher.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
@@ -5,14 +5,21 @@ Real-time monitoring and enforcement of constitutional principles
 """
 
 import json
+import sys
 import time
 import datetime
-import subprocess
-import psutil
-from pathlib import Path
 import os
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+from process_accounting import LocusAccounting
+from resource_sampler import DEFAULT_SAMPLE_INTERVAL, ResourceSampler
+from emergency_ledger import APPROVED, ESCALATED, PENDING, REMOVED, EmergencyLedger
+from transparency_scanner import DEFAULT_WORKERS, TransparencyScanner, validate_decision_log
 
-    def __init__(self, config_file=None):
+class PrincipleTracker:
+    def __init__(self, config_file=None, sampler=None, log_dir=None):
         if config_file is not None:
             self.config_file = config_file
         else:
@@ -21,6 +28,8 @@ import os
                 "LOCUS_CONSTITUTION_CONFIG",
                 str(Path(__file__).parent.parent / "config" / "constitutional_principles.json")
             )
+        # Decision logs, emergency records and the tracker's own records live here
+        self.log_dir = Path(log_dir or os.environ.get("LOCUS_LOG_DIR", "/tmp"))
         self.monitoring_active = False
         self.violations = []
         self.last_check = None
@@ -29,25 +38,71 @@ import os
         with open(self.config_file, 'r') as f:
             self.constitution = json.load(f)
             
-        self.check_interval = self.constitution["monitoring_config"]["check_interval"]
+        monitoring_config = self.constitution["monitoring_config"]
+        self.check_interval = monitoring_config["check_interval"]
+        
+        # Resource checks read windowed statistics from a background sampler instead of blocking on psutil
+        self.sample_interval = monitoring_config.get("sample_interval", DEFAULT_SAMPLE_INTERVAL)
+        self.resource_window = monitoring_config.get("resource_window", self.check_interval)
+        self.resource_percentile = monitoring_config.get("resource_percentile", 95)
+        self.sampler = sampler
+        
+        # Decision logs are validated once each; the scanner's cursor remembers them between checks
+        self.scan_workers = monitoring_config.get("scan_workers", DEFAULT_WORKERS)
+        self.scanner = None
+        
+        # Emergencies are indexed by an approvals ledger; each is reported once, again if approval times out
+        self.approval_timeout = monitoring_config.get("human_approval_timeout", 300)
+        self.ledger = None
+    
+    @property
+    def resource_sampler(self):
+        """Background resource sampler, started on first use"""
+        if self.sampler is None:
+            buffer_seconds = max(self.resource_window * 2, self.sample_interval)
+            self.sampler = ResourceSampler(self.sample_interval, buffer_seconds, accounting=LocusAccounting())
+        if not self.sampler.running:
+            self.sampler.start()
+        return self.sampler
+    
+    @property
+    def transparency_scanner(self):
+        """Incremental decision log scanner over log_dir"""
+        if self.scanner is None:
+            self.scanner = TransparencyScanner(self.log_dir, workers=self.scan_workers)
+        return self.scanner
+    
+    @property
+    def emergency_ledger(self):
+        """Approvals ledger over the emergency records in log_dir"""
+        if self.ledger is None:
+            self.ledger = EmergencyLedger(self.log_dir, self.approval_timeout)
+        return self.ledger
     
     def generate_ref_tag(self, principle_type="principle"):
         """Generate REF tag for principle monitoring"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"principle-{principle_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        return generate_ref_tag("job", f"principle-{principle_type}")
     
     def check_resource_constraints(self):
         """Check resource constraint enforcement principle"""
         principle = self.constitution["principles"]["resource_constraint_enforcement"]
         
-        # Get current resource usage
-        memory_usage = psutil.virtual_memory()
-        cpu_usage = psutil.cpu_percent(interval=1)
+        # Resource usage over the recent window, as the configured percentile of background samples.
+        # Limits apply to the Locus cgroup or process tree, not to other tenants of the host.
+        sampler = self.resource_sampler
+        sampler.wait_ready(self.sample_interval * 5)
+        latest = sampler.latest()
+        scoped = latest is not None and latest.scope != "host"
+        memory_stats = sampler.stats("locus_memory" if scoped else "memory_used",
+                                     self.resource_window, self.resource_percentile)
+        cpu_stats = sampler.stats("locus_cpu_cores" if scoped else "cpu_cores_used",
+                                  self.resource_window, self.resource_percentile)
+        if memory_stats is None or cpu_stats is None:
+            return []
         
-        memory_gb = memory_usage.used / (1024**3)
-        cpu_cores_used = cpu_usage / 100 * psutil.cpu_count()
+        memory_gb = memory_stats["percentile"] / (1024**3)
+        cpu_cores_used = cpu_stats["percentile"]
+        window = f"p{self.resource_percentile} of {cpu_stats['samples']} samples over {self.resource_window}s"
         
         # Check against constitutional limits (simulate core machine limits)
         memory_limit = float(principle["core_machine_memory_limit"].replace("GB", ""))
@@ -66,6 +121,7 @@ import os
                 "resource": "memory",
                 "current": f"{memory_gb:.2f}GB",
                 "limit": f"{memory_limit}GB",
+                "window": window,
                 "severity": "critical",
                 "action_required": "immediate_halt"
             })
@@ -76,6 +132,7 @@ import os
                 "resource": "memory",
                 "current": f"{memory_gb:.2f}GB",
                 "limit": f"{memory_limit}GB",
+                "window": window,
                 "severity": "warning",
                 "action_required": "throttle"
             })
@@ -87,7 +144,8 @@ import os
                 "principle": "resource_constraint_enforcement",
                 "resource": "cpu",
                 "current": f"{cpu_cores_used:.1f} cores",
-                "limit": f"{cpu_limit} cores", 
+                "limit": f"{cpu_limit} cores",
+                "window": window,
                 "severity": "critical",
                 "action_required": "immediate_halt"
             })
@@ -98,9 +156,23 @@ import os
                 "resource": "cpu",
                 "current": f"{cpu_cores_used:.1f} cores",
                 "limit": f"{cpu_limit} cores",
+                "window": window,
                 "severity": "warning",
                 "action_required": "throttle"
             })
+        
+        # Name the agents using the most of each violated resource so throttling targets them
+        for violation in violations:
+            violation["scope"] = latest.scope
+            if not latest.agents:
+                continue
+            if violation["resource"] == "memory":
+                top = sorted(latest.agents, key=lambda usage: usage.rss, reverse=True)[:3]
+                violation["agents"] = {usage.agent: f"{usage.rss / 1024**3:.2f}GB" for usage in top}
+            else:
+                top = sorted(latest.agents, key=lambda usage: usage.cpu_cores, reverse=True)[:3]
+                violation["agents"] = {usage.agent: f"{usage.cpu_cores:.1f} cores" for usage in top}
+            violation["offender"] = top[0].agent
             
         return violations
     
@@ -110,10 +182,10 @@ import os
         
         violations = []
         
-        # Check if decision logs exist and are properly formatted
-        log_files = list(Path("/tmp").glob("locus_*_*.json"))
+        # Validate only decision logs written or changed since the last check
+        result = self.transparency_scanner.scan()
         
-        if len(log_files) == 0:
+        if result.total == 0:
             violations.append({
                 "type": "transparency_violation",
                 "principle": "transparency_maintenance",
@@ -122,72 +194,85 @@ import os
                 "action_required": "enable_logging"
             })
         else:
-            # Check if logs include reasoning
-            for log_file in log_files[:3]:  # Check recent logs
-                try:
-                    with open(log_file, 'r') as f:
-                        log_data = json.load(f)
-                        
-                    if not log_data.get("ref_tag"):
-                        violations.append({
-                            "type": "transparency_violation",
-                            "principle": "transparency_maintenance",
-                            "issue": "missing_ref_tag",
-                            "file": str(log_file),
-                            "severity": "warning",
-                            "action_required": "add_ref_tags"
-                        })
-                        break
-                        
-                except (json.JSONDecodeError, Exception):
-                    violations.append({
-                        "type": "transparency_violation",
-                        "principle": "transparency_maintenance",
-                        "issue": "invalid_log_format",
-                        "file": str(log_file),
-                        "severity": "warning",
-                        "action_required": "fix_log_format"
-                    })
-                    break
+            # One violation per outstanding issue, citing the most recent offender
+            for issue, count in result.counts.items():
+                if not count:
+                    continue
+                new = [finding for finding in result.findings if finding.issue == issue]
+                violation = self.transparency_violation(
+                    issue, self.log_dir / (new[0].name if new else self.transparency_scanner.latest(issue))
+                )
+                violation["count"] = count
+                violation["new"] = len(new)
+                violations.append(violation)
         
         return violations
     
+    def check_transparency_files(self, names):
+        """Check decision logs reported by a watcher, advancing the scanner cursor past them"""
+        result = self.transparency_scanner.scan_files(names)
+        return [self.transparency_violation(finding.issue, self.log_dir / finding.name)
+                for finding in result.findings]
+    
+    def check_transparency_file(self, log_file):
+        """Check one decision log for a REF tag, returning its violation or None"""
+        issue = validate_decision_log(log_file)
+        return self.transparency_violation(issue, log_file) if issue else None
+    
+    def transparency_violation(self, issue, log_file):
+        """Violation record for a decision log with the given issue"""
+        return {
+            "type": "transparency_violation",
+            "principle": "transparency_maintenance",
+            "issue": issue,
+            "file": str(log_file),
+            "severity": "warning",
+            "action_required": "add_ref_tags" if issue == "missing_ref_tag" else "fix_log_format"
+        }
+    
     def check_expert_authority(self):
         """Check expert authority preservation principle"""
         principle = self.constitution["principles"]["expert_authority_preservation"]
         
+        # Only emergencies that changed state since the last check, in this or another tracker
+        return self.authority_violations(self.emergency_ledger.reconcile())
+    
+    def check_pending_emergencies(self):
+        """Check only the emergencies already awaiting approval, e.g. when one passes the approval timeout"""
+        return self.authority_violations(self.emergency_ledger.check())
+    
+    def check_emergency_files(self, names):
+        """Check emergency records reported by a watcher, retiring approved ones from the ledger"""
+        return self.authority_violations(self.emergency_ledger.observe(names))
+    
+    def authority_violations(self, transitions):
+        """Violations for emergencies newly awaiting approval or past the approval timeout"""
         violations = []
+        pending = len(self.emergency_ledger.pending)
         
-        # Simulate checking for high-impact decisions without approval
-        # In real implementation, would check decision queue for unapproved high-impact items
-        
-        # For demonstration, check if any recent emergency actions occurred
-        emergency_files = list(Path("/tmp").glob("locus_emergency_*.json"))
-        
-        for emergency_file in emergency_files:
-            try:
-                with open(emergency_file, 'r') as f:
-                    emergency_data = json.load(f)
-                    
-                if not emergency_data.get("human_approval_received"):
-                    violations.append({
-                        "type": "authority_violation",
-                        "principle": "expert_authority_preservation",
-                        "issue": "emergency_action_without_approval",
-                        "file": str(emergency_file),
-                        "severity": "critical",
-                        "action_required": "require_approval"
-                    })
-                    
-            except (json.JSONDecodeError, Exception):
-                pass
+        for transition in transitions:
+            if transition.state == PENDING and transition.previous in (None, REMOVED, APPROVED):
+                issue = "emergency_action_without_approval"
+            elif transition.state == ESCALATED and transition.previous == PENDING:
+                issue = "emergency_approval_timeout"
+            else:
+                continue
+            violations.append({
+                "type": "authority_violation",
+                "principle": "expert_authority_preservation",
+                "issue": issue,
+                "file": str(self.log_dir / transition.name),
+                "ref_tag": transition.ref_tag,
+                "pending_since": datetime.datetime.fromtimestamp(transition.since).isoformat(),
+                "pending_approvals": pending,
+                "severity": "critical",
+                "action_required": "require_approval"
+            })
         
         return violations
     
     def check_all_principles(self):
         """Check all constitutional principles"""
-        ref_tag = self.generate_ref_tag("check")
-        
         all_violations = []
         
         # Check each principle
@@ -195,18 +280,23 @@ import os
         all_violations.extend(self.check_transparency_compliance())
         all_violations.extend(self.check_expert_authority())
         
-        # Record check
+        return self.record_check(all_violations)
+    
+    def record_check(self, all_violations, check_type="constitutional_compliance"):
+        """Save a check record for the given violations and remember them as the latest result"""
+        ref_tag = self.generate_ref_tag("check")
+        
         check_record = {
             "ref_tag": ref_tag,
             "timestamp": datetime.datetime.now().isoformat(),
-            "check_type": "constitutional_compliance",
+            "check_type": check_type,
             "total_violations": len(all_violations),
             "violations": all_violations,
             "overall_status": "compliant" if len(all_violations) == 0 else "violations_detected"
         }
         
         # Save check record
-        check_file = f"/tmp/locus_principle_check_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        check_file = self.log_dir / f"locus_principle_check_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         with open(check_file, 'w') as f:
             json.dump(check_record, f, indent=2)
             
@@ -223,23 +313,13 @@ import os
         print(f"Started: {datetime.datetime.now().isoformat()}")
         
         self.monitoring_active = True
+        # Sample in the background between checks so each check sees a full window
+        self.resource_sampler.start()
         
         while self.monitoring_active:
             try:
                 check_result = self.check_all_principles()
-                
-                if check_result["total_violations"] > 0:
-                    print(f"\n⚠️  Constitutional violations detected: {check_result['total_violations']}")
-                    for violation in check_result["violations"]:
-                        print(f"  - {violation['type']}: {violation['principle']} ({violation['severity']})")
-                        
-                    # Trigger enforcement if critical violations
-                    critical_violations = [v for v in check_result["violations"] if v["severity"] == "critical"]
-                    if critical_violations:
-                        print("🚨 Critical violations detected - triggering enforcement")
-                        self.trigger_enforcement(critical_violations)
-                else:
-                    print(f"✓ Constitutional compliance check passed ({check_result['ref_tag']})")
+                self.report_check(check_result)
                 
                 time.sleep(self.check_interval)
                 
@@ -250,6 +330,47 @@ import os
             except Exception as e:
                 print(f"❌ Error during principle check: {e}")
                 time.sleep(self.check_interval)
+        
+        self.sampler.stop()
+    
+    def start_event_monitoring(self):
+        """Monitor principles on file and resource events, falling back to polling without inotify"""
+        from event_monitor import PrincipleEventMonitor
+        
+        try:
+            monitor = PrincipleEventMonitor(self)
+        except OSError as e:
+            print(f"⚠️  Event monitoring unavailable ({e}), polling every {self.check_interval} seconds")
+            self.start_monitoring()
+            return
+        
+        print("=== LOCUS Fork B: Event-Driven Principle Monitoring Started ===")
+        print(f"REF: {self.constitution['ref_tag']}")
+        print(f"Watching: {self.log_dir}")
+        print(f"Started: {datetime.datetime.now().isoformat()}")
+        
+        self.monitoring_active = True
+        try:
+            monitor.run()
+        finally:
+            self.monitoring_active = False
+            monitor.close()
+            self.resource_sampler.stop()
+    
+    def report_check(self, check_result):
+        """Print a check result and enforce its critical violations"""
+        if check_result["total_violations"] > 0:
+            print(f"\n⚠️  Constitutional violations detected: {check_result['total_violations']}")
+            for violation in check_result["violations"]:
+                print(f"  - {violation['type']}: {violation['principle']} ({violation['severity']})")
+                
+            # Trigger enforcement if critical violations
+            critical_violations = [v for v in check_result["violations"] if v["severity"] == "critical"]
+            if critical_violations:
+                print("🚨 Critical violations detected - triggering enforcement")
+                self.trigger_enforcement(critical_violations)
+        else:
+            print(f"✓ Constitutional compliance check passed ({check_result['ref_tag']})")
     
     def trigger_enforcement(self, violations):
         """Trigger constitutional enforcement mechanisms"""
@@ -257,7 +378,8 @@ import os
         
         for violation in violations:
             if violation["action_required"] == "immediate_halt":
-                print(f"🚨 Triggering emergency halt for: {violation['principle']}")
+                offender = f" (offender: {violation['offender']})" if violation.get("offender") else ""
+                print(f"🚨 Triggering emergency halt for: {violation['principle']}{offender}")
                 # Would call emergency_halt.sh here
                 
         # Log enforcement action
@@ -270,7 +392,7 @@ import os
             "status": "enforced"
         }
         
-        enforcement_file = f"/tmp/locus_enforcement_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        enforcement_file = self.log_dir / f"locus_enforcement_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         with open(enforcement_file, 'w') as f:
             json.dump(enforcement_record, f, indent=2)
             
@@ -282,7 +404,10 @@ def main():
     tracker = PrincipleTracker()
     
     if len(sys.argv) > 1 and sys.argv[1] == "--start-monitoring":
-        tracker.start_monitoring()
+        if "--poll" in sys.argv:
+            tracker.start_monitoring()
+        else:
+            tracker.start_event_monitoring()
     else:
         # Run single check
         print("=== LOCUS Fork B: Constitutional Principle Check ===")
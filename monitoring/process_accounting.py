@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Process Accounting for Project Locus Fork B
+Memory and CPU of the Locus cgroup and process tree, attributed to agents, read from /proc and /sys/fs/cgroup
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+PROC_ROOT = Path("/proc")
+# Processes are attributed to the agent named in this environment variable, inherited by their children
+AGENT_ENV = "LOCUS_AGENT"
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED = 2**62
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except (FileNotFoundError, PermissionError, ProcessLookupError):
+        return None
+
+
+class Cgroup:
+    """
+    Memory and CPU counters of one cgroup
+
+    Supports the v2 unified hierarchy (memory.current, cpu.stat, memory.max,
+    cpu.max) and the v1 memory and cpuacct controllers (memory.usage_in_bytes,
+    cpuacct.usage, memory.limit_in_bytes, cpu.cfs_quota_us).
+    """
+
+    def __init__(self, path: str, memory_dir: Path, cpu_dir: Path, version: int, quota_dir: Optional[Path] = None):
+        self.path = path
+        self.memory_dir = memory_dir
+        self.cpu_dir = cpu_dir
+        self.quota_dir = quota_dir or cpu_dir
+        self.version = version
+
+    @classmethod
+    def of_process(cls, pid: str = "self", root: Path = CGROUP_ROOT) -> Optional['Cgroup']:
+        """
+        Find the cgroup of a process
+
+        LOCUS_CGROUP (a path below the cgroup root, e.g. /locus.slice) overrides
+        the lookup so the tracker can account for agents in another cgroup.
+
+        Returns:
+            The cgroup, or None if no cgroup filesystem is mounted
+        """
+        entries = {}
+        for line in (_read(PROC_ROOT / str(pid) / "cgroup") or "").splitlines():
+            _, controllers, path = line.split(":", 2)
+            for controller in controllers.split(",") if controllers else [""]:
+                entries[controller] = path
+        override = os.environ.get("LOCUS_CGROUP")
+
+        if (root / "cgroup.controllers").exists():
+            path = override or entries.get("", "/")
+            directory = root / path.lstrip("/")
+            return cls(path, directory, directory, 2)
+
+        if "memory" in entries or override:
+            path, memory_dir = cls._v1_dir(root, "memory", override or entries.get("memory", "/"))
+            _, cpu_dir = cls._v1_dir(root, "cpuacct", override or entries.get("cpuacct", "/"))
+            _, quota_dir = cls._v1_dir(root, "cpu", override or entries.get("cpu", "/"))
+            if memory_dir is not None and cpu_dir is not None:
+                return cls(path, memory_dir, cpu_dir, 1, quota_dir)
+        return None
+
+    @staticmethod
+    def _v1_dir(root: Path, controller: str, path: str) -> Tuple[str, Optional[Path]]:
+        """
+        Directory of a v1 controller for path
+
+        Inside a container the path may name a host cgroup that is not visible;
+        the controller's mount root is then the container's own cgroup.
+        """
+        for mount in (controller, "cpu,cpuacct"):
+            base = root / mount
+            if (base / path.lstrip("/")).is_dir():
+                return path, base / path.lstrip("/")
+            if base.is_dir():
+                return "/", base
+        return path, None
+
+    @property
+    def is_root(self) -> bool:
+        return self.path in ("", "/")
+
+    def memory_bytes(self) -> Optional[int]:
+        value = _read(self.memory_dir / ("memory.current" if self.version == 2 else "memory.usage_in_bytes"))
+        return int(value) if value else None
+
+    def memory_limit(self) -> Optional[int]:
+        value = _read(self.memory_dir / ("memory.max" if self.version == 2 else "memory.limit_in_bytes"))
+        if not value or value == "max" or int(value) >= UNLIMITED:
+            return None
+        return int(value)
+
+    def cpu_seconds(self) -> Optional[float]:
+        """Total CPU time consumed by the cgroup"""
+        if self.version == 2:
+            for line in (_read(self.cpu_dir / "cpu.stat") or "").splitlines():
+                key, _, value = line.partition(" ")
+                if key == "usage_usec":
+                    return int(value) / 1e6
+            return None
+        value = _read(self.cpu_dir / "cpuacct.usage")
+        return int(value) / 1e9 if value else None
+
+    def cpu_limit(self) -> Optional[float]:
+        """CPU quota in cores, or None if unlimited"""
+        if self.version == 2:
+            quota, _, period = (_read(self.cpu_dir / "cpu.max") or "max").partition(" ")
+        else:
+            quota = _read(self.quota_dir / "cpu.cfs_quota_us") or "-1"
+            period = _read(self.quota_dir / "cpu.cfs_period_us") or "100000"
+        if quota in ("max", "-1"):
+            return None
+        return int(quota) / int(period)
+
+    def pids(self) -> List[int]:
+        procs = _read(self.memory_dir / "cgroup.procs") or ""
+        return [int(pid) for pid in procs.split()]
+
+
+class ProcessUsage(NamedTuple):
+    pid: int
+    ppid: int
+    name: str
+    agent: str
+    rss: int
+    cpu_seconds: float
+    cpu_cores: float
+
+
+class AgentUsage(NamedTuple):
+    agent: str
+    rss: int
+    cpu_cores: float
+    processes: int
+
+
+class AccountingSample(NamedTuple):
+    timestamp: float
+    scope: str
+    memory_bytes: int
+    cpu_cores: float
+    memory_limit: Optional[int]
+    cpu_limit: Optional[float]
+    agents: Tuple[AgentUsage, ...]
+    processes: Tuple[ProcessUsage, ...]
+
+
+def read_stat(pid: int) -> Optional[Tuple[int, str, int, float, int]]:
+    """
+    Parse /proc/<pid>/stat
+
+    Returns:
+        (ppid, name, rss bytes, CPU seconds, start time in ticks), or None if the process is gone
+    """
+    stat = _read(PROC_ROOT / str(pid) / "stat")
+    if stat is None:
+        return None
+    # The name is parenthesised and may itself contain spaces or parentheses
+    name = stat[stat.index("(") + 1:stat.rindex(")")]
+    fields = stat[stat.rindex(")") + 2:].split()
+    ppid = int(fields[1])
+    cpu_ticks = int(fields[11]) + int(fields[12])
+    start_ticks = int(fields[19])
+    rss = int(fields[21]) * PAGE_SIZE
+    return ppid, name, rss, cpu_ticks / CLOCK_TICKS, start_ticks
+
+
+def read_agent(pid: int) -> Optional[str]:
+    """Agent named by the process's LOCUS_AGENT environment variable, if readable"""
+    try:
+        with open(PROC_ROOT / str(pid) / "environ", 'rb') as f:
+            environ = f.read()
+    except (FileNotFoundError, PermissionError, ProcessLookupError):
+        return None
+    prefix = AGENT_ENV.encode() + b"="
+    for entry in environ.split(b"\0"):
+        if entry.startswith(prefix):
+            return entry[len(prefix):].decode(errors="replace")
+    return None
+
+
+class LocusAccounting:
+    """
+    Memory and CPU used by Locus itself rather than the whole host
+
+    When the tracker runs in a dedicated cgroup, totals come from that
+    cgroup's counters and its member processes are attributed to agents.
+    In the root cgroup (a shared host without a Locus slice) the scope is the
+    process tree below root_pids plus any process tagged with LOCUS_AGENT,
+    and totals are summed from /proc. CPU rates are measured between
+    successive samples; the first sample reports zero cores.
+
+    Agent names are read once per process from LOCUS_AGENT, falling back to
+    the process name, and cached by (pid, start time).
+    """
+
+    def __init__(self, cgroup: Optional[Cgroup] = None, root_pids: Optional[Iterable[int]] = None):
+        self.cgroup = cgroup if cgroup is not None else Cgroup.of_process()
+        self.root_pids = set(root_pids) if root_pids is not None else {os.getpid()}
+        self._agents: Dict[Tuple[int, int], Optional[str]] = {}
+        # (pid, start time) of every process seen by the last stat pass
+        self._live: Set[Tuple[int, int]] = set()
+        self._previous: Dict[Tuple[int, int], float] = {}
+        self._previous_cgroup_cpu: Optional[float] = None
+        self._previous_time: Optional[float] = None
+
+    @property
+    def scope(self) -> str:
+        if self.cgroup is not None and not self.cgroup.is_root:
+            return f"cgroup:{self.cgroup.path}"
+        return "process_tree"
+
+    def _stats(self) -> Dict[int, Tuple[int, str, int, float, int]]:
+        """Stat every process in scope"""
+        if self.cgroup is not None and not self.cgroup.is_root:
+            stats = {pid: read_stat(pid) for pid in self.cgroup.pids()}
+            stats = {pid: stat for pid, stat in stats.items() if stat is not None}
+            self._live = {(pid, stat[4]) for pid, stat in stats.items()}
+            return stats
+
+        stats = {}
+        for entry in os.listdir(PROC_ROOT):
+            if entry.isdigit():
+                stat = read_stat(int(entry))
+                if stat is not None:
+                    stats[int(entry)] = stat
+        # Every live process, in scope or not, keeps its cached agent name
+        self._live = {(pid, stat[4]) for pid, stat in stats.items()}
+        children: Dict[int, List[int]] = {}
+        for pid, stat in stats.items():
+            children.setdefault(stat[0], []).append(pid)
+
+        in_scope = set()
+        pending = [pid for pid in self.root_pids if pid in stats]
+        pending += [pid for pid, stat in stats.items() if self._agent_env(pid, stat[4])]
+        while pending:
+            pid = pending.pop()
+            if pid not in in_scope:
+                in_scope.add(pid)
+                pending.extend(children.get(pid, ()))
+        return {pid: stats[pid] for pid in in_scope}
+
+    def _agent_env(self, pid: int, start_ticks: int) -> Optional[str]:
+        key = (pid, start_ticks)
+        if key not in self._agents:
+            self._agents[key] = read_agent(pid)
+        return self._agents[key]
+
+    def sample(self) -> AccountingSample:
+        """Measure current usage of the Locus scope"""
+        now = time.monotonic()
+        elapsed = now - self._previous_time if self._previous_time is not None else None
+        stats = self._stats()
+
+        processes = []
+        current = {}
+        for pid, (ppid, name, rss, cpu_seconds, start_ticks) in stats.items():
+            key = (pid, start_ticks)
+            current[key] = cpu_seconds
+            previous = self._previous.get(key)
+            cores = (cpu_seconds - previous) / elapsed if elapsed and previous is not None else 0.0
+            agent = self._agent_env(pid, start_ticks) or name
+            processes.append(ProcessUsage(pid, ppid, name, agent, rss, cpu_seconds, max(0.0, cores)))
+        # Forget agent names of processes that exited; live ones outside the scope stay cached too
+        self._agents = {key: agent for key, agent in self._agents.items() if key in self._live}
+        self._previous = current
+
+        agents: Dict[str, List[ProcessUsage]] = {}
+        for process in processes:
+            agents.setdefault(process.agent, []).append(process)
+        agent_usage = sorted(
+            (AgentUsage(agent, sum(p.rss for p in procs), sum(p.cpu_cores for p in procs), len(procs))
+             for agent, procs in agents.items()),
+            key=lambda usage: usage.rss, reverse=True
+        )
+
+        memory_bytes = sum(p.rss for p in processes)
+        cpu_cores = sum(p.cpu_cores for p in processes)
+        memory_limit = cpu_limit = None
+        if self.cgroup is not None and not self.cgroup.is_root:
+            memory_bytes = self.cgroup.memory_bytes() or memory_bytes
+            cgroup_cpu = self.cgroup.cpu_seconds()
+            if cgroup_cpu is not None:
+                cpu_cores = (cgroup_cpu - self._previous_cgroup_cpu) / elapsed \
+                    if elapsed and self._previous_cgroup_cpu is not None else 0.0
+                self._previous_cgroup_cpu = cgroup_cpu
+            memory_limit = self.cgroup.memory_limit()
+            cpu_limit = self.cgroup.cpu_limit()
+        self._previous_time = now
+
+        return AccountingSample(
+            timestamp=time.time(),
+            scope=self.scope,
+            memory_bytes=memory_bytes,
+            cpu_cores=cpu_cores,
+            memory_limit=memory_limit,
+            cpu_limit=cpu_limit,
+            agents=tuple(agent_usage),
+            processes=tuple(sorted(processes, key=lambda p: p.rss, reverse=True))
+        )
+
+
+def main():
+    """Print per-agent usage of the Locus scope over a short interval"""
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+
+    accounting = LocusAccounting()
+    accounting.sample()
+    time.sleep(interval)
+    sample = accounting.sample()
+
+    print(f"Scope: {sample.scope}")
+    print(f"Memory: {sample.memory_bytes / 1024**3:.2f}GB"
+          + (f" of {sample.memory_limit / 1024**3:.2f}GB" if sample.memory_limit else ""))
+    print(f"CPU: {sample.cpu_cores:.2f} cores" + (f" of {sample.cpu_limit:.2f}" if sample.cpu_limit else ""))
+    for usage in sample.agents[:10]:
+        print(f"  {usage.agent[:24]:<24} {usage.rss / 1024**2:8.1f}MB {usage.cpu_cores:5.2f} cores "
+              f"({usage.processes} processes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Resource Sampler for Project Locus Fork B
+Background sampling of host and process resources into a ring buffer for principle checks
+"""
+
+import collections
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from lazy_imports import lazy_import
+from process_accounting import AgentUsage, LocusAccounting
+
+psutil = lazy_import("psutil")
+
+
+DEFAULT_SAMPLE_INTERVAL = 1.0
+DEFAULT_BUFFER_SECONDS = 300
+DEFAULT_TOP_PROCESSES = 5
+# With scoped accounting, host-wide figures are context only and refreshed this rarely
+DEFAULT_HOST_INTERVAL = 30.0
+# A fresh sampler needs one short interval before its first CPU reading means anything
+PRIME_INTERVAL = 0.1
+
+METRICS = ("cpu_percent", "cpu_cores_used", "memory_used", "memory_percent", "disk_percent",
+           "locus_memory", "locus_cpu_cores")
+
+
+class ProcessSample(NamedTuple):
+    pid: int
+    name: str
+    rss: int
+    cpu_percent: float
+
+
+class ResourceSample(NamedTuple):
+    timestamp: float
+    cpu_percent: float
+    cpu_cores_used: float
+    memory_used: int
+    memory_percent: float
+    disk_percent: float
+    processes: Tuple[ProcessSample, ...]
+    # Usage of the Locus cgroup or process tree, when sampled with LocusAccounting
+    scope: str = "host"
+    locus_memory: int = 0
+    locus_cpu_cores: float = 0.0
+    agents: Tuple[AgentUsage, ...] = ()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (pct in 0-100)"""
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(-(-len(ordered) * pct // 100))))
+    return ordered[rank - 1]
+
+
+class ResourceSampler:
+    """
+    Samples CPU, memory, disk and the largest processes on a background thread
+
+    CPU figures come from psutil's non-blocking cpu_percent(), i.e. utilisation
+    since the previous sample, so a reader never waits for a measurement
+    interval. Samples go into a bounded deque holding buffer_seconds of
+    history; readers copy it without taking a lock, so latest() and stats()
+    cost microseconds.
+
+    With a LocusAccounting, each sample also carries the Locus scope's
+    memory and CPU broken down by agent, and the largest processes come from
+    its /proc readings instead of a psutil walk of every process. Checks
+    then read only the scoped figures, so the host-wide psutil calls run
+    every host_interval seconds and samples in between repeat their values.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, buffer_seconds: float = DEFAULT_BUFFER_SECONDS,
+                 disk_path: str = "/", top_processes: int = DEFAULT_TOP_PROCESSES,
+                 accounting: Optional[LocusAccounting] = None, host_interval: float = DEFAULT_HOST_INTERVAL):
+        self.interval = interval
+        self.accounting = accounting
+        self.host_interval = host_interval if accounting is not None else 0.0
+        self.disk_path = disk_path
+        self.top_processes = top_processes
+        self.samples: "collections.deque[ResourceSample]" = collections.deque(
+            maxlen=max(1, int(buffer_seconds / interval))
+        )
+        # Called with each new sample on the sampler thread; must return quickly
+        self.listeners: List[Callable[[ResourceSample], None]] = []
+        self._cpu_count = None
+        # (monotonic time, cpu_percent, memory used, memory percent, disk percent) of the last host reading
+        self._host: Optional[Tuple[float, float, int, float, float]] = None
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def _prime(self) -> None:
+        """Establish the baselines that non-blocking CPU readings are measured against"""
+        self._cpu_count = psutil.cpu_count() or 1
+        psutil.cpu_percent(interval=None)
+        if self.accounting is not None:
+            self.accounting.sample()
+        else:
+            list(psutil.process_iter(['cpu_percent']))
+
+    def sample_once(self) -> ResourceSample:
+        """Take one sample and append it to the buffer"""
+        if self._cpu_count is None:
+            self._prime()
+            time.sleep(PRIME_INTERVAL)
+
+        if self._host is None or time.monotonic() - self._host[0] >= self.host_interval:
+            memory = psutil.virtual_memory()
+            self._host = (time.monotonic(), psutil.cpu_percent(interval=None), memory.used, memory.percent,
+                          psutil.disk_usage(self.disk_path).percent)
+        _, cpu_percent, memory_used, memory_percent, disk_percent = self._host
+        processes = []
+        locus = {}
+        if self.accounting is not None:
+            usage = self.accounting.sample()
+            processes = [ProcessSample(proc.pid, proc.name, proc.rss, proc.cpu_cores * 100)
+                         for proc in usage.processes[:self.top_processes]]
+            locus = {"scope": usage.scope, "locus_memory": usage.memory_bytes,
+                     "locus_cpu_cores": usage.cpu_cores, "agents": usage.agents}
+        else:
+            for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'cpu_percent']):
+                info = proc.info
+                if info['memory_info'] is None:
+                    continue
+                processes.append(ProcessSample(info['pid'], info['name'] or "", info['memory_info'].rss,
+                                               info['cpu_percent'] or 0.0))
+            processes.sort(key=lambda proc: proc.rss, reverse=True)
+
+        sample = ResourceSample(
+            timestamp=time.time(),
+            cpu_percent=cpu_percent,
+            cpu_cores_used=cpu_percent / 100 * self._cpu_count,
+            memory_used=memory_used,
+            memory_percent=memory_percent,
+            disk_percent=disk_percent,
+            processes=tuple(processes[:self.top_processes]),
+            **locus
+        )
+        self.samples.append(sample)
+        self._ready.set()
+        for listener in self.listeners:
+            listener(sample)
+        return sample
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.sample_once()
+            except Exception as e:
+                print(f"❌ Resource sampling failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self) -> 'ResourceSampler':
+        """Start sampling in a daemon thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="locus-resource-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the first sample is in the buffer"""
+        return self._ready.wait(timeout)
+
+    def latest(self) -> Optional[ResourceSample]:
+        try:
+            return self.samples[-1]
+        except IndexError:
+            return None
+
+    def window(self, seconds: float) -> List[ResourceSample]:
+        """Samples taken in the last `seconds` seconds, oldest first"""
+        cutoff = time.time() - seconds
+        return [sample for sample in list(self.samples) if sample.timestamp >= cutoff]
+
+    def stats(self, metric: str, seconds: float, pct: float = 95) -> Optional[Dict[str, float]]:
+        """
+        Summarise one metric over a time window
+
+        Args:
+            metric: One of METRICS
+            seconds: Window length
+            pct: Percentile to report
+
+        Returns:
+            Dict with mean, max, the percentile and the sample count, or None if the window is empty
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown resource metric: {metric}")
+        values = [getattr(sample, metric) for sample in self.window(seconds)]
+        if not values:
+            return None
+        return {
+            "mean": sum(values) / len(values),
+            "max": max(values),
+            "percentile": percentile(values, pct),
+            "samples": len(values)
+        }
+
+
+def main():
+    """Print a few samples at the given interval"""
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SAMPLE_INTERVAL
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    sampler = ResourceSampler(interval).start()
+    try:
+        for _ in range(count):
+            sampler.wait_ready()
+            sample = sampler.latest()
+            print(f"CPU {sample.cpu_percent:5.1f}% ({sample.cpu_cores_used:.2f} cores)  "
+                  f"memory {sample.memory_used / 1024**3:.2f}GB ({sample.memory_percent:.0f}%)  "
+                  f"disk {sample.disk_percent:.0f}%")
+            for proc in sample.processes:
+                print(f"    {proc.pid:>7} {proc.name[:24]:<24} {proc.rss / 1024**2:8.1f}MB {proc.cpu_percent:5.1f}%")
+            time.sleep(interval)
+    finally:
+        sampler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Transparency Scanner for Project Locus Fork B
+Incremental validation of decision logs, remembering which files were already checked
+"""
+
+import fnmatch
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from lazy_imports import lazy_import
+
+futures = lazy_import("concurrent.futures")
+sqlite3 = lazy_import("sqlite3")
+
+
+DECISION_LOG_PATTERN = "locus_*_*.json"
+# Hidden, so it never matches the decision log pattern itself
+CURSOR_NAME = ".locus_transparency_cursor.db"
+ISSUES = ("missing_ref_tag", "invalid_log_format")
+DEFAULT_WORKERS = 8
+# Smaller batches are validated inline; a pool costs more than it saves
+PARALLEL_THRESHOLD = 64
+
+CURSOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    verdict TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_verdict ON files (verdict, mtime_ns);
+"""
+
+
+def validate_decision_log(path: Union[str, Path]) -> Optional[str]:
+    """
+    Check one decision log
+
+    Returns:
+        None if it is valid JSON carrying a ref_tag, else 'missing_ref_tag' or 'invalid_log_format'
+    """
+    try:
+        with open(path, 'rb') as f:
+            log_data = json.loads(f.read())
+        if not log_data.get("ref_tag"):
+            return "missing_ref_tag"
+    except Exception:
+        return "invalid_log_format"
+    return None
+
+
+class Finding(NamedTuple):
+    name: str
+    issue: str
+    mtime_ns: int
+
+
+class ScanResult(NamedTuple):
+    total: int
+    validated: int
+    removed: int
+    counts: Dict[str, int]
+    findings: List[Finding]
+
+
+class TransparencyScanner:
+    """
+    Validates each decision log once
+
+    The cursor, a SQLite table in the log directory, remembers every file's
+    inode, mtime and size with its verdict. A scan only stats the directory
+    and validates files that are new or whose identity changed, spreading
+    large batches over a thread pool no wider than the CPUs available.
+    Counts of missing-REF-tag and invalid-format logs are kept for the files
+    currently present, and each scan returns only the findings among the
+    files it validated. A long-lived scanner keeps the cursor in memory as
+    well, so an idle rescan costs one directory listing.
+    """
+
+    def __init__(self, log_dir: Path, workers: int = DEFAULT_WORKERS, pattern: str = DECISION_LOG_PATTERN):
+        self.log_dir = Path(log_dir)
+        self.workers = max(1, min(workers, len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                                  else os.cpu_count() or 1))
+        self.pattern = pattern
+        self._match = re.compile(fnmatch.translate(pattern)).match
+        self.cursor_path = self.log_dir / CURSOR_NAME
+        self._local = threading.local()
+        # name -> (inode, mtime_ns, size), loaded from the cursor table on first scan
+        self._known: Optional[Dict[str, Tuple[int, int, int]]] = None
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.cursor_path), timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(CURSOR_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @property
+    def known(self) -> Dict[str, Tuple[int, int, int]]:
+        if self._known is None:
+            self._known = {name: (inode, mtime_ns, size) for name, inode, mtime_ns, size in self.conn.execute(
+                "SELECT name, inode, mtime_ns, size FROM files"
+            )}
+        return self._known
+
+    def _validate(self, names: List[str]) -> List[Optional[str]]:
+        log_dir = str(self.log_dir)
+        paths = [os.path.join(log_dir, name) for name in names]
+        if self.workers <= 1 or len(paths) < PARALLEL_THRESHOLD:
+            return [validate_decision_log(path) for path in paths]
+        with futures.ThreadPoolExecutor(self.workers) as pool:
+            return list(pool.map(validate_decision_log, paths, chunksize=max(1, len(paths) // (self.workers * 4))))
+
+    def _record(self, entries: List[Tuple[str, os.stat_result]], removed: Iterable[str]) -> ScanResult:
+        """Validate entries, store their verdicts and drop removed names from the cursor"""
+        removed = list(removed)
+        verdicts = self._validate([name for name, _ in entries])
+        findings = sorted(
+            (Finding(name, verdict, stat.st_mtime_ns) for (name, stat), verdict in zip(entries, verdicts) if verdict),
+            key=lambda finding: finding.mtime_ns, reverse=True
+        )
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (name, inode, mtime_ns, size, verdict) VALUES (?, ?, ?, ?, ?)",
+                [(name, stat.st_ino, stat.st_mtime_ns, stat.st_size, verdict or "ok")
+                 for (name, stat), verdict in zip(entries, verdicts)]
+            )
+            self.conn.executemany("DELETE FROM files WHERE name = ?", [(name,) for name in removed])
+        known = self.known
+        for name, stat in entries:
+            known[name] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        for name in removed:
+            known.pop(name, None)
+        return ScanResult(self.total(), len(entries), len(removed), self.counts(), findings)
+
+    def scan(self) -> ScanResult:
+        """Validate decision logs that appeared or changed since the last scan"""
+        known = self.known
+        changed = []
+        present = set()
+        with os.scandir(self.log_dir) as entries:
+            for entry in entries:
+                if not self._match(entry.name):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                present.add(entry.name)
+                if known.get(entry.name) != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                    changed.append((entry.name, stat))
+        return self._record(changed, (name for name in known if name not in present))
+
+    def scan_files(self, names: Iterable[str]) -> ScanResult:
+        """Validate specific files reported by a watcher, skipping any the cursor already covers"""
+        changed = []
+        removed = []
+        for name in names:
+            if not self._match(name):
+                continue
+            try:
+                stat = os.stat(self.log_dir / name)
+            except FileNotFoundError:
+                removed.append(name)
+                continue
+            if self.known.get(name) != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                changed.append((name, stat))
+        return self._record(changed, removed)
+
+    def total(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of current decision logs with each issue"""
+        counts = dict.fromkeys(ISSUES, 0)
+        for verdict, count in self.conn.execute("SELECT verdict, COUNT(*) FROM files GROUP BY verdict"):
+            if verdict in counts:
+                counts[verdict] = count
+        return counts
+
+    def latest(self, issue: str) -> Optional[str]:
+        """Most recently modified decision log with the given issue"""
+        row = self.conn.execute(
+            "SELECT name FROM files WHERE verdict = ? ORDER BY mtime_ns DESC LIMIT 1", (issue,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def reset(self) -> None:
+        """Forget every verdict so the next scan validates all files again"""
+        with self.conn:
+            self.conn.execute("DELETE FROM files")
+        self._known = None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        self._known = None
+
+
+def main():
+    """Scan a log directory and print its transparency counts"""
+    log_dir = Path(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("LOCUS_LOG_DIR", "/tmp"))
+    scanner = TransparencyScanner(log_dir)
+    if "--full" in sys.argv:
+        scanner.reset()
+    result = scanner.scan()
+    print(f"✓ Scanned {log_dir}: {result.validated} validated, {result.total} tracked, {result.removed} removed")
+    for issue, count in result.counts.items():
+        print(f"  {issue}: {count}" + (f" (latest: {scanner.latest(issue)})" if count else ""))
+    scanner.close()
+
+
+if __name__ == "__main__":
+    main()
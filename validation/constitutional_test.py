@@ -6,22 +6,23 @@ Tests constitutional principle enforcement across distributed infrastructure
 
 import os
 import json
+import sys
 import time
 import subprocess
 import datetime
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+
 class ConstitutionalTest:
     def __init__(self):
         self.test_results = []
         self.start_time = datetime.datetime.now()
         
     def generate_ref_tag(self, test_type="test"):
-        """Generate REF tag for test using the shell script"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"constitutional-{test_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        """Generate REF tag for test"""
+        return generate_ref_tag("job", f"constitutional-{test_type}")
     
     def log_test_result(self, test_name, status, details=None, duration=None):
         """Log a test result"""
@@ -5,11 +5,15 @@ Validates core assumptions across all three testing forks
 """
 
 import json
+import sys
 import datetime
 import subprocess
 import os
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+from ref_tags import generate_ref_tag
+
 class CrossForkValidation:
     def __init__(self):
         self.fork_results = {}
@@ -17,10 +21,7 @@ class CrossForkValidation:
         
     def generate_ref_tag(self, validation_type="cross-fork"):
         """Generate REF tag for cross-fork validation"""
-        script_path = Path(__file__).parent.parent / "automation" / "generate_ref_tag.sh"
-        result = subprocess.run([str(script_path), "job", f"cross-fork-{validation_type}"], 
-                              capture_output=True, text=True)
-        return result.stdout.strip()
+        return generate_ref_tag("job", f"cross-fork-{validation_type}")
     
     def measure_core_assumptions(self, fork_results):
         """Measure across all forks to validate core assumptions"""
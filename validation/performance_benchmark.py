@@ -0,0 +1,1806 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks for Project Locus
+Microbenchmarks for the hot paths of context capture and agent coordination
+"""
+
+import io
+import os
+import asyncio
+import sys
+import json
+import time
+import contextlib
+import cProfile
+import hashlib
+import pstats
+import shutil
+import subprocess
+import datetime
+import tempfile
+import threading
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "automation" / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "monitoring"))
+import canonical
+from context_daemon import ContextDaemon, DaemonClient
+from agent_handover import AgentHandover
+from handover_store import HandoverIndex
+from context_toolkit import AsyncContextTracker, ContextTracker, HealthCounters, HeartbeatTable
+from receipt_store import ReceiptStore, frame_record, link_receipt
+from emergency_ledger import APPROVED, ESCALATED, EmergencyLedger, read_emergency
+from event_monitor import PrincipleEventMonitor
+from principle_tracker import PrincipleTracker
+from process_accounting import LocusAccounting
+from resource_sampler import ResourceSampler
+from snapshot_store import SnapshotStore, rehydrate_receipt
+from ref_tags import RefTagAllocator
+from state_sync import EndpointSync, HandoverEndpointSync
+from transparency_scanner import TransparencyScanner, validate_decision_log
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_PATH = Path(__file__).resolve().parent / "import_budget.json"
+
+
+def _allocate_counters_worker(counter_path, tag_count, lease_size):
+    """Allocate tag_count REF tags in a child process and return their counter values"""
+    allocator = RefTagAllocator(counter_path, audit_log_path=None, lease_size=lease_size)
+    return [int(allocator.generate("agent").rsplit("-", 1)[1]) for _ in range(tag_count)]
+
+
+def _legacy_handover_index_update(index_file, entry):
+    """The handover_index.json rewrite AgentHandover performed before the SQLite index"""
+    if index_file.exists():
+        with open(index_file, 'r') as f:
+            index = json.load(f)
+    else:
+        index = {"handovers": [], "last_updated": None}
+    index["handovers"] = [h for h in index["handovers"] if h["ref_tag"] != entry["ref_tag"]]
+    index["handovers"].append(entry)
+    index["last_updated"] = datetime.datetime.now().isoformat()
+    with open(index_file, 'w') as f:
+        json.dump(index, f, indent=2)
+
+
+def _create_handovers_worker(base_dir, worker, count):
+    """Create count handovers in a child process and return their REF tags"""
+    handover = AgentHandover(base_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [handover.create_handover(f"agent_{worker:02d}", "agent_target", f"task {worker}-{i}")
+                for i in range(count)]
+
+
+def _complete_handovers_worker(base_dir, ref_tags):
+    """Try to complete every given handover in a child process and return the ones it completed"""
+    handover = AgentHandover(base_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [ref_tag for ref_tag in ref_tags if handover.complete_handover(ref_tag, "stress")]
+
+
+def _claim_handovers_worker(base_dir, agent, idle_timeout):
+    """Claim handovers for agent until none arrives for idle_timeout; return (ref_tag, claimed_at) pairs"""
+    handover = AgentHandover(base_dir)
+    claims = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while True:
+            handover_data = handover.claim_next(agent, timeout=idle_timeout)
+            if handover_data is None:
+                return claims
+            claims.append((handover_data["ref_tag"], time.time()))
+
+
+def _synthetic_handover(i, agents=1000):
+    return {
+        "ref_tag": f"LOCUS-ART20250101-000000-{i:07d}",
+        "from_agent": f"agent_{(i + 1) % agents:03d}",
+        "to_agent": f"agent_{i % agents:03d}",
+        "status": "pending" if i % 10 == 0 else "completed",
+        "created_at": f"2025-01-01T00:00:00.{i:07d}",
+        "machine_source": "benchmark"
+    }
+
+
+class PerformanceBenchmark:
+    def __init__(self):
+        self.benchmark_results = []
+        self.start_time = datetime.datetime.now()
+
+    def log_benchmark_result(self, benchmark_name, status, details=None, duration=None):
+        """Log a benchmark result"""
+        result = {
+            "benchmark_name": benchmark_name,
+            "status": status,
+            "timestamp": datetime.datetime.now().isoformat(),
+            "duration": duration,
+            "details": details or {}
+        }
+        self.benchmark_results.append(result)
+
+        status_symbol = "✓" if status == "PASS" else "✗"
+        print(f"{status_symbol} {benchmark_name}: {status}")
+        if details:
+            for key, value in details.items():
+                print(f"    {key}: {value}")
+
+    def benchmark_ref_tag_allocation(self, shell_iterations=50, python_iterations=5000, block_size=100):
+        """Benchmark REF tag allocation: shell script vs in-process allocator"""
+        print("\n=== Benchmark: REF Tag Allocation ===")
+        test_start = time.time()
+
+        try:
+            script_path = REPO_ROOT / "automation" / "scripts" / "generate_ref_tag.sh"
+
+            # Scratch counter and audit log, so benchmarking never consumes production REF numbers
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                counter_path = Path(tmp_dir) / "locus_ref_counter"
+                audit_log_path = Path(tmp_dir) / "locus_ref_audit.log"
+                env = dict(os.environ, LOCUS_REF_COUNTER=str(counter_path), LOCUS_REF_AUDIT_LOG=str(audit_log_path))
+
+                start = time.perf_counter()
+                for _ in range(shell_iterations):
+                    subprocess.run([str(script_path), "job", "benchmark-shell"],
+                                   capture_output=True, text=True, check=True, env=env)
+                shell_rate = shell_iterations / (time.perf_counter() - start)
+
+                allocator = RefTagAllocator(counter_path, audit_log_path)
+
+                start = time.perf_counter()
+                for _ in range(python_iterations):
+                    allocator.generate("job", "benchmark-python")
+                python_rate = python_iterations / (time.perf_counter() - start)
+
+                blocks = max(1, python_iterations // block_size)
+                start = time.perf_counter()
+                for _ in range(blocks):
+                    allocator.allocate("job", "benchmark-block", block_size)
+                block_rate = blocks * block_size / (time.perf_counter() - start)
+
+            duration = time.time() - test_start
+            self.log_benchmark_result("REF Tag Allocation", "PASS" if python_rate > shell_rate else "FAIL", {
+                "shell_tags_per_sec": f"{shell_rate:.0f}",
+                "python_tags_per_sec": f"{python_rate:.0f}",
+                f"python_block_{block_size}_tags_per_sec": f"{block_rate:.0f}",
+                "speedup": f"{python_rate / shell_rate:.1f}x"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("REF Tag Allocation", "FAIL", {
+                "error": str(e)
+            })
+
+    def stress_ref_counter_concurrency(self, processes=32, total_tags=100000, lease_size=64):
+        """Stress test: many processes allocating REF tags concurrently must never collide"""
+        print("\n=== Stress Test: Concurrent REF Counter ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                counter_path = Path(tmp_dir) / "locus_ref_counter"
+                per_process = total_tags // processes
+
+                with multiprocessing.Pool(processes) as pool:
+                    results = pool.starmap(_allocate_counters_worker,
+                                           [(counter_path, per_process, lease_size)] * processes)
+
+                all_counters = [counter for result in results for counter in result]
+                duplicates = len(all_counters) - len(set(all_counters))
+                monotonic = all(
+                    all(a < b for a, b in zip(result, result[1:])) for result in results
+                )
+                final_counter = int(counter_path.read_text())
+
+            duration = time.time() - test_start
+            status = "PASS" if duplicates == 0 and monotonic and final_counter > max(all_counters) else "FAIL"
+            self.log_benchmark_result("Concurrent REF Counter", status, {
+                "processes": processes,
+                "tags_allocated": len(all_counters),
+                "lease_size": lease_size,
+                "duplicates": duplicates,
+                "per_process_monotonic": monotonic,
+                "tags_per_sec": f"{len(all_counters) / duration:.0f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Concurrent REF Counter", "FAIL", {
+                "error": str(e)
+            })
+
+    def stress_handover_concurrency(self, processes=16, per_process=25):
+        """Stress test: concurrent handover creates and racing completions must not lose or duplicate work"""
+        print("\n=== Stress Test: Concurrent Handovers ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                with multiprocessing.Pool(processes) as pool:
+                    created = pool.starmap(_create_handovers_worker,
+                                           [(tmp_dir, worker, per_process) for worker in range(processes)])
+                    ref_tags = [ref_tag for result in created for ref_tag in result]
+
+                    # Every process races to complete every handover, each starting at a different offset
+                    offsets = [worker * len(ref_tags) // processes for worker in range(processes)]
+                    orders = [ref_tags[offset:] + ref_tags[:offset] for offset in offsets]
+                    completed = pool.starmap(_complete_handovers_worker, [(tmp_dir, order) for order in orders])
+
+                completions = [ref_tag for result in completed for ref_tag in result]
+                index = HandoverIndex(Path(tmp_dir) / "handover_index.db")
+                entries = index.list()
+                index.close()
+
+                files_ok = 0
+                for ref_tag in ref_tags:
+                    with open(Path(tmp_dir) / f"handover_{ref_tag}.json") as f:
+                        data = json.load(f)
+                    files_ok += data["status"] == "completed" and data["version"] == 2
+
+            expected = processes * per_process
+            duplicates = len(ref_tags) - len(set(ref_tags))
+            status = "PASS" if (duplicates == 0 and len(ref_tags) == expected
+                                and sorted(completions) == sorted(ref_tags)
+                                and len(entries) == expected and files_ok == expected
+                                and all(e["status"] == "completed" and e["version"] == 2 for e in entries)) else "FAIL"
+
+            duration = time.time() - test_start
+            self.log_benchmark_result("Concurrent Handovers", status, {
+                "processes": processes,
+                "handovers_created": len(ref_tags),
+                "duplicate_ref_tags": duplicates,
+                "completion_attempts": expected * processes,
+                "successful_completions": len(completions),
+                "indexed": len(entries),
+                "consistent_files": files_ok
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Concurrent Handovers", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_handover_claims(self, consumers=4, handovers=200, interval=0.005):
+        """Benchmark how fast blocked agents wake and claim new handovers, and that each is claimed once"""
+        print("\n=== Benchmark: Handover Claim Queue ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                producer = AgentHandover(tmp_dir)
+                notify_dir = Path(tmp_dir) / ".notify"
+                with multiprocessing.Pool(consumers) as pool:
+                    pending = pool.starmap_async(_claim_handovers_worker,
+                                                 [(tmp_dir, "agent_target", 2.0)] * consumers)
+                    while len(list(notify_dir.glob("agent_target.*.sock"))) < consumers:
+                        time.sleep(0.01)
+
+                    created_at = {}
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        for i in range(handovers):
+                            start = time.time()
+                            ref_tag = producer.create_handover("agent_source", "agent_target", f"task {i}")
+                            created_at[ref_tag] = start
+                            time.sleep(interval)
+                    claims = [claim for result in pending.get(timeout=60) for claim in result]
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # Index rows claimed ahead of a missing or already completed file must be rolled back
+                handover = AgentHandover(tmp_dir)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    missing, done, fresh = (handover.create_handover("agent_source", "agent_target", f"task {i}")
+                                            for i in range(3))
+                    (handover.base_dir / f"handover_{missing}.json").unlink()
+                    done_file = handover.base_dir / f"handover_{done}.json"
+                    done_data = json.loads(done_file.read_text())
+                    done_file.write_text(json.dumps(dict(done_data, status="completed",
+                                                         version=done_data["version"] + 1)))
+                    stale_claim = handover.claim_next("agent_target", timeout=0)
+                rolled_back = (stale_claim is not None and stale_claim["ref_tag"] == fresh
+                               and handover.index.get(missing)["status"] == "pending"
+                               and handover.index.get(done)["status"] == "completed"
+                               and handover.index.get(fresh)["updated_at"] == stale_claim["claimed_at"])
+
+            claimed = [ref_tag for ref_tag, _ in claims]
+            latencies = sorted((claimed_at - created_at[ref_tag]) * 1000 for ref_tag, claimed_at in claims)
+            median_ms = latencies[len(latencies) // 2]
+            p99_ms = latencies[int(len(latencies) * 0.99) - 1]
+
+            duration = time.time() - test_start
+            exactly_once = sorted(claimed) == sorted(created_at)
+            status = "PASS" if exactly_once and rolled_back and median_ms < 100 else "FAIL"
+            self.log_benchmark_result("Handover Claim Queue", status, {
+                "consumers": consumers,
+                "handovers": handovers,
+                "claimed": len(claimed),
+                "duplicate_claims": len(claimed) - len(set(claimed)),
+                "stale_claims_rolled_back": rolled_back,
+                "claim_latency_median_ms": f"{median_ms:.1f}",
+                "claim_latency_p99_ms": f"{p99_ms:.1f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Handover Claim Queue", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_handover_payloads(self, context_entries=10000, reads=50):
+        """Benchmark header reads and status updates of large-context handovers, inline vs spilled payload"""
+        print("\n=== Benchmark: Handover Payload Spill ===")
+        test_start = time.time()
+
+        try:
+            # Research-style context: repetitive prose with unique identifiers, a few MB as pretty JSON
+            task_context = {"findings": [
+                {"id": f"finding-{i:05d}", "source": f"https://example.org/research/{i}",
+                 "digest": hashlib.sha256(str(i).encode()).hexdigest(),
+                 "summary": "Infrastructure migration analysis of cluster capacity and failover behaviour. " * 2}
+                for i in range(context_entries)
+            ]}
+            results = {}
+            for mode, inline_limit in (("inline", float("inf")), ("spilled", None)):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    handover = AgentHandover(tmp_dir, inline_limit=inline_limit)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        ref_tag = handover.create_handover("agent_source", "agent_target", task_context)
+                        create_ms = (time.perf_counter() - start) * 1000
+
+                        start = time.perf_counter()
+                        for _ in range(reads):
+                            handover.read_handover(ref_tag)
+                        read_ms = (time.perf_counter() - start) * 1000 / reads
+
+                        start = time.perf_counter()
+                        handover.complete_handover(ref_tag)
+                        complete_ms = (time.perf_counter() - start) * 1000
+
+                        full = handover.read_handover(ref_tag, include_payload=True)
+
+                    disk_bytes = sum(path.stat().st_size for path in Path(tmp_dir).glob(f"handover_{ref_tag}*"))
+                    header_bytes = (Path(tmp_dir) / f"handover_{ref_tag}.json").stat().st_size
+                    if full["task_context"] != task_context:
+                        raise AssertionError(f"{mode} handover did not round-trip its task context")
+                    results[mode] = (create_ms, read_ms, complete_ms, header_bytes, disk_bytes)
+
+            details = {}
+            for mode, (create_ms, read_ms, complete_ms, header_bytes, disk_bytes) in results.items():
+                details[f"{mode}_create_ms"] = f"{create_ms:.1f}"
+                details[f"{mode}_read_header_ms"] = f"{read_ms:.2f}"
+                details[f"{mode}_complete_ms"] = f"{complete_ms:.1f}"
+                details[f"{mode}_header_bytes"] = header_bytes
+                details[f"{mode}_disk_bytes"] = disk_bytes
+
+            duration = time.time() - test_start
+            inline, spilled = results["inline"], results["spilled"]
+            status = "PASS" if spilled[1] < inline[1] and spilled[4] < inline[4] else "FAIL"
+            self.log_benchmark_result("Handover Payload Spill", status, details, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Handover Payload Spill", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_handover_archive(self, handover_count=2000, completed_share=0.8, lookups=200):
+        """Benchmark archiving finished handovers and reading them back through the archive lookup"""
+        print("\n=== Benchmark: Handover Archive ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                handover = AgentHandover(tmp_dir)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    originals = {}
+                    for i in range(handover_count):
+                        task_context = {"task": f"Migrate workload {i}", "notes": "capacity review " * (i % 50)}
+                        ref_tag = handover.create_handover(f"agent_{i % 7}", f"agent_{i % 13}", task_context)
+                        originals[ref_tag] = task_context
+                    ref_tags = list(originals)
+                    completed = ref_tags[:int(handover_count * completed_share)]
+                    for ref_tag in completed:
+                        handover.complete_handover(ref_tag)
+
+                    files_before = len(list(Path(tmp_dir).glob("handover_*")))
+                    hot_before = handover.index.count()
+                    start = time.perf_counter()
+                    handover.index.list(status="pending")
+                    list_before_ms = (time.perf_counter() - start) * 1000
+
+                    # Completed handovers are past retention; the rest stay pending within their TTL
+                    start = time.perf_counter()
+                    result = handover.archive_handovers(retention_days=1, ttl_days=30,
+                                                        now=datetime.datetime.now() + datetime.timedelta(days=2))
+                    archive_ms = (time.perf_counter() - start) * 1000
+
+                    files_after = len(list(Path(tmp_dir).glob("handover_*")))
+                    hot_after = handover.index.count()
+                    start = time.perf_counter()
+                    handover.index.list(status="pending")
+                    list_after_ms = (time.perf_counter() - start) * 1000
+
+                    sample = completed[::max(1, len(completed) // lookups)][:lookups]
+                    start = time.perf_counter()
+                    records = [handover.read_handover(ref_tag) for ref_tag in sample]
+                    lookup_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+                archive_bytes = sum(path.stat().st_size for path in handover.archive_dir.iterdir())
+                for ref_tag, record in zip(sample, records):
+                    if record is None or record["task_context"] != originals[ref_tag] \
+                            or record["status"] != "completed":
+                        raise AssertionError(f"Archived handover {ref_tag} did not round-trip")
+
+            duration = time.time() - test_start
+            status = "PASS" if result["archived"] == len(completed) and hot_after == handover_count - len(completed) \
+                else "FAIL"
+            self.log_benchmark_result("Handover Archive", status, {
+                "handovers": handover_count,
+                "archived": result["archived"],
+                "hot_index_before": hot_before,
+                "hot_index_after": hot_after,
+                "hot_files_before": files_before,
+                "hot_files_after": files_after,
+                "archive_bytes": archive_bytes,
+                "archive_run_ms": f"{archive_ms:.1f}",
+                "list_pending_before_ms": f"{list_before_ms:.2f}",
+                "list_pending_after_ms": f"{list_after_ms:.2f}",
+                "archived_lookup_ms": f"{lookup_ms:.3f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Handover Archive", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_state_sync(self, file_count=100000, changed=100):
+        """Benchmark delta sync between two local directories against copying every file"""
+        print("\n=== Benchmark: State Sync ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source = Path(tmp_dir) / "core" / "locus_ref_state"
+                # Backdate files so the first scan does not treat them as racily modified
+                old = time.time() - 60
+                for i in range(file_count):
+                    path = source / f"{i % 100:02d}" / f"test_ref_{i:06d}.json"
+                    if i < 100:
+                        path.parent.mkdir(parents=True)
+                    path.write_text(json.dumps({"ref_tag": f"LOCUS-SYNC-{i:06d}", "state": "initial"}))
+                    os.utime(path, (old, old))
+
+                start = time.perf_counter()
+                shutil.copytree(source, Path(tmp_dir) / "copy")
+                full_copy_ms = (time.perf_counter() - start) * 1000
+
+                # Interrupt the first sync halfway, then resume from the target's checkpoint
+                target = Path(tmp_dir) / "experimental" / "locus_ref_state"
+                with contextlib.closing(EndpointSync("ref_state", source, target)) as endpoint:
+                    start = time.perf_counter()
+                    first = endpoint.sync(max_changes=file_count // 2)
+                    resumed = endpoint.sync()
+                    initial_ms = (time.perf_counter() - start) * 1000
+
+                    start = time.perf_counter()
+                    idle = endpoint.sync()
+                    idle_ms = (time.perf_counter() - start) * 1000
+
+                    for i in range(0, file_count, file_count // changed):
+                        path = source / f"{i % 100:02d}" / f"test_ref_{i:06d}.json"
+                        path.write_text(json.dumps({"ref_tag": f"LOCUS-SYNC-{i:06d}", "state": "updated"}))
+                    start = time.perf_counter()
+                    delta = endpoint.sync()
+                    delta_ms = (time.perf_counter() - start) * 1000
+
+                mismatched = sum(
+                    1 for path in source.rglob("*.json")
+                    if (target / path.relative_to(source)).read_bytes() != path.read_bytes()
+                )
+
+            duration = time.time() - test_start
+            resumed_ok = first["shipped"] == file_count // 2 and resumed["shipped"] == file_count - file_count // 2
+            # Topology budget: REF state must propagate within ref_tag_propagation_timeout (10 s)
+            status = "PASS" if (resumed_ok and delta["shipped"] == changed and mismatched == 0
+                                and idle["shipped"] == 0 and delta_ms < min(full_copy_ms, 10000)) else "FAIL"
+            self.log_benchmark_result("State Sync", status, {
+                "files": file_count,
+                "full_copy_ms": f"{full_copy_ms:.0f}",
+                "initial_sync_ms": f"{initial_ms:.0f}",
+                "interrupted_after": first["shipped"],
+                "resumed_shipped": resumed["shipped"],
+                "idle_sync_ms": f"{idle_ms:.0f}",
+                "changed_files": changed,
+                "delta_shipped": delta["shipped"],
+                "delta_hashed": delta["hashed"],
+                "delta_sync_ms": f"{delta_ms:.0f}",
+                "mismatched_files": mismatched
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("State Sync", "FAIL", {
+                "error": str(e)
+            })
+
+    def verify_handover_sync_no_rollback(self):
+        """Check that syncing a source's archive run never destroys handovers the target has moved on"""
+        print("\n=== Verification: Handover Sync Never Rolls Back ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source_dir = Path(tmp_dir) / "core" / "locus_handover"
+                target_dir = Path(tmp_dir) / "experimental" / "locus_handover"
+                source_dir.parent.mkdir()
+                target_dir.parent.mkdir()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    source = AgentHandover(source_dir)
+                    claimed_ref = source.create_handover("core", "experimental", {"task": "claimed on target"})
+                    completed_ref = source.create_handover("core", "experimental", {"task": "completed on target"})
+                    idle_ref = source.create_handover("core", "idle_agent", {"task": "untouched on target"})
+
+                    with contextlib.closing(HandoverEndpointSync("handover", source_dir, target_dir)) as endpoint:
+                        endpoint.sync()
+
+                    # The target claims two handovers and completes one of them
+                    target = AgentHandover(target_dir)
+                    first = target.claim_next("experimental", timeout=0)
+                    second = target.claim_next("experimental", timeout=0)
+                    target.complete_handover(completed_ref)
+
+                    # Meanwhile the source expires and archives all three as stale pending handovers
+                    archived = source.archive_handovers(
+                        retention_days=1, ttl_days=1, now=datetime.datetime.now() + datetime.timedelta(days=2)
+                    )
+                    with contextlib.closing(HandoverEndpointSync("handover", source_dir, target_dir)) as endpoint:
+                        result = endpoint.sync()
+
+                    outcome = {ref_tag: (target.index.get(ref_tag) or {}).get("status")
+                               for ref_tag in (claimed_ref, completed_ref, idle_ref)}
+                    files = {ref_tag: (target_dir / f"handover_{ref_tag}.json").exists()
+                             for ref_tag in (claimed_ref, completed_ref, idle_ref)}
+                    idle_archived = target.index.archived_location(idle_ref) is not None
+                    idle_record = target.read_handover(idle_ref)
+
+            duration = time.time() - test_start
+            correct = (first["ref_tag"] == claimed_ref and second["ref_tag"] == completed_ref
+                       and archived["archived"] == 3
+                       and outcome == {claimed_ref: "claimed", completed_ref: "completed", idle_ref: None}
+                       and files == {claimed_ref: True, completed_ref: True, idle_ref: False}
+                       and idle_archived and idle_record["status"] == "expired")
+            self.log_benchmark_result("Handover Sync Never Rolls Back", "PASS" if correct else "FAIL", {
+                "source_archived": archived["archived"],
+                "target_status": {ref_tag[-3:]: status for ref_tag, status in outcome.items()},
+                "target_files_kept": {ref_tag[-3:]: kept for ref_tag, kept in files.items()},
+                "idle_handover_archived_on_target": idle_archived,
+                "deletions_skipped": result["skipped"]
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Handover Sync Never Rolls Back", "FAIL", {
+                "error": str(e)
+            })
+
+    def verify_handover_sync_same_day_archives(self, per_endpoint=3):
+        """Check that syncing two endpoints that archived on the same day keeps both sides' archived handovers"""
+        print("\n=== Verification: Same-Day Archive Segments Survive Sync ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source_dir = Path(tmp_dir) / "core" / "locus_handover"
+                target_dir = Path(tmp_dir) / "experimental" / "locus_handover"
+                source_dir.parent.mkdir()
+                target_dir.parent.mkdir()
+                later = datetime.datetime.now() + datetime.timedelta(days=2)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    refs = {}
+                    for name, base_dir in (("source", source_dir), ("target", target_dir)):
+                        handover = AgentHandover(base_dir)
+                        refs[name] = [handover.create_handover(name, "peer", {"task": f"{name} {i}"})
+                                      for i in range(per_endpoint)]
+                        for ref_tag in refs[name]:
+                            handover.complete_handover(ref_tag)
+                        handover.archive_handovers(retention_days=1, ttl_days=1, now=later)
+
+                    with contextlib.closing(HandoverEndpointSync("handover", source_dir, target_dir)) as endpoint:
+                        result = endpoint.sync()
+
+                    target = AgentHandover(target_dir)
+                    read_back = {name: [(target.read_handover(ref_tag) or {}).get("ref_tag") for ref_tag in ref_tags]
+                                 for name, ref_tags in refs.items()}
+                    segments = sorted(path.name for path in (target_dir / "archive").iterdir())
+
+            duration = time.time() - test_start
+            correct = all(read_back[name] == refs[name] for name in refs) and len(segments) == 2
+            self.log_benchmark_result("Same-Day Archive Segments Survive Sync",
+                                      "PASS" if correct else "FAIL", {
+                "target_segments": segments,
+                "target_own_records_intact": read_back["target"] == refs["target"],
+                "source_records_readable_on_target": read_back["source"] == refs["source"],
+                "files_shipped": result["shipped"]
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Same-Day Archive Segments Survive Sync", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_context_chain_lookup(self, receipt_count=50000, chain_length=10):
+        """Benchmark indexed chain retrieval against a full scan of the receipt log"""
+        print("\n=== Benchmark: Context Chain Lookup ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                store = ReceiptStore(Path(tmp_dir))
+                receipts = [{"ref_tag": f"LOCUS-BENCH-{i:06d}", "timestamp": i, "payload": "x" * 256}
+                            for i in range(receipt_count)]
+                for start in range(0, receipt_count, 1000):
+                    store.append_many(receipts[start:start + 1000])
+                store.flush()
+
+                start_ref = f"LOCUS-BENCH-{receipt_count // 2:06d}"
+                end_ref = f"LOCUS-BENCH-{receipt_count // 2 + chain_length - 1:06d}"
+
+                start = time.perf_counter()
+                chain = list(store.iter_chain(start_ref, end_ref))
+                indexed_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                scanned = [receipt for _, receipt in store.iter_receipts()]
+                scan_ms = (time.perf_counter() - start) * 1000
+                store.close()
+
+            duration = time.time() - test_start
+            status = "PASS" if len(chain) == chain_length and indexed_ms < scan_ms else "FAIL"
+            self.log_benchmark_result("Context Chain Lookup", status, {
+                "receipts_stored": len(scanned),
+                "chain_length": len(chain),
+                "indexed_lookup_ms": f"{indexed_ms:.2f}",
+                "full_scan_ms": f"{scan_ms:.2f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Context Chain Lookup", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_chain_audit(self, receipt_count=50000, appended=100):
+        """Benchmark a chain audit resumed from a checkpoint against rehashing from genesis"""
+        print("\n=== Benchmark: Receipt Chain Audit ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                store = ReceiptStore(Path(tmp_dir))
+                receipts = [{"ref_tag": f"LOCUS-BENCH-{i:06d}", "timestamp": i, "payload": "x" * 256}
+                            for i in range(receipt_count + appended)]
+                for start in range(0, receipt_count, 1000):
+                    store.append_many(receipts[start:start + 1000])
+
+                start = time.perf_counter()
+                full = store.verify_chain(resume=False)
+                full_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                store.append_many(receipts[receipt_count:])
+                append_us = (time.perf_counter() - start) * 1e6 / appended
+
+                start = time.perf_counter()
+                resumed = store.verify_chain(resume=True)
+                resumed_ms = (time.perf_counter() - start) * 1000
+                store.close()
+
+            duration = time.time() - test_start
+            status = "PASS" if (full["valid"] and resumed["valid"] and resumed["verified"] == appended
+                                and resumed_ms < full_ms) else "FAIL"
+            self.log_benchmark_result("Receipt Chain Audit", status, {
+                "receipts_stored": receipt_count + appended,
+                "full_audit_ms": f"{full_ms:.2f}",
+                "resumed_audit_ms": f"{resumed_ms:.2f}",
+                "resumed_records_hashed": resumed["verified"],
+                "append_us_per_receipt": f"{append_us:.1f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Receipt Chain Audit", "FAIL", {
+                "error": str(e)
+            })
+
+    def verify_compaction_keeps_chain(self, ref_tags=200, duplicates=3, untagged=50):
+        """Check that compaction keeps every surviving chain link and still detects tampering afterwards"""
+        print("\n=== Verification: Receipt Compaction Keeps The Chain ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                store = ReceiptStore(Path(tmp_dir), segment_max_bytes=64 * 1024, checkpoint_interval=64)
+                receipts = [{"ref_tag": f"LOCUS-BENCH-{i % ref_tags:06d}", "timestamp": i, "payload": "x" * 128}
+                            for i in range(ref_tags * duplicates)]
+                receipts += [{"ref_tag": None, "timestamp": i} for i in range(untagged)]
+                # Re-appending one REF last leaves a tombstone between two survivors
+                receipts.append({"ref_tag": "LOCUS-BENCH-000100", "timestamp": len(receipts), "payload": "x" * 128})
+                store.append_many(receipts)
+                store.verify_chain()
+                tracker = ContextTracker(str(REPO_ROOT), receipt_dir=tmp_dir)
+                # The start REF's latest copy comes after the end REF's, its first one does not
+                duplicate_start_valid = tracker.validate_context_chain("LOCUS-BENCH-000010", "LOCUS-BENCH-000005")
+                head = store.chain_head
+                before = store.count()
+
+                start = time.perf_counter()
+                result = store.compact()
+                compact_ms = (time.perf_counter() - start) * 1000
+
+                reopened = ReceiptStore(Path(tmp_dir))
+                resumed = reopened.verify_chain(resume=True)
+                full = reopened.verify_chain(resume=False)
+                survivors = sum(1 for _ in reopened.iter_receipts())
+                after = reopened.count()
+                reopened._sync_tail()
+                head_kept = reopened.chain_head == head
+                across_tombstone_valid = tracker.validate_context_chain("LOCUS-BENCH-000099", "LOCUS-BENCH-000101")
+                tracker.receipt_store.close()
+
+                # Rewrite one surviving receipt with a valid frame: the untouched chain must expose it
+                location = reopened.lookup("LOCUS-BENCH-000007")
+                segment_path = reopened.segment_path(location.segment)
+                data = bytearray(segment_path.read_bytes())
+                original = data[location.offset:]
+                length = int.from_bytes(original[:4], "big")
+                payload = bytes(original[8:8 + length]).replace(b'"payload":"' + b"x" * 128,
+                                                                 b'"payload":"' + b"y" * 128)
+                data[location.offset:location.offset + 8 + length] = frame_record(payload)
+                segment_path.write_bytes(bytes(data))
+                tamper = ReceiptStore(Path(tmp_dir)).verify_chain(resume=False)
+                reopened.close()
+                store.close()
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                # Rebuild what a crash between the two segment renames leaves behind
+                live, compacted = Path(tmp_dir) / "live", Path(tmp_dir) / "compacted"
+                with ReceiptStore(live) as store:
+                    store.append_many(receipts)
+                shutil.copytree(live, compacted)
+                with ReceiptStore(compacted) as store:
+                    store.compact()
+                os.replace(live / "segments", live / "segments.retired")
+                shutil.copytree(compacted / "segments", live / "segments.compact" / "segments")
+                (live / ".compact_swap").touch()
+                with ReceiptStore(live) as store:
+                    swap = store.verify_chain(resume=False)
+                    swap_leftovers = sorted(path.name for path in live.iterdir() if path.name.startswith(("segments.", ".compact")))
+
+                # Without the marker a staged log is incomplete and must be discarded
+                (compacted / "segments.compact" / "segments").mkdir(parents=True)
+                with ReceiptStore(compacted) as store:
+                    staged = store.verify_chain(resume=False)
+                staging_removed = not (compacted / "segments.compact").exists()
+            crash_recovered = (swap["valid"] and swap["compacted"] == result["tombstones"] and not swap_leftovers
+                               and staged["valid"] and staging_removed)
+
+            duration = time.time() - test_start
+            correct = (resumed["valid"] and full["valid"] and head_kept
+                       and after == before
+                       and result["records_after"] == survivors == ref_tags + untagged
+                       and result["tombstones"] == ref_tags * (duplicates - 1) + 1
+                       and full["compacted"] == result["tombstones"]
+                       and duplicate_start_valid and across_tombstone_valid and crash_recovered
+                       and not tamper["valid"] and tamper["broken_at"] == location.seq)
+            self.log_benchmark_result("Receipt Compaction Keeps The Chain", "PASS" if correct else "FAIL", {
+                "receipts_before": result["records_before"],
+                "receipts_after": result["records_after"],
+                "untagged_kept": survivors - ref_tags,
+                "tombstones": result["tombstones"],
+                "chain_head_kept": head_kept,
+                "checkpoint_resume_valid": resumed["valid"],
+                "duplicate_start_valid": duplicate_start_valid,
+                "across_tombstone_valid": across_tombstone_valid,
+                "interrupted_swap_recovered": crash_recovered,
+                "tampering_detected_at": tamper["broken_at"],
+                "compact_ms": f"{compact_ms:.2f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Receipt Compaction Keeps The Chain", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_context_snapshot(self, iterations=200):
+        """Benchmark get_current_context with and without the snapshot cache"""
+        print("\n=== Benchmark: Context Snapshot Cache ===")
+        test_start = time.time()
+
+        try:
+            tracker = ContextTracker(str(REPO_ROOT))
+            cache = tracker.snapshot_cache
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                cache.invalidate()
+                tracker.get_current_context()
+            uncached_ms = (time.perf_counter() - start) * 1000 / iterations
+
+            tracker.get_current_context()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                tracker.get_current_context()
+            cached_ms = (time.perf_counter() - start) * 1000 / iterations
+
+            duration = time.time() - test_start
+            self.log_benchmark_result("Context Snapshot Cache", "PASS" if cached_ms < 1 else "FAIL", {
+                "uncached_ms_per_call": f"{uncached_ms:.3f}",
+                "cached_ms_per_call": f"{cached_ms:.3f}",
+                "ttl_seconds": cache.ttl,
+                "speedup": f"{uncached_ms / cached_ms:.0f}x"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Context Snapshot Cache", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_batched_capture(self, total_events=2000, batch_sizes=(1, 10, 100, 1000)):
+        """Benchmark capture throughput at several batch sizes, inline and buffered"""
+        print("\n=== Benchmark: Batched Context Capture ===")
+        test_start = time.time()
+
+        try:
+            details = {}
+            rates = {}
+            for buffered in (False, True):
+                mode = "buffered" if buffered else "inline"
+                for batch_size in batch_sizes:
+                    with tempfile.TemporaryDirectory() as tmp_dir:
+                        tracker = ContextTracker(str(REPO_ROOT), receipt_dir=tmp_dir, buffered=buffered)
+                        events = [{"action": "job", "trigger": "benchmark", "changes": {"step": i}}
+                                  for i in range(total_events)]
+
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            start = time.perf_counter()
+                            for offset in range(0, total_events, batch_size):
+                                tracker.capture_context_events(events[offset:offset + batch_size])
+                            tracker.flush()
+                            elapsed = time.perf_counter() - start
+
+                        stored = tracker.receipt_store.count()
+                        if tracker.receipt_writer is not None:
+                            tracker.receipt_writer.close()
+                        tracker.receipt_store.close()
+
+                    if stored != total_events:
+                        raise AssertionError(f"{mode} batch {batch_size}: stored {stored} of {total_events}")
+                    rates[(mode, batch_size)] = total_events / elapsed
+                    details[f"{mode}_batch_{batch_size}_events_per_sec"] = f"{rates[(mode, batch_size)]:.0f}"
+
+            duration = time.time() - test_start
+            largest, smallest = max(batch_sizes), min(batch_sizes)
+            status = "PASS" if rates[("inline", largest)] > rates[("inline", smallest)] else "FAIL"
+            self.log_benchmark_result("Batched Context Capture", status, details, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Batched Context Capture", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_canonical_encoding(self, events=2000):
+        """Profile per-capture serialisation: legacy json.dumps passes vs the shared canonical encoding"""
+        print("\n=== Benchmark: Canonical Event Encoding ===")
+        test_start = time.time()
+
+        try:
+            tracker = ContextTracker(str(REPO_ROOT))
+            context_before = tracker.get_current_context()
+            changes = [{"phase": f"step-{i}", "new_capabilities": ["bench"]} for i in range(events)]
+
+            def legacy_capture(change):
+                # Serialisation passes of the original capture path
+                context_after = tracker.apply_changes(context_before, change)
+                context_hash = hashlib.sha256(json.dumps(context_after, sort_keys=True).encode()).hexdigest()[:8]
+                event = {"ref_tag": "LOCUS-BENCH-001", "timestamp": 0, "trigger": "benchmark",
+                         "context_before": context_before, "changes": change,
+                         "context_after": context_after, "hash": context_hash, "receipt_id": "CTX-BENCH"}
+                hashlib.sha256(f"0:{json.dumps(event, sort_keys=True)}:node".encode()).hexdigest()
+                receipt = {"ref_tag": event["ref_tag"], "prior_state": context_before, "current_state": context_after}
+                hashlib.sha256(json.dumps(receipt, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+                json.dumps(receipt, separators=(",", ":")).encode()
+
+            def canonical_capture(change):
+                event = tracker.build_context_event("LOCUS-BENCH-001", "benchmark", context_before, change,
+                                                    before_encoded)
+                link_receipt(tracker.build_context_receipt(event), "0" * 64)
+
+            def profile(capture):
+                start = time.perf_counter()
+                for change in changes:
+                    capture(change)
+                elapsed_us = (time.perf_counter() - start) * 1e6 / events
+
+                # Profiled separately so its per-call overhead does not skew the timing
+                profiler = cProfile.Profile()
+                profiler.enable()
+                for change in changes:
+                    capture(change)
+                profiler.disable()
+                stats = pstats.Stats(profiler)
+                encode_seconds = sum(
+                    total for (_, _, name), (_, _, total, *_rest) in stats.stats.items()
+                    if name in ("iterencode", "<orjson.dumps>")
+                    or name.startswith("<built-in method _json.")
+                )
+                return elapsed_us, encode_seconds * 1e6 / events
+
+            details = {}
+            legacy_us, legacy_encode_us = profile(legacy_capture)
+            details["legacy_us_per_event"] = f"{legacy_us:.1f}"
+            details["legacy_profiled_encode_us_per_event"] = f"{legacy_encode_us:.1f}"
+
+            before_encoded = canonical.dumps(context_before)
+            canonical_us, canonical_encode_us = profile(canonical_capture)
+            details["canonical_us_per_event"] = f"{canonical_us:.1f}"
+            details["canonical_profiled_encode_us_per_event"] = f"{canonical_encode_us:.1f}"
+
+            # Hash bytes must not depend on optional packages: verify on an interpreter without orjson
+            _, payload = link_receipt({"ref_tag": "LOCUS-BENCH-001", "values": [1e-05, 1e+16, 1.5e-07]}, "0" * 64)
+            verifier = subprocess.run(
+                [sys.executable, "-c",
+                 "import json, sys; sys.modules['orjson'] = None; "
+                 f"sys.path.insert(0, {str(REPO_ROOT / 'automation' / 'scripts')!r}); "
+                 "from receipt_store import verify_link; "
+                 "print(verify_link(json.loads(sys.stdin.read())))"],
+                input=payload.decode(), capture_output=True, text=True
+            )
+            portable = verifier.stdout.strip() == "True"
+            details["verifies_without_orjson"] = portable
+
+            duration = time.time() - test_start
+            status = "PASS" if canonical_us < legacy_us and portable else "FAIL"
+            self.log_benchmark_result("Canonical Event Encoding", status, details, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Canonical Event Encoding", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_delta_snapshots(self, events=1000):
+        """Compare receipt log size with full and delta-encoded context snapshots"""
+        print("\n=== Benchmark: Delta-Encoded Snapshots ===")
+        test_start = time.time()
+
+        try:
+            sizes = {}
+            for delta in (False, True):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    tracker = ContextTracker(str(REPO_ROOT), receipt_dir=tmp_dir, delta_snapshots=delta)
+                    batch = [{"action": "job", "trigger": "benchmark", "changes": {"phase": f"step-{i}"}}
+                             for i in range(events)]
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        captured = tracker.capture_context_events(batch)
+                    tracker.flush()
+
+                    store = tracker.receipt_store
+                    sizes[delta] = sum(store.segment_path(sid).stat().st_size for sid in store.segment_ids())
+                    sizes[delta] += sum(path.stat().st_size for path in store.snapshots.base_dir.rglob("*.json"))
+
+                    if delta:
+                        start = time.perf_counter()
+                        rehydrated = [tracker.get_receipt(event["ref_tag"]) for event in captured[:100]]
+                        rehydrate_us = (time.perf_counter() - start) * 1e6 / len(rehydrated)
+                        intact = all(
+                            receipt["generation_context"]["current_state"]["phase"] == event["changes"]["phase"]
+                            for receipt, event in zip(rehydrated, captured)
+                        )
+                    store.close()
+
+            duration = time.time() - test_start
+            status = "PASS" if intact and sizes[True] < sizes[False] else "FAIL"
+            self.log_benchmark_result("Delta-Encoded Snapshots", status, {
+                "events": events,
+                "full_bytes_per_receipt": sizes[False] // events,
+                "delta_bytes_per_receipt": sizes[True] // events,
+                "size_reduction": f"{sizes[False] / sizes[True]:.1f}x",
+                "rehydrate_us_per_receipt": f"{rehydrate_us:.1f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Delta-Encoded Snapshots", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_resource_sampler(self, checks=1000, fill_seconds=1.0):
+        """Benchmark sampled resource checks against the blocking psutil check they replace"""
+        print("\n=== Benchmark: Resource Sampler ===")
+        test_start = time.time()
+
+        try:
+            import psutil
+
+            # The original check blocked on cpu_percent(interval=1) every time
+            start = time.perf_counter()
+            psutil.virtual_memory()
+            psutil.cpu_percent(interval=1)
+            psutil.cpu_count()
+            blocking_ms = (time.perf_counter() - start) * 1000
+
+            sampler = ResourceSampler(interval=0.1, buffer_seconds=30)
+            tracker = PrincipleTracker(sampler=sampler)
+            start = time.perf_counter()
+            tracker.check_resource_constraints()
+            first_check_ms = (time.perf_counter() - start) * 1000
+
+            time.sleep(fill_seconds)
+            timings = []
+            for _ in range(checks):
+                start = time.perf_counter()
+                tracker.check_resource_constraints()
+                timings.append((time.perf_counter() - start) * 1000000)
+            sampler.stop()
+            timings.sort()
+            window = sampler.stats("cpu_cores_used", tracker.resource_window)
+
+            duration = time.time() - test_start
+            median_us = timings[len(timings) // 2]
+            status = "PASS" if median_us < 1000 and first_check_ms < blocking_ms else "FAIL"
+            self.log_benchmark_result("Resource Sampler", status, {
+                "blocking_check_ms": f"{blocking_ms:.0f}",
+                "first_sampled_check_ms": f"{first_check_ms:.0f}",
+                "sampled_check_median_us": f"{median_us:.1f}",
+                "sampled_check_p99_us": f"{timings[int(len(timings) * 0.99)]:.1f}",
+                "window_samples": window["samples"] if window else 0,
+                "checks": checks
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Resource Sampler", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_process_accounting(self, samples=50, hog_mb=512):
+        """Benchmark /proc and cgroup accounting against psutil and check it blames the right agent"""
+        print("\n=== Benchmark: Process Accounting ===")
+        test_start = time.time()
+
+        hog = None
+        try:
+            import psutil
+
+            # An agent that holds hog_mb of memory and spins one core
+            hog = subprocess.Popen(
+                [sys.executable, "-c", f"data = bytearray({hog_mb} * 1024 * 1024)\nwhile True: pass"],
+                env=dict(os.environ, LOCUS_AGENT="bench_hog")
+            )
+            time.sleep(1.0)
+
+            accounting = LocusAccounting()
+            accounting.sample()
+            start = time.perf_counter()
+            for _ in range(samples):
+                time.sleep(0.02)
+                usage = accounting.sample()
+            accounting_ms = (time.perf_counter() - start) * 1000 / samples - 20
+
+            start = time.perf_counter()
+            for _ in range(samples):
+                time.sleep(0.02)
+                psutil.virtual_memory()
+                for proc in psutil.process_iter(['memory_info', 'cpu_times', 'environ']):
+                    pass
+            psutil_ms = (time.perf_counter() - start) * 1000 / samples - 20
+
+            # Whole sampler samples: host psutil figures every sample vs every host_interval
+            sampler_ms = {}
+            for host_interval in (0.0, 30.0):
+                sampler = ResourceSampler(interval=0.1, accounting=LocusAccounting(), host_interval=host_interval)
+                sampler.sample_once()
+                start = time.perf_counter()
+                for _ in range(samples):
+                    sampler.sample_once()
+                sampler_ms[host_interval] = (time.perf_counter() - start) * 1000 / samples
+
+            hog_usage = next((agent for agent in usage.agents if agent.agent == "bench_hog"), None)
+
+            # A limit below the hog's footprint must produce a violation naming it
+            with open(PrincipleTracker().config_file, 'r') as f:
+                constitution = json.load(f)
+            constitution["principles"]["resource_constraint_enforcement"]["core_machine_memory_limit"] = \
+                f"{hog_mb / 1024 / 2}GB"
+            with tempfile.NamedTemporaryFile('w', suffix=".json") as config:
+                json.dump(constitution, config)
+                config.flush()
+                sampler = ResourceSampler(interval=0.1, buffer_seconds=30, accounting=LocusAccounting())
+                tracker = PrincipleTracker(config.name, sampler=sampler)
+                tracker.check_resource_constraints()
+                time.sleep(0.5)
+                violations = tracker.check_resource_constraints()
+                sampler.stop()
+            memory_violation = next((v for v in violations if v["resource"] == "memory"), {})
+
+            duration = time.time() - test_start
+            attributed = hog_usage is not None and hog_usage.rss >= hog_mb * 1024 * 1024 * 0.9 \
+                and hog_usage.cpu_cores > 0.5
+            status = "PASS" if attributed and memory_violation.get("offender") == "bench_hog" \
+                and accounting_ms < psutil_ms and sampler_ms[30.0] < sampler_ms[0.0] else "FAIL"
+            self.log_benchmark_result("Process Accounting", status, {
+                "scope": usage.scope,
+                "scope_memory_gb": f"{usage.memory_bytes / 1024**3:.2f}",
+                "host_memory_gb": f"{psutil.virtual_memory().used / 1024**3:.2f}",
+                "hog_rss_mb": f"{hog_usage.rss / 1024**2:.0f}" if hog_usage else "missing",
+                "hog_cpu_cores": f"{hog_usage.cpu_cores:.2f}" if hog_usage else "missing",
+                "violation_offender": memory_violation.get("offender"),
+                "accounting_sample_ms": f"{accounting_ms:.2f}",
+                "psutil_sample_ms": f"{psutil_ms:.2f}",
+                "scoped_sampler_with_host_psutil_ms": f"{sampler_ms[0.0]:.2f}",
+                "scoped_sampler_ms": f"{sampler_ms[30.0]:.2f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Process Accounting", "FAIL", {
+                "error": str(e)
+            })
+        finally:
+            if hog is not None:
+                hog.kill()
+                hog.wait()
+
+    def benchmark_event_monitor(self, events=20, idle_seconds=3.0):
+        """Benchmark violation detection latency and idle CPU of the event-driven principle monitor"""
+        print("\n=== Benchmark: Event-Driven Principle Monitor ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                sampler = ResourceSampler(interval=1.0, buffer_seconds=30, accounting=LocusAccounting())
+                tracker = PrincipleTracker(sampler=sampler, log_dir=tmp_dir)
+                detected = {}
+                checked = threading.Event()
+
+                def on_check(check_result):
+                    for violation in check_result["violations"]:
+                        detected.setdefault(violation.get("file"), time.perf_counter())
+                    checked.set()
+
+                monitor = PrincipleEventMonitor(tracker, on_check=on_check)
+                thread = threading.Thread(target=monitor.run, daemon=True)
+                thread.start()
+                checked.wait(10)
+
+                # Idle: no events, only the background sampler
+                cpu_start = time.process_time()
+                time.sleep(idle_seconds)
+                idle_cpu_percent = (time.process_time() - cpu_start) / idle_seconds * 100
+
+                latencies = []
+                for i in range(events):
+                    path = Path(tmp_dir) / f"locus_emergency_bench_{i:03d}.json"
+                    written = time.perf_counter()
+                    with open(path, 'w') as f:
+                        json.dump({"ref_tag": f"LOCUS-BENCH-{i:03d}", "human_approval_received": False}, f)
+                    deadline = time.time() + 5
+                    while str(path) not in detected and time.time() < deadline:
+                        time.sleep(0.0005)
+                    if str(path) in detected:
+                        latencies.append((detected[str(path)] - written) * 1000)
+
+                monitor.stop()
+                thread.join(5)
+                monitor.close()
+                sampler.stop()
+
+            duration = time.time() - test_start
+            latencies.sort()
+            median_ms = latencies[len(latencies) // 2] if latencies else float("inf")
+            status = "PASS" if len(latencies) == events and median_ms < 100 and idle_cpu_percent < 5 else "FAIL"
+            self.log_benchmark_result("Event-Driven Principle Monitor", status, {
+                "polling_worst_case_latency_ms": tracker.check_interval * 1000,
+                "violations_detected": f"{len(latencies)}/{events}",
+                "detection_latency_median_ms": f"{median_ms:.2f}",
+                "detection_latency_max_ms": f"{latencies[-1]:.2f}" if latencies else "n/a",
+                "idle_cpu_percent": f"{idle_cpu_percent:.2f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Event-Driven Principle Monitor", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_transparency_scan(self, log_count=20000, appended=100, workers=8):
+        """Benchmark incremental transparency scanning against validating every decision log"""
+        print("\n=== Benchmark: Transparency Scanner ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                log_dir = Path(tmp_dir)
+                expected = {"missing_ref_tag": 0, "invalid_log_format": 0}
+
+                def write_logs(start, count):
+                    for i in range(start, start + count):
+                        path = log_dir / f"locus_decision_{i:06d}.json"
+                        if i % 200 == 7:
+                            path.write_text('{"ref_tag": "LOCUS-BENCH-')
+                            expected["invalid_log_format"] += 1
+                        elif i % 100 == 3:
+                            path.write_text(json.dumps({"decision": "bench", "reasoning": "x" * 200}))
+                            expected["missing_ref_tag"] += 1
+                        else:
+                            path.write_text(json.dumps({"ref_tag": f"LOCUS-BENCH-{i:06d}", "reasoning": "x" * 200}))
+
+                write_logs(0, log_count)
+
+                # Legacy check: glob the directory and open the first three files
+                start = time.perf_counter()
+                for log_file in list(log_dir.glob("locus_*_*.json"))[:3]:
+                    validate_decision_log(log_file)
+                legacy_ms = (time.perf_counter() - start) * 1000
+
+                # Validating every file serially, what a complete non-incremental check costs
+                start = time.perf_counter()
+                full = [validate_decision_log(path) for path in log_dir.glob("locus_*_*.json")]
+                full_ms = (time.perf_counter() - start) * 1000
+
+                serial = TransparencyScanner(log_dir, workers=1)
+                serial.cursor_path = log_dir / ".serial_cursor.db"
+                start = time.perf_counter()
+                serial.scan()
+                first_serial_ms = (time.perf_counter() - start) * 1000
+                serial.close()
+
+                scanner = TransparencyScanner(log_dir, workers=workers)
+                start = time.perf_counter()
+                first = scanner.scan()
+                first_parallel_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                idle = scanner.scan()
+                idle_ms = (time.perf_counter() - start) * 1000
+
+                write_logs(log_count, appended)
+                start = time.perf_counter()
+                delta = scanner.scan()
+                delta_ms = (time.perf_counter() - start) * 1000
+                scanner.close()
+
+            duration = time.time() - test_start
+            full_counts = {issue: full.count(issue) for issue in expected}
+            correct = (first.validated == log_count and idle.validated == 0 and delta.validated == appended
+                       and delta.counts == expected and full_counts == {issue: count for issue, count in
+                                                                        first.counts.items()})
+            status = "PASS" if correct and delta_ms < full_ms / 2 else "FAIL"
+            self.log_benchmark_result("Transparency Scanner", status, {
+                "decision_logs": log_count + appended,
+                "legacy_glob_first_three_ms": f"{legacy_ms:.2f}",
+                "full_validation_ms": f"{full_ms:.2f}",
+                "first_scan_serial_ms": f"{first_serial_ms:.2f}",
+                f"first_scan_{scanner.workers}_workers_ms": f"{first_parallel_ms:.2f}",
+                "idle_rescan_ms": f"{idle_ms:.2f}",
+                f"rescan_after_{appended}_new_ms": f"{delta_ms:.2f}",
+                "speedup_vs_full_validation": f"{full_ms / delta_ms:.1f}x",
+                "missing_ref_tag": delta.counts["missing_ref_tag"],
+                "invalid_log_format": delta.counts["invalid_log_format"],
+                "counts_match": correct
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Transparency Scanner", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_emergency_ledger(self, emergencies=10000, pending=100, checks=20):
+        """Benchmark indexed expert-authority checks against re-reading every emergency record"""
+        print("\n=== Benchmark: Emergency Approval Ledger ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                log_dir = Path(tmp_dir)
+                for i in range(emergencies):
+                    record = {"ref_tag": f"LOCUS-BENCH-{i:06d}", "reason": "benchmark",
+                              "human_approval_required": True, "human_approval_received": i >= pending}
+                    (log_dir / f"locus_emergency_halt_{i:06d}.json").write_text(json.dumps(record))
+
+                # Legacy check: glob and parse every emergency record
+                start = time.perf_counter()
+                legacy_pending = sum(1 for path in log_dir.glob("locus_emergency_*.json")
+                                     if not read_emergency(path).get("human_approval_received"))
+                legacy_ms = (time.perf_counter() - start) * 1000
+
+                ledger = EmergencyLedger(log_dir, approval_timeout=300)
+                start = time.perf_counter()
+                first = ledger.reconcile()
+                first_ms = (time.perf_counter() - start) * 1000
+
+                # A shared log directory like /tmp changes constantly; a check must not notice
+                repeated = 0
+                steady = 0.0
+                for i in range(checks):
+                    (log_dir / f"unrelated_{i:03d}.tmp").write_text("churn")
+                    start = time.perf_counter()
+                    repeated += len(ledger.check())
+                    steady += time.perf_counter() - start
+                steady_ms = steady * 1000 / checks
+
+                # Approve half the pending emergencies in place
+                approved_names = [f"locus_emergency_halt_{i:06d}.json" for i in range(0, pending, 2)]
+                for name in approved_names:
+                    path = log_dir / name
+                    record = read_emergency(path)
+                    record["human_approval_received"] = True
+                    path.write_text(json.dumps(record))
+                start = time.perf_counter()
+                retired = ledger.check()
+                approval_ms = (time.perf_counter() - start) * 1000
+
+                escalated = ledger.check(now=time.time() + 301)
+                escalated_again = ledger.check(now=time.time() + 302)
+
+                # New records: one reported by the watcher, one only a reconciliation finds
+                record = {"ref_tag": "LOCUS-BENCH-NEW", "human_approval_received": False}
+                (log_dir / "locus_emergency_halt_watched.json").write_text(json.dumps(record))
+                (log_dir / "locus_emergency_halt_missed.json").write_text(json.dumps(record))
+                observed = ledger.observe(["locus_emergency_halt_watched.json"])
+                unseen = ledger.check()
+                reconciled = ledger.reconcile()
+
+                # A second tracker process rebuilds the same index from the log without re-reporting
+                other = EmergencyLedger(log_dir, approval_timeout=300)
+                start = time.perf_counter()
+                other_transitions = other.reconcile()
+                replay_ms = (time.perf_counter() - start) * 1000
+                ledger_bytes = ledger.ledger_path.stat().st_size
+
+            duration = time.time() - test_start
+            correct = (legacy_pending == pending
+                       and sum(1 for t in first if t.state != APPROVED) == pending
+                       and repeated == 0
+                       and sorted(t.name for t in retired if t.state == APPROVED) == approved_names
+                       and sum(1 for t in escalated if t.state == ESCALATED) == pending - len(approved_names)
+                       and not escalated_again and not other_transitions
+                       and [t.name for t in observed] == ["locus_emergency_halt_watched.json"] and not unseen
+                       and [t.name for t in reconciled] == ["locus_emergency_halt_missed.json"]
+                       and len(other.pending) == pending - len(approved_names) + 2)
+            status = "PASS" if correct and steady_ms < legacy_ms / 10 else "FAIL"
+            self.log_benchmark_result("Emergency Approval Ledger", status, {
+                "emergency_records": emergencies,
+                "pending_approvals": pending,
+                "legacy_check_ms": f"{legacy_ms:.2f}",
+                "first_check_ms": f"{first_ms:.2f}",
+                "steady_check_ms": f"{steady_ms:.3f}",
+                f"check_after_{len(approved_names)}_approvals_ms": f"{approval_ms:.2f}",
+                "reconcile_in_new_process_ms": f"{replay_ms:.2f}",
+                "ledger_bytes": ledger_bytes,
+                "re_reported": repeated + len(escalated_again) + len(other_transitions),
+                "transitions_correct": correct
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Emergency Approval Ledger", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_health_counters(self, audit_lines=1000000, appended=100):
+        """Benchmark incremental audit-log counting against reading the whole log"""
+        print("\n=== Benchmark: Health Counters ===")
+        test_start = time.time()
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                log_path = Path(tmp_dir) / "locus_ref_audit.log"
+                line = "2025-09-11T00:00:00+00:00: Generated REF tag LOCUS-JOB20250911-000000-001 benchmark\n"
+                with open(log_path, "w") as f:
+                    for _ in range(audit_lines // 1000):
+                        f.write(line * 1000)
+
+                start = time.perf_counter()
+                with open(log_path, "r") as f:
+                    full_count = len(f.readlines())
+                readlines_ms = (time.perf_counter() - start) * 1000
+
+                counters = HealthCounters(log_path, Path(tmp_dir))
+                start = time.perf_counter()
+                counters.refresh()
+                first_ms = (time.perf_counter() - start) * 1000
+
+                with open(log_path, "a") as f:
+                    f.write(line * appended)
+                start = time.perf_counter()
+                counts = counters.refresh()
+                incremental_ms = (time.perf_counter() - start) * 1000
+
+            duration = time.time() - test_start
+            status = "PASS" if (counts["audit_entries"] == full_count + appended
+                                and incremental_ms < readlines_ms) else "FAIL"
+            self.log_benchmark_result("Health Counters", status, {
+                "audit_entries": counts["audit_entries"],
+                "readlines_ms": f"{readlines_ms:.2f}",
+                "first_chunked_count_ms": f"{first_ms:.2f}",
+                "incremental_count_ms": f"{incremental_ms:.3f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Health Counters", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_heartbeat_sync(self, agent_count=1000, reports=1000):
+        """Benchmark per-report agent synchronization over a cached heartbeat table"""
+        print("\n=== Benchmark: Heartbeat Synchronization ===")
+        test_start = time.time()
+
+        try:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            agents = {
+                f"agent_{i:04d}": {
+                    "heartbeat_interval": 60,
+                    # Every tenth agent is five minutes behind, the rest heartbeated just now
+                    "last_heartbeat": (now - datetime.timedelta(seconds=300 if i % 10 == 0 else 5)).isoformat()
+                }
+                for i in range(agent_count)
+            }
+            table = HeartbeatTable()
+
+            start = time.perf_counter()
+            for _ in range(reports):
+                table.load(agents)
+                sync = table.synchronization(table.sample())
+            report_us = (time.perf_counter() - start) * 1e6 / reports
+
+            start = time.perf_counter()
+            percentiles = table.lag_percentiles()
+            percentile_ms = (time.perf_counter() - start) * 1000
+
+            duration = time.time() - test_start
+            status = "PASS" if sync == 90.0 and len(percentiles) == agent_count else "FAIL"
+            self.log_benchmark_result("Heartbeat Synchronization", status, {
+                "agents": agent_count,
+                "agent_synchronization": f"{sync}%",
+                "us_per_report": f"{report_us:.1f}",
+                "lag_percentiles_ms": f"{percentile_ms:.2f}"
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Heartbeat Synchronization", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_context_daemon(self, requests=500, cli_runs=5):
+        """Benchmark capture latency through a warm context daemon vs cold CLI invocations"""
+        print("\n=== Benchmark: Context Daemon ===")
+        test_start = time.time()
+
+        try:
+            toolkit = REPO_ROOT / "automation" / "scripts" / "context_toolkit.py"
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                socket_path = Path(tmp_dir) / "context.sock"
+                tracker = ContextTracker(str(REPO_ROOT), receipt_dir=str(Path(tmp_dir) / "receipts"))
+                daemon = ContextDaemon(tracker, socket_path)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    server = threading.Thread(target=daemon.serve_forever, daemon=True)
+                    server.start()
+                    client = DaemonClient(socket_path)
+                    while client.request("ping") is None:
+                        time.sleep(0.01)
+
+                start = time.perf_counter()
+                for i in range(requests):
+                    response = client.request("capture", action="job", trigger="benchmark", changes={"step": i})
+                    if not response["ok"]:
+                        raise AssertionError(response["error"])
+                warm_ms = (time.perf_counter() - start) * 1000 / requests
+
+                def cli_ms(*flags):
+                    env = dict(os.environ, LOCUS_CONTEXT_SOCKET=str(socket_path))
+                    start = time.perf_counter()
+                    for _ in range(cli_runs):
+                        subprocess.run([sys.executable, str(toolkit), "job", *flags], env=env,
+                                       check=True, stdout=subprocess.DEVNULL)
+                    return (time.perf_counter() - start) * 1000 / cli_runs
+
+                daemon_cli_ms = cli_ms()
+                cold_cli_ms = cli_ms("--no-daemon")
+
+                client.request("shutdown")
+                server.join(timeout=10)
+                stored = tracker.receipt_store.count() if not server.is_alive() else None
+
+            duration = time.time() - test_start
+            status = "PASS" if stored == requests + cli_runs and warm_ms < cold_cli_ms else "FAIL"
+            self.log_benchmark_result("Context Daemon", status, {
+                "warm_request_ms": f"{warm_ms:.2f}",
+                "cli_via_daemon_ms": f"{daemon_cli_ms:.1f}",
+                "cli_in_process_ms": f"{cold_cli_ms:.1f}",
+                "receipts_via_daemon": stored
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Context Daemon", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_async_capture(self, events=200, queue_size=32):
+        """Benchmark uncached captures: serial sync API vs concurrent AsyncContextTracker"""
+        print("\n=== Benchmark: Async Context Capture ===")
+        test_start = time.time()
+
+        try:
+            # A zero TTL makes every capture that finds the cache cold fork git
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tracker = ContextTracker(str(REPO_ROOT), context_ttl=0, receipt_dir=tmp_dir)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    for i in range(events):
+                        tracker.capture_context_event("job", "benchmark", {"step": i})
+                    tracker.flush()
+                    sync_elapsed = time.perf_counter() - start
+                tracker.receipt_store.close()
+
+            async def capture_concurrently(async_tracker):
+                async with async_tracker:
+                    start = time.perf_counter()
+                    await asyncio.gather(*[
+                        async_tracker.capture_context_event("job", "benchmark", {"step": i})
+                        for i in range(events)
+                    ])
+                    await async_tracker.flush()
+                    return time.perf_counter() - start
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                async_tracker = AsyncContextTracker(project_path=str(REPO_ROOT), context_ttl=0,
+                                                    receipt_dir=tmp_dir, queue_size=queue_size)
+                # Delta base snapshots must be written off the event loop thread
+                snapshots = async_tracker.tracker.receipt_store.snapshots
+                write_snapshot = snapshots.write
+                write_threads = set()
+
+                def tracked_write(digest, encoded):
+                    write_threads.add(threading.current_thread() is threading.main_thread())
+                    write_snapshot(digest, encoded)
+
+                snapshots.write = tracked_write
+                with contextlib.redirect_stdout(io.StringIO()):
+                    async_elapsed = asyncio.run(capture_concurrently(async_tracker))
+                store = async_tracker.tracker.receipt_store
+                stored = store.count()
+                chain = store.verify_chain(resume=False)
+                # A fresh store has no cache, so every referenced snapshot must be on disk
+                on_disk = SnapshotStore(snapshots.base_dir)
+                rehydrated = all("prior_state" in rehydrate_receipt(receipt, on_disk)["generation_context"]
+                                 for _, receipt in store.iter_receipts())
+                store.close()
+
+            duration = time.time() - test_start
+            snapshot_writes_off_loop = write_threads == {False}
+            status = "PASS" if (stored == events and chain["valid"] and rehydrated and snapshot_writes_off_loop
+                                and async_elapsed < sync_elapsed) else "FAIL"
+            self.log_benchmark_result("Async Context Capture", status, {
+                "events": events,
+                "queue_size": queue_size,
+                "sync_events_per_sec": f"{events / sync_elapsed:.0f}",
+                "async_events_per_sec": f"{events / async_elapsed:.0f}",
+                "speedup": f"{sync_elapsed / async_elapsed:.1f}x",
+                "chain_valid": chain["valid"],
+                "snapshot_writes_off_loop": snapshot_writes_off_loop,
+                "receipts_rehydrated": rehydrated
+            }, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Async Context Capture", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_import_time(self, runs=5):
+        """Check entry point import time and CLI start-up against the committed budget"""
+        print("\n=== Benchmark: Entry Point Import Time ===")
+        test_start = time.time()
+
+        try:
+            budget = json.loads(IMPORT_BUDGET_PATH.read_text())
+            # Let the interpreter cache bytecode so repeated runs measure a warm start
+            env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+            details = {}
+            over_budget = []
+
+            for script, limits in budget["imports"].items():
+                path = REPO_ROOT / script
+                command = [sys.executable, "-X", "importtime", "-c", f"import {path.stem}"]
+                best_us, imported = None, set()
+                for _ in range(runs + 1):
+                    result = subprocess.run(command, cwd=path.parent, env=env, capture_output=True, text=True, check=True)
+                    # Lines read "import time: self | cumulative | name"; the last one is the module itself
+                    rows = [line.split("|") for line in result.stderr.splitlines() if line.startswith("import time:")]
+                    imported = {row[2].strip() for row in rows[1:]}
+                    cumulative = int(rows[-1][1])
+                    best_us = cumulative if best_us is None else min(best_us, cumulative)
+
+                eager = sorted(set(limits["deferred"]) & imported)
+                import_ms = best_us / 1000
+                if import_ms > limits["budget_ms"] or eager:
+                    over_budget.append(script)
+                details[f"{path.stem}_import_ms"] = f"{import_ms:.1f} (budget {limits['budget_ms']})"
+                if eager:
+                    details[f"{path.stem}_eager_imports"] = ", ".join(eager)
+
+            for invocation, budget_ms in budget["cli_wall_ms"].items():
+                script, *args = invocation.split()
+                command = [sys.executable, str(REPO_ROOT / script), *args]
+                timings = []
+                for _ in range(runs + 1):
+                    start = time.perf_counter()
+                    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    timings.append((time.perf_counter() - start) * 1000)
+                wall_ms = min(timings[1:])
+                if wall_ms > budget_ms:
+                    over_budget.append(invocation)
+                details[f"{' '.join([Path(script).name, *args])}_ms"] = f"{wall_ms:.0f} (budget {budget_ms})"
+
+            duration = time.time() - test_start
+            if over_budget:
+                details["over_budget"] = over_budget
+            self.log_benchmark_result("Entry Point Import Time", "FAIL" if over_budget else "PASS", details, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Entry Point Import Time", "FAIL", {
+                "error": str(e)
+            })
+
+    def benchmark_handover_index(self, sizes=(10_000, 1_000_000), ops=500, legacy_ops=20):
+        """Benchmark per-operation handover index latency at several index sizes"""
+        print("\n=== Benchmark: Handover Index ===")
+        test_start = time.time()
+
+        try:
+            details = {}
+            create_us = {}
+            for size in sizes:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    index = HandoverIndex(Path(tmp_dir) / "handover_index.db")
+                    for offset in range(0, size, 50_000):
+                        index.upsert_many(_synthetic_handover(i) for i in range(offset, min(size, offset + 50_000)))
+
+                    new = [_synthetic_handover(size + i) for i in range(ops)]
+                    timings = {}
+                    start = time.perf_counter()
+                    for entry in new:
+                        index.upsert(entry)
+                    timings["create"] = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    for entry in new:
+                        index.upsert(dict(entry, status="completed"))
+                    timings["complete"] = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    for entry in new:
+                        index.get(entry["ref_tag"])
+                    timings["lookup"] = time.perf_counter() - start
+
+                    start = time.perf_counter()
+                    for entry in new:
+                        index.list(status="pending", to_agent=entry["to_agent"])
+                    timings["list_pending"] = time.perf_counter() - start
+
+                    if index.count() != size + ops:
+                        raise AssertionError(f"index holds {index.count()} of {size + ops} handovers")
+                    index.close()
+
+                for op, elapsed in timings.items():
+                    details[f"{op}_us_at_{size}"] = f"{elapsed * 1e6 / ops:.0f}"
+                create_us[size] = timings["create"] * 1e6 / ops
+
+            # The JSON index rewrote every entry per operation; only the smallest size is practical
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                index_file = Path(tmp_dir) / "handover_index.json"
+                with open(index_file, 'w') as f:
+                    json.dump({"handovers": [_synthetic_handover(i) for i in range(sizes[0])]}, f, indent=2)
+                start = time.perf_counter()
+                for i in range(legacy_ops):
+                    _legacy_handover_index_update(index_file, _synthetic_handover(sizes[0] + i))
+                legacy_us = (time.perf_counter() - start) * 1e6 / legacy_ops
+            details[f"legacy_json_create_us_at_{sizes[0]}"] = f"{legacy_us:.0f}"
+
+            duration = time.time() - test_start
+            # Creation must stay flat as the index grows and beat the JSON rewrite
+            flat = create_us[sizes[-1]] < create_us[sizes[0]] * 5
+            status = "PASS" if flat and create_us[sizes[0]] < legacy_us else "FAIL"
+            self.log_benchmark_result("Handover Index", status, details, duration)
+
+        except Exception as e:
+            self.log_benchmark_result("Handover Index", "FAIL", {
+                "error": str(e)
+            })
+
+    def generate_report(self):
+        """Generate final benchmark report"""
+        total_benchmarks = len(self.benchmark_results)
+        passed_benchmarks = len([r for r in self.benchmark_results if r["status"] == "PASS"])
+        total_duration = (datetime.datetime.now() - self.start_time).total_seconds()
+
+        report = {
+            "test_type": "performance_benchmark",
+            "timestamp": datetime.datetime.now().isoformat(),
+            "summary": {
+                "total_benchmarks": total_benchmarks,
+                "passed_benchmarks": passed_benchmarks,
+                "failed_benchmarks": total_benchmarks - passed_benchmarks,
+                "success_rate": f"{(passed_benchmarks / total_benchmarks * 100):.1f}%" if total_benchmarks > 0 else "0%",
+                "total_duration": f"{total_duration:.2f}s"
+            },
+            "benchmark_results": self.benchmark_results
+        }
+
+        report_file = f"/tmp/locus_performance_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\n=== Performance Benchmark Report ===")
+        print(f"Benchmarks Passed: {passed_benchmarks}/{total_benchmarks}")
+        print(f"Success Rate: {report['summary']['success_rate']}")
+        print(f"Total Duration: {report['summary']['total_duration']}")
+        print(f"Report saved: {report_file}")
+
+        return report
+
+
+def main():
+    import argparse
+
+    benchmark = PerformanceBenchmark()
+
+    benchmarks = {
+        "--ref-tags": benchmark.benchmark_ref_tag_allocation,
+        "--ref-stress": benchmark.stress_ref_counter_concurrency,
+        "--handover-sync": benchmark.verify_handover_sync_no_rollback,
+        "--handover-sync-archives": benchmark.verify_handover_sync_same_day_archives,
+        "--chain": benchmark.benchmark_context_chain_lookup,
+        "--chain-audit": benchmark.benchmark_chain_audit,
+        "--compaction": benchmark.verify_compaction_keeps_chain,
+        "--snapshot": benchmark.benchmark_context_snapshot,
+        "--batch-capture": benchmark.benchmark_batched_capture,
+        "--encoding": benchmark.benchmark_canonical_encoding,
+        "--delta": benchmark.benchmark_delta_snapshots,
+        "--health": benchmark.benchmark_health_counters,
+        "--heartbeats": benchmark.benchmark_heartbeat_sync,
+        "--resource-sampler": benchmark.benchmark_resource_sampler,
+        "--accounting": benchmark.benchmark_process_accounting,
+        "--event-monitor": benchmark.benchmark_event_monitor,
+        "--transparency-scan": benchmark.benchmark_transparency_scan,
+        "--emergency-ledger": benchmark.benchmark_emergency_ledger,
+        "--daemon": benchmark.benchmark_context_daemon,
+        "--async-capture": benchmark.benchmark_async_capture,
+        "--import-time": benchmark.benchmark_import_time,
+        "--handover-index": benchmark.benchmark_handover_index,
+        "--handover-stress": benchmark.stress_handover_concurrency,
+        "--handover-claims": benchmark.benchmark_handover_claims,
+        "--handover-payload": benchmark.benchmark_handover_payloads,
+        "--handover-archive": benchmark.benchmark_handover_archive,
+        "--state-sync": benchmark.benchmark_state_sync,
+    }
+
+    parser = argparse.ArgumentParser(
+        description='LOCUS Performance Benchmarks; runs every benchmark unless some are selected',
+        allow_abbrev=False
+    )
+    for flag, method in benchmarks.items():
+        parser.add_argument(flag, dest=method.__name__, action='store_true', help=method.__doc__)
+    # Unknown flags and --help exit here, before any benchmark runs
+    args = parser.parse_args()
+
+    # Handover and tracker benchmarks allocate through the default allocator; keep them off the production counter
+    ref_dir = tempfile.mkdtemp(prefix="locus_bench_ref_")
+    os.environ.setdefault("LOCUS_REF_COUNTER", os.path.join(ref_dir, "locus_ref_counter"))
+    os.environ.setdefault("LOCUS_REF_AUDIT_LOG", os.path.join(ref_dir, "locus_ref_audit.log"))
+
+    print("=== LOCUS Performance Benchmarks ===")
+    print(f"Started: {datetime.datetime.now().isoformat()}")
+
+    selected = [flag for flag, method in benchmarks.items() if getattr(args, method.__name__)]
+    for flag in selected or benchmarks:
+        benchmarks[flag]()
+
+    report = benchmark.generate_report()
+    shutil.rmtree(ref_dir, ignore_errors=True)
+
+    if report["summary"]["success_rate"] == "100.0%":
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()